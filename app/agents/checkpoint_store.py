@@ -0,0 +1,254 @@
+from __future__ import annotations
+# Module: execution_engine (step checkpoints)
+# Boundary: stdlib only; do NOT import runner/plan_executor/tools (plan_executor writes checkpoints here)
+# See: docs/architecture/modules.md
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+DEFAULT_CHECKPOINT_PATH = "docs-private/_runs/checkpoints.sqlite3"
+
+_RUN_ID_RE = re.compile(r"^[A-Za-z0-9_.-]{1,128}$")
+
+
+def _check_run_id(run_id: str) -> str:
+    if not isinstance(run_id, str) or not _RUN_ID_RE.match(run_id) or run_id in (".", ".."):
+        raise ValueError(f"invalid run_id: {run_id!r} (use letters, digits, '_', '.', '-')")
+    return run_id
+
+
+def _plan_only(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in payload.items() if k != "execution_results"}
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+@dataclass
+class Checkpoint:
+    """
+    What a store holds for one run.
+
+    - payload: the plan being executed (without execution_results)
+    - options: execution options to resume with (strict_degraded, max_workers)
+    - rows: saved result rows of completed steps (ok, with a fingerprint), in save order
+    - finished: the run reached __meta__; task_status is its final status
+    """
+    run_id: str
+    payload: Dict[str, Any]
+    options: Dict[str, Any] = field(default_factory=dict)
+    rows: List[Dict[str, Any]] = field(default_factory=list)
+    finished: bool = False
+    task_status: Optional[str] = None
+    updated_at: float = 0.0
+
+
+class SqliteCheckpointStore:
+    """
+    Step checkpoints in a local SQLite file (stdlib sqlite3, WAL).
+
+    One row per run (plan, options, status) and one per completed step keyed by
+    (run_id, step fingerprint); each step is committed as soon as it is saved, so a crash loses
+    at most the steps still in flight. Safe to share across threads.
+    """
+
+    def __init__(self, path: str = DEFAULT_CHECKPOINT_PATH) -> None:
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        self.path = str(p)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoint_runs ("
+                " run_id TEXT PRIMARY KEY,"
+                " plan_json TEXT NOT NULL,"
+                " options_json TEXT NOT NULL,"
+                " finished INTEGER NOT NULL DEFAULT 0,"
+                " task_status TEXT,"
+                " updated_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoint_steps ("
+                " run_id TEXT NOT NULL,"
+                " fingerprint TEXT NOT NULL,"
+                " step_id TEXT,"
+                " row_json TEXT NOT NULL,"
+                " saved_at REAL NOT NULL,"
+                " PRIMARY KEY (run_id, fingerprint))"
+            )
+            self._conn.commit()
+
+    def save_plan(self, run_id: str, payload: Dict[str, Any], options: Dict[str, Any]) -> None:
+        """
+        Start (or restart) a run: store its plan and options; saved steps are kept.
+        """
+        _check_run_id(run_id)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO checkpoint_runs (run_id, plan_json, options_json, finished, task_status, updated_at)"
+                " VALUES (?, ?, ?, 0, NULL, ?)"
+                " ON CONFLICT(run_id) DO UPDATE SET plan_json = excluded.plan_json,"
+                " options_json = excluded.options_json, finished = 0, task_status = NULL,"
+                " updated_at = excluded.updated_at",
+                (run_id, _dumps(_plan_only(payload)), _dumps(options), time.time()),
+            )
+            self._conn.commit()
+
+    def save_step(self, run_id: str, fingerprint: str, row: Dict[str, Any]) -> None:
+        """
+        Persist one completed step (first save per fingerprint wins).
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO checkpoint_steps (run_id, fingerprint, step_id, row_json, saved_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (run_id, fingerprint, row.get("step_id"), _dumps(row), time.time()),
+            )
+            self._conn.commit()
+
+    def finish(self, run_id: str, task_status: Optional[str]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE checkpoint_runs SET finished = 1, task_status = ?, updated_at = ? WHERE run_id = ?",
+                (task_status, time.time(), run_id),
+            )
+            self._conn.commit()
+
+    def load(self, run_id: str) -> Optional[Checkpoint]:
+        with self._lock:
+            run = self._conn.execute(
+                "SELECT plan_json, options_json, finished, task_status, updated_at FROM checkpoint_runs"
+                " WHERE run_id = ?",
+                (run_id,),
+            ).fetchone()
+            if run is None:
+                return None
+            steps = self._conn.execute(
+                "SELECT row_json FROM checkpoint_steps WHERE run_id = ? ORDER BY saved_at, rowid", (run_id,)
+            ).fetchall()
+        return Checkpoint(
+            run_id=run_id,
+            payload=json.loads(run[0]),
+            options=json.loads(run[1]),
+            rows=[json.loads(s[0]) for s in steps],
+            finished=bool(run[2]),
+            task_status=run[3],
+            updated_at=float(run[4]),
+        )
+
+    def pending_runs(self) -> List[str]:
+        """
+        run_ids that started but never finished (candidates for resume_plan after a restart).
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT run_id FROM checkpoint_runs WHERE finished = 0 ORDER BY updated_at"
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def delete(self, run_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM checkpoint_steps WHERE run_id = ?", (run_id,))
+            self._conn.execute("DELETE FROM checkpoint_runs WHERE run_id = ?", (run_id,))
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class DirCheckpointStore:
+    """
+    Step checkpoints as JSON files: <root>/<run_id>/run.json and steps/<fingerprint>.json.
+
+    Every file is written to a temp name and renamed into place, so a crash never leaves a
+    partial checkpoint. Works across processes on a shared filesystem (no locking: one writer
+    per run_id).
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _run_dir(self, run_id: str) -> Path:
+        return self.root / _check_run_id(run_id)
+
+    @staticmethod
+    def _write(path: Path, value: Any) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(_dumps(value), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def save_plan(self, run_id: str, payload: Dict[str, Any], options: Dict[str, Any]) -> None:
+        self._write(
+            self._run_dir(run_id) / "run.json",
+            {
+                "payload": _plan_only(payload),
+                "options": options,
+                "finished": False,
+                "task_status": None,
+                "updated_at": time.time(),
+            },
+        )
+
+    def save_step(self, run_id: str, fingerprint: str, row: Dict[str, Any]) -> None:
+        path = self._run_dir(run_id) / "steps" / f"{_check_run_id(fingerprint)}.json"
+        if not path.exists():
+            self._write(path, {"saved_at": time.time(), "row": row})
+
+    def finish(self, run_id: str, task_status: Optional[str]) -> None:
+        path = self._run_dir(run_id) / "run.json"
+        if path.exists():
+            run = json.loads(path.read_text(encoding="utf-8"))
+            run.update(finished=True, task_status=task_status, updated_at=time.time())
+            self._write(path, run)
+
+    def load(self, run_id: str) -> Optional[Checkpoint]:
+        run_dir = self._run_dir(run_id)
+        try:
+            run = json.loads((run_dir / "run.json").read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        saved = []
+        for f in (run_dir / "steps").glob("*.json"):
+            saved.append(json.loads(f.read_text(encoding="utf-8")))
+        saved.sort(key=lambda s: s.get("saved_at") or 0.0)
+        return Checkpoint(
+            run_id=run_id,
+            payload=run.get("payload") or {},
+            options=run.get("options") or {},
+            rows=[s["row"] for s in saved],
+            finished=bool(run.get("finished")),
+            task_status=run.get("task_status"),
+            updated_at=float(run.get("updated_at") or 0.0),
+        )
+
+    def pending_runs(self) -> List[str]:
+        out = []
+        for run_file in self.root.glob("*/run.json"):
+            run = json.loads(run_file.read_text(encoding="utf-8"))
+            if not run.get("finished"):
+                out.append((float(run.get("updated_at") or 0.0), run_file.parent.name))
+        return [run_id for _, run_id in sorted(out)]
+
+    def delete(self, run_id: str) -> None:
+        run_dir = self._run_dir(run_id)
+        for f in sorted(run_dir.rglob("*"), reverse=True):
+            f.unlink() if f.is_file() else f.rmdir()
+        if run_dir.exists():
+            run_dir.rmdir()
+
+    def close(self) -> None:
+        pass
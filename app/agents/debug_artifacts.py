@@ -0,0 +1,288 @@
+from __future__ import annotations
+# Module: agent_orchestration (debug artifacts)
+# Boundary: do NOT import app.tools/* or plan_executor; this only persists raw model outputs
+# See: docs/architecture/modules.md
+
+import atexit
+import gzip
+import hashlib
+import os
+import queue
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+DEFAULT_DEBUG_ROOT = "docs-private/_debug/runs"
+
+# writer_from_env retention defaults (every run writes artifacts, so disk use must stay bounded)
+DEFAULT_DEBUG_MAX_MB = 256.0
+DEFAULT_DEBUG_MAX_AGE_HOURS = 7 * 24.0
+
+
+class DebugArtifactWriter:
+    """
+    Background writer for run-scoped debug artifacts.
+
+    - submit() never touches disk: it enqueues and returns the target path.
+    - Artifacts are filed as <root>/<run_id>/<filename>[.gz], so concurrent runs never collide.
+    - Sampling is decided per run_id (all-or-nothing), so a sampled run keeps every attempt.
+    - Retention (age and total size) prunes whole run directories, oldest first.
+    - When the queue is full, artifacts are dropped (counted) instead of blocking the request.
+    """
+
+    def __init__(
+        self,
+        *,
+        root: str = DEFAULT_DEBUG_ROOT,
+        compress: bool = False,
+        sample_rate: float = 1.0,
+        max_total_bytes: Optional[int] = None,
+        max_age_seconds: Optional[float] = None,
+        max_queue: int = 1024,
+        retention_interval_seconds: float = 30.0,
+    ) -> None:
+        self.root = Path(root)
+        self.compress = compress
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        self.max_total_bytes = max_total_bytes
+        self.max_age_seconds = max_age_seconds
+        self.retention_interval_seconds = retention_interval_seconds
+
+        self._queue: "queue.Queue[Optional[Tuple[Path, str]]]" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._last_retention = 0.0
+        self._stats: Dict[str, int] = {"submitted": 0, "written": 0, "dropped": 0, "sampled_out": 0, "errors": 0, "pruned_runs": 0}
+
+    # ---- request path ----
+
+    def should_capture(self, run_id: str) -> bool:
+        if self.sample_rate >= 1.0:
+            return True
+        if self.sample_rate <= 0.0:
+            return False
+        h = int(hashlib.sha256(run_id.encode("utf-8")).hexdigest()[:8], 16)
+        return (h / 0xFFFFFFFF) < self.sample_rate
+
+    def submit(self, run_id: str, filename: str, content: str) -> Optional[str]:
+        """
+        Enqueue one artifact. Returns the path it will be written to, or None if skipped.
+        """
+        if not self.should_capture(run_id):
+            with self._lock:
+                self._stats["sampled_out"] += 1
+            return None
+
+        name = filename + ".gz" if self.compress else filename
+        target = self.root / run_id / name
+
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait((target, content or ""))
+        except queue.Full:
+            with self._lock:
+                self._stats["dropped"] += 1
+            return None
+
+        with self._lock:
+            self._stats["submitted"] += 1
+        return str(target)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    # ---- lifecycle ----
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued artifact is written. Returns False on timeout.
+        """
+        if self._thread is None:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is None:
+            return
+        self.flush(timeout)
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            return
+        thread.join(timeout)
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None or self._closed:
+                return
+            t = threading.Thread(target=self._worker, name="debug-artifact-writer", daemon=True)
+            self._thread = t
+            t.start()
+
+    # ---- background worker ----
+
+    def _worker(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._write(*item)
+                self._maybe_enforce_retention()
+            except Exception:
+                with self._lock:
+                    self._stats["errors"] += 1
+            finally:
+                self._queue.task_done()
+
+    def _write(self, target: Path, content: str) -> None:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        data = content.encode("utf-8")
+        if self.compress:
+            data = gzip.compress(data)
+        tmp = target.with_name(target.name + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, target)
+        with self._lock:
+            self._stats["written"] += 1
+
+    def _maybe_enforce_retention(self) -> None:
+        if self.max_total_bytes is None and self.max_age_seconds is None:
+            return
+        now = time.monotonic()
+        if self._last_retention and (now - self._last_retention) < self.retention_interval_seconds:
+            return
+        self._last_retention = now
+        self.enforce_retention()
+
+    def enforce_retention(self) -> int:
+        """
+        Prune run directories by age, then by total size (oldest first).
+        Returns the number of run directories removed.
+        """
+        if not self.root.exists():
+            return 0
+
+        runs = []
+        for d in self.root.iterdir():
+            if not d.is_dir():
+                continue
+            size = 0
+            mtime = 0.0
+            for f in d.iterdir():
+                try:
+                    st = f.stat()
+                except OSError:
+                    continue
+                size += st.st_size
+                mtime = max(mtime, st.st_mtime)
+            runs.append((mtime, size, d))
+        runs.sort(key=lambda x: x[0])
+
+        removed = 0
+        now = time.time()
+        kept = []
+        for mtime, size, d in runs:
+            if self.max_age_seconds is not None and (now - mtime) > self.max_age_seconds:
+                shutil.rmtree(d, ignore_errors=True)
+                removed += 1
+            else:
+                kept.append((mtime, size, d))
+
+        if self.max_total_bytes is not None:
+            total = sum(size for _, size, _ in kept)
+            for _, size, d in kept:
+                if total <= self.max_total_bytes:
+                    break
+                shutil.rmtree(d, ignore_errors=True)
+                total -= size
+                removed += 1
+
+        if removed:
+            with self._lock:
+                self._stats["pruned_runs"] += removed
+        return removed
+
+
+def _get_float_env(name: str) -> Optional[float]:
+    v = os.getenv(name)
+    if not v:
+        return None
+    try:
+        return float(v)
+    except ValueError:
+        return None
+
+
+def _get_bool_env(name: str) -> bool:
+    v = (os.getenv(name) or "").strip().lower()
+    return v in ("1", "true", "yes", "y", "on")
+
+
+def writer_from_env() -> DebugArtifactWriter:
+    """
+    Build a writer from env (all optional):
+
+    - AGENT_DEBUG_DIR              (default: docs-private/_debug/runs)
+    - AGENT_DEBUG_SAMPLE_RATE      (0.0-1.0, default: 1.0)
+    - AGENT_DEBUG_COMPRESS         (true/false, default: false)
+    - AGENT_DEBUG_MAX_MB           (total size cap, default: 256; 0 = unlimited)
+    - AGENT_DEBUG_MAX_AGE_HOURS    (age cap, default: 168 = 7 days; 0 = unlimited)
+    """
+    sample_rate = _get_float_env("AGENT_DEBUG_SAMPLE_RATE")
+    max_mb = _get_float_env("AGENT_DEBUG_MAX_MB")
+    max_age_h = _get_float_env("AGENT_DEBUG_MAX_AGE_HOURS")
+    if max_mb is None:
+        max_mb = DEFAULT_DEBUG_MAX_MB
+    if max_age_h is None:
+        max_age_h = DEFAULT_DEBUG_MAX_AGE_HOURS
+    return DebugArtifactWriter(
+        root=os.getenv("AGENT_DEBUG_DIR") or DEFAULT_DEBUG_ROOT,
+        compress=_get_bool_env("AGENT_DEBUG_COMPRESS"),
+        sample_rate=1.0 if sample_rate is None else sample_rate,
+        max_total_bytes=int(max_mb * 1024 * 1024) if max_mb > 0 else None,
+        max_age_seconds=max_age_h * 3600.0 if max_age_h > 0 else None,
+    )
+
+
+_DEFAULT_WRITER: Optional[DebugArtifactWriter] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def get_debug_writer() -> DebugArtifactWriter:
+    global _DEFAULT_WRITER
+    if _DEFAULT_WRITER is None:
+        with _DEFAULT_LOCK:
+            if _DEFAULT_WRITER is None:
+                _DEFAULT_WRITER = writer_from_env()
+                atexit.register(_DEFAULT_WRITER.close)
+    return _DEFAULT_WRITER
+
+
+def set_debug_writer(writer: DebugArtifactWriter) -> None:
+    """
+    Replace the process-wide writer (e.g. API startup with custom retention).
+    """
+    global _DEFAULT_WRITER
+    with _DEFAULT_LOCK:
+        previous = _DEFAULT_WRITER
+        _DEFAULT_WRITER = writer
+        atexit.register(writer.close)
+    if previous is not None and previous is not writer:
+        previous.close()
@@ -0,0 +1,270 @@
+from __future__ import annotations
+# Module: agent_orchestration (rule-based planner)
+# Boundary: do NOT import app.tools/* or plan_executor; rules only emit contract plans
+# See: docs/architecture/modules.md
+
+import json
+import re
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Pattern, Sequence, Tuple
+
+from app.agents.plan_validator import validate_plan_payload
+
+_DEFAULT_ASSUMPTIONS: Tuple[str, ...] = ("Input matched a deterministic fast-path intent rule.",)
+
+
+@dataclass(frozen=True)
+class IntentRule:
+    """
+    One fast-path intent.
+
+    - patterns: regexes tried in order (case-insensitive, full match on the normalized input);
+      named groups become template variables.
+    - task_summary / steps: plan templates; "{var}" in strings is filled from the named groups
+      (other braces, e.g. unknown names or JSON in a loaded rule, are kept as written).
+      Each step template: {"tool": str, "args": {...}, "title": str, "dependencies": [step_id, ...]}
+      (description / deliverable / acceptance are optional). Step ids are step_1..step_N.
+    """
+    name: str
+    patterns: Tuple[str, ...]
+    task_summary: str
+    steps: Tuple[Dict[str, Any], ...]
+    assumptions: Tuple[str, ...] = _DEFAULT_ASSUMPTIONS
+    risks: Tuple[str, ...] = ()
+
+
+# A captured argument is one clause: it may not contain a conjunction or clause separator, so
+# multi-intent inputs ("search X and email it", "搜索X然后写邮件") miss and go to the LLM planner.
+_EN_JOINERS = r"\b(?:and|then|also|plus|after|before|afterwards)\b"
+_ZH_JOINERS = r"并|然后|再|和|以及|接着|同时|之后|随后"
+_EN_QUERY = rf"(?P<query>(?:(?!{_EN_JOINERS})[^,;:&])+?)"
+_ZH_QUERY = rf"(?P<query>(?:(?!{_ZH_JOINERS})[^，,；;：:。、&])+?)"
+_ECHO_TEXT = rf"(?P<text>(?:(?!{_EN_JOINERS}|{_ZH_JOINERS})[^,;:&，；：。])+?)"
+
+DEFAULT_INTENT_RULES: Tuple[IntentRule, ...] = (
+    IntentRule(
+        name="current_time",
+        patterns=(
+            r"(?:what(?:'s| is) the (?:current )?time(?: now)?|what time is it(?: now)?|current time|time now)[\s.?!]*",
+            r"(?:现在几点了?|现在是几点|当前时间|现在的时间|现在时间)[\s。？！?!]*",
+        ),
+        task_summary="Get the current UTC time.",
+        steps=(
+            {
+                "tool": "get_time",
+                "args": {},
+                "title": "Get current time",
+                "deliverable": "Current time in UTC (ISO8601)",
+            },
+        ),
+    ),
+    IntentRule(
+        name="search_and_summarize",
+        patterns=(
+            rf"(?:search|look up)\s+(?:for\s+)?{_EN_QUERY}\s+and\s+summari[sz]e(?:\s+(?:it|them|the results))?[\s.?!]*",
+            rf"(?:搜索|查找|检索)\s*{_ZH_QUERY}\s*(?:并|然后|再)\s*(?:总结|概括|摘要)[\s。？！?!]*",
+        ),
+        task_summary="Search local docs for '{query}' and summarize the results.",
+        steps=(
+            {
+                "tool": "search_tool",
+                "args": {"query": "{query}", "top_k": 3},
+                "title": "Search local docs",
+                "deliverable": "Matching docs for the query",
+            },
+            {
+                "tool": "summarize_tool",
+                "args": {"docs": "$step_1.output.docs", "max_points": 2},
+                "title": "Summarize search results",
+                "dependencies": ["step_1"],
+                "deliverable": "Key points from the matching docs",
+            },
+        ),
+        risks=("The local corpus may not contain relevant docs.",),
+    ),
+    IntentRule(
+        name="search",
+        patterns=(
+            rf"(?:search|look up)\s+(?:for\s+)?{_EN_QUERY}[\s.?!]*",
+            rf"(?:搜索|查找|检索)\s*{_ZH_QUERY}[\s。？！?!]*",
+        ),
+        task_summary="Search local docs for '{query}'.",
+        steps=(
+            {
+                "tool": "search_tool",
+                "args": {"query": "{query}", "top_k": 3},
+                "title": "Search local docs",
+                "deliverable": "Matching docs for the query",
+            },
+        ),
+        risks=("The local corpus may not contain relevant docs.",),
+    ),
+    IntentRule(
+        name="echo",
+        # explicit "echo: <text>" only ("repeat the last search" is a request, not an echo)
+        patterns=(rf"echo\s*[:：]\s*{_ECHO_TEXT}",),
+        task_summary="Echo the given text.",
+        steps=(
+            {
+                "tool": "echo_tool",
+                "args": {"text": "{text}"},
+                "title": "Echo text",
+                "deliverable": "The echoed text",
+            },
+        ),
+    ),
+)
+
+
+def load_intent_rules(path: str) -> Tuple[IntentRule, ...]:
+    """
+    Load an intent table from a JSON file: a list of objects with the IntentRule fields.
+    """
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    if not isinstance(data, list):
+        raise ValueError(f"intent rules file must contain a JSON array: {path}")
+
+    rules: List[IntentRule] = []
+    for i, item in enumerate(data):
+        if not isinstance(item, dict):
+            raise ValueError(f"intent rule [{i}] must be an object")
+        patterns = item.get("patterns")
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        steps = item.get("steps")
+        if not item.get("name") or not patterns or not isinstance(steps, list) or not steps:
+            raise ValueError(f"intent rule [{i}] requires name, patterns and non-empty steps")
+        rules.append(
+            IntentRule(
+                name=str(item["name"]),
+                patterns=tuple(str(p) for p in patterns),
+                task_summary=str(item.get("task_summary") or item["name"]),
+                steps=tuple(steps),
+                assumptions=tuple(item.get("assumptions") or _DEFAULT_ASSUMPTIONS),
+                risks=tuple(item.get("risks") or ()),
+            )
+        )
+    return tuple(rules)
+
+
+_PLACEHOLDER_RE = re.compile(r"\{(\w+)\}")
+
+
+def _fill(value: Any, variables: Dict[str, str]) -> Any:
+    if isinstance(value, str):
+        if "{" not in value:
+            return value
+        # like string.Template.safe_substitute, for "{var}": never raises on a rule template
+        return _PLACEHOLDER_RE.sub(lambda m: variables.get(m.group(1), m.group(0)), value)
+    if isinstance(value, dict):
+        return {k: _fill(v, variables) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_fill(v, variables) for v in value]
+    return value
+
+
+@dataclass
+class FastPathMatch:
+    rule: str
+    plan: Dict[str, Any]
+
+
+@dataclass
+class _CompiledRule:
+    rule: IntentRule
+    regexes: List[Pattern[str]] = field(default_factory=list)
+
+
+class FastPathPlanner:
+    """
+    Deterministic planner for known intents (no LLM call).
+
+    - Rules are tried in table order; the first matching pattern wins.
+    - Emitted plans pass validate_plan_payload; a rule that produces an invalid plan (or a step
+      count different from expected_steps) is treated as a miss, so the caller falls back to the LLM.
+    - stats() reports lookups / hits / misses / fallbacks and bypass_rate
+      (= runs that skipped the LLM planner / lookups).
+    """
+
+    def __init__(self, rules: Optional[Sequence[IntentRule]] = None) -> None:
+        self.rules: Tuple[IntentRule, ...] = tuple(DEFAULT_INTENT_RULES if rules is None else rules)
+        self._compiled: List[_CompiledRule] = [
+            _CompiledRule(r, [re.compile(p, flags=re.IGNORECASE) for p in r.patterns]) for r in self.rules
+        ]
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = {"lookups": 0, "hits": 0, "misses": 0, "invalid": 0, "fallbacks": 0}
+        self._rule_hits: Dict[str, int] = {}
+        self._rule_fallbacks: Dict[str, int] = {}
+
+    def plan(self, user_input: str, *, expected_steps: Optional[int] = None) -> Optional[FastPathMatch]:
+        text = " ".join((user_input or "").split())
+        match = self._match(text, expected_steps) if text else None
+
+        with self._lock:
+            self._stats["lookups"] += 1
+            if match is None:
+                self._stats["misses"] += 1
+            else:
+                self._stats["hits"] += 1
+                self._rule_hits[match.rule] = self._rule_hits.get(match.rule, 0) + 1
+        return match
+
+    def record_fallback(self, rule: str) -> None:
+        """
+        The fast-path plan was executed but did not complete; the run went to the LLM planner.
+        """
+        with self._lock:
+            self._stats["fallbacks"] += 1
+            self._rule_fallbacks[rule] = self._rule_fallbacks.get(rule, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._stats)
+            out["rules"] = dict(self._rule_hits)
+            out["rule_fallbacks"] = dict(self._rule_fallbacks)
+        bypassed = out["hits"] - out["fallbacks"]
+        out["bypass_rate"] = (bypassed / out["lookups"]) if out["lookups"] else 0.0
+        return out
+
+    def _match(self, text: str, expected_steps: Optional[int]) -> Optional[FastPathMatch]:
+        for compiled in self._compiled:
+            rule = compiled.rule
+            if expected_steps is not None and len(rule.steps) != expected_steps:
+                continue
+            for rx in compiled.regexes:
+                m = rx.fullmatch(text)
+                if m is None:
+                    continue
+                variables = {k: (v or "").strip() for k, v in m.groupdict().items()}
+                plan = self._build_plan(rule, variables)
+                if validate_plan_payload(plan):
+                    with self._lock:
+                        self._stats["invalid"] += 1
+                    return None
+                return FastPathMatch(rule=rule.name, plan=plan)
+        return None
+
+    @staticmethod
+    def _build_plan(rule: IntentRule, variables: Dict[str, str]) -> Dict[str, Any]:
+        steps: List[Dict[str, Any]] = []
+        for i, tpl in enumerate(rule.steps, start=1):
+            title = _fill(tpl.get("title") or f"Run {tpl.get('tool')}", variables)
+            steps.append(
+                {
+                    "step_id": f"step_{i}",
+                    "title": title,
+                    "description": _fill(tpl.get("description") or title, variables),
+                    "dependencies": list(tpl.get("dependencies") or []),
+                    "deliverable": _fill(tpl.get("deliverable") or "Tool output", variables),
+                    "acceptance": _fill(tpl.get("acceptance") or "Tool call succeeds", variables),
+                    "tool": {"name": tpl.get("tool"), "args": _fill(tpl.get("args") or {}, variables)},
+                }
+            )
+        return {
+            "task_summary": _fill(rule.task_summary, variables),
+            "assumptions": list(rule.assumptions),
+            "risks": list(rule.risks),
+            "steps": steps,
+        }
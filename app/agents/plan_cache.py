@@ -0,0 +1,239 @@
+from __future__ import annotations
+# Module: agent_orchestration (plan cache)
+# Boundary: do NOT import app.tools/* or plan_executor; this only stores validated plans
+# See: docs/architecture/modules.md
+
+import copy
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def normalize_user_input(text: str) -> str:
+    """
+    Normalize user input for cache keys.
+
+    - strip leading/trailing whitespace
+    - collapse inner whitespace runs to a single space
+
+    Case is preserved on purpose: tool args (e.g. echo text) may depend on it.
+    """
+    return " ".join((text or "").split())
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def make_plan_cache_key(
+    user_input: str,
+    *,
+    system_prompt: str,
+    schema_enabled: bool,
+    expected_steps: Optional[int],
+    model: Optional[str],
+    context: Optional[str] = None,
+) -> str:
+    """
+    Build a stable cache key for a validated plan.
+
+    Key parts:
+    - normalized user_input
+    - system prompt hash (base prompt + schema addendum, as sent to the model)
+    - schema mode
+    - expected_steps
+    - model
+    - conversation context hash (only when present, so stateless keys are unchanged)
+    """
+    parts = {
+        "input": normalize_user_input(user_input),
+        "prompt_sha256": hash_text(system_prompt),
+        "schema_enabled": bool(schema_enabled),
+        "expected_steps": expected_steps,
+        "model": model or "",
+    }
+    if context:
+        parts["context_sha256"] = hash_text(context)
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hash_text(raw)
+
+
+def make_plan_scope_key(
+    *,
+    system_prompt: str,
+    schema_enabled: bool,
+    expected_steps: Optional[int],
+    model: Optional[str],
+    context: Optional[str] = None,
+) -> str:
+    """
+    Everything in make_plan_cache_key except the input: plans are only shared within a scope
+    (used by the semantic plan cache, which matches inputs by similarity instead).
+    """
+    parts = {
+        "prompt_sha256": hash_text(system_prompt),
+        "schema_enabled": bool(schema_enabled),
+        "expected_steps": expected_steps,
+        "model": model or "",
+    }
+    if context:
+        parts["context_sha256"] = hash_text(context)
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hash_text(raw)
+
+
+class SqlitePlanCacheBackend:
+    """
+    Persistent plan cache backend (stdlib sqlite3, one row per key).
+
+    Interface (duck-typed, shared by any backend passed to PlanCache):
+    - load(key) -> (stored_at, plan) | None
+    - store(key, stored_at, plan) -> None
+    - delete(key) -> None
+    """
+
+    def __init__(self, path: str = "docs-private/_cache/plan_cache.sqlite3") -> None:
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        self.path = str(p)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS plan_cache ("
+                " key TEXT PRIMARY KEY,"
+                " stored_at REAL NOT NULL,"
+                " plan_json TEXT NOT NULL)"
+            )
+            self._conn.commit()
+
+    def load(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT stored_at, plan_json FROM plan_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if not row:
+            return None
+        try:
+            plan = json.loads(row[1])
+        except json.JSONDecodeError:
+            self.delete(key)
+            return None
+        if not isinstance(plan, dict):
+            return None
+        return float(row[0]), plan
+
+    def store(self, key: str, stored_at: float, plan: Dict[str, Any]) -> None:
+        plan_json = json.dumps(plan, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO plan_cache (key, stored_at, plan_json) VALUES (?, ?, ?)",
+                (key, stored_at, plan_json),
+            )
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM plan_cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class PlanCache:
+    """
+    Validated-plan cache (LRU + TTL, optional persistent backend).
+
+    - Stores the final validated + normalized plan (before execution).
+    - In-memory LRU is the front tier; backend (if any) is read-through / write-through.
+    - Entries older than ttl_seconds are treated as misses and evicted.
+    - Returned plans are deep copies; callers may mutate them freely.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 256,
+        ttl_seconds: Optional[float] = 3600.0,
+        backend: Optional[Any] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._stats: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0, "invalidations": 0}
+
+    def _expired(self, stored_at: float) -> bool:
+        if self.ttl_seconds is None:
+            return False
+        return (self._clock() - stored_at) > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._expired(entry[0]):
+                    del self._entries[key]
+                    self._stats["expired"] += 1
+                    entry = None
+                else:
+                    self._entries.move_to_end(key)
+
+        if entry is None and self.backend is not None:
+            loaded = self.backend.load(key)
+            if loaded is not None:
+                if self._expired(loaded[0]):
+                    self.backend.delete(key)
+                    with self._lock:
+                        self._stats["expired"] += 1
+                else:
+                    entry = loaded
+                    with self._lock:
+                        self._remember(key, entry)
+
+        with self._lock:
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+        return copy.deepcopy(entry[1])
+
+    def put(self, key: str, plan: Dict[str, Any]) -> None:
+        entry = (self._clock(), copy.deepcopy(plan))
+        with self._lock:
+            self._remember(key, entry)
+        if self.backend is not None:
+            self.backend.store(key, entry[0], entry[1])
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._stats["invalidations"] += 1
+        if self.backend is not None:
+            self.backend.delete(key)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            out = dict(self._stats)
+            out["size"] = len(self._entries)
+        return out
+
+    def _remember(self, key: str, entry: Tuple[float, Dict[str, Any]]) -> None:
+        # caller holds self._lock
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
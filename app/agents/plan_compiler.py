@@ -0,0 +1,293 @@
+from __future__ import annotations
+# Module: contract_prompt (fused plan normalization + validation)
+# Boundary: stdlib only; do NOT import runner/plan_executor (both import this)
+# See: docs/architecture/modules.md
+
+from dataclasses import dataclass
+from functools import cached_property
+from typing import AbstractSet, Any, Dict, List, Optional, Tuple
+
+PLACEHOLDER_STEP_ID = "step_placeholder"
+
+_REQUIRED_TOP = ("task_summary", "steps", "assumptions", "risks")
+_REQUIRED_STEP_FIELDS = ("step_id", "title", "description", "dependencies", "deliverable", "acceptance", "tool")
+_REQUIRED_STEP_KEYS = frozenset(_REQUIRED_STEP_FIELDS)
+_STRING_STEP_FIELDS = ("title", "description", "deliverable", "acceptance")
+
+
+@dataclass(frozen=True)
+class PlanIndex:
+    """
+    Lookup structure over a plan's steps, built once and shared by validation and execution.
+
+    - ids: declared step_ids in plan order
+    - steps: step_id -> step object (the payload's own dicts, not copies)
+    - dependencies: step_id -> the step's dependency list
+    - size: len(payload["steps"]) when the index was built (a cheap staleness check)
+    - declared / dependents: derived views (see below)
+
+    Read-only by convention: the dicts and lists are shared with the payload.
+    """
+    ids: Tuple[str, ...]
+    steps: Dict[str, Dict[str, Any]]
+    dependencies: Dict[str, List[Any]]
+    size: int
+
+    @property
+    def declared(self) -> AbstractSet[str]:
+        """
+        Declared step ids, for dependency existence checks.
+        """
+        return self.steps.keys()
+
+    @cached_property
+    def dependents(self) -> Dict[str, Tuple[str, ...]]:
+        """
+        step_id -> step_ids that depend on it, in plan order (computed on first use).
+        """
+        out: Dict[str, List[str]] = {sid: [] for sid in self.ids}
+        for sid in self.ids:
+            for d in self.dependencies[sid]:
+                if isinstance(d, str) and d in out and out[d][-1:] != [sid]:
+                    out[d].append(sid)
+        return {k: tuple(v) for k, v in out.items()}
+
+    def matches_steps(self, steps: List[Any]) -> bool:
+        return len(steps) == self.size
+
+
+@dataclass(frozen=True)
+class CompiledPlan:
+    """
+    Result of compile_plan().
+
+    - payload: the normalized plan (same object that was passed in)
+    - index: PlanIndex of the normalized plan
+    - errors: contract errors, identical to validate_plan_payload(payload) after normalization
+    - expected_steps_error: expected_steps mismatch message (only checked when errors is empty)
+    """
+    payload: Dict[str, Any]
+    index: PlanIndex
+    errors: List[str]
+    expected_steps_error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors and self.expected_steps_error is None
+
+
+def _placeholder_step(prev_id: Optional[str]) -> Dict[str, Any]:
+    return {
+        "step_id": PLACEHOLDER_STEP_ID,  # renumbered below
+        "title": "补齐占位步骤",
+        "description": "为满足 expected_steps 的刚性步数要求，追加一个占位步骤。",
+        "dependencies": [prev_id] if prev_id else [],
+        "deliverable": "占位输出",
+        "acceptance": "输出包含占位文本",
+        "tool": {
+            "name": "echo_tool",
+            "args": {"text": "placeholder: padded by runner to satisfy expected_steps"},
+        },
+    }
+
+
+def _pad_steps(steps: List[Any], expected_steps: Optional[int]) -> None:
+    if expected_steps is None or len(steps) >= expected_steps:
+        return
+    prev_id: Optional[str] = None
+    for s in reversed(steps):
+        if isinstance(s, dict):
+            sid = s.get("step_id")
+            if isinstance(sid, str) and sid.strip():
+                prev_id = sid
+                break
+    for _ in range(len(steps), expected_steps):
+        steps.append(_placeholder_step(prev_id))
+        prev_id = PLACEHOLDER_STEP_ID
+
+
+def _check_tool(i: int, s: Dict[str, Any], errors: List[str], strict_tool_object: bool) -> None:
+    tool = s.get("tool")
+    if tool is None:
+        errors.append(f"steps[{i}] missing required field: tool")
+    elif isinstance(tool, str):
+        if strict_tool_object:
+            errors.append(f"steps[{i}].tool must be an object (string form is not allowed)")
+        else:
+            if not tool.strip():
+                errors.append(f"steps[{i}].tool must be a non-empty string")
+            args = s.get("args")
+            if args is not None and not isinstance(args, dict):
+                errors.append(f"steps[{i}].args must be an object when provided")
+    elif isinstance(tool, dict):
+        name = tool.get("name")
+        args = tool.get("args", {})
+        if not isinstance(name, str) or not name.strip():
+            errors.append(f"steps[{i}].tool.name must be a non-empty string")
+        if args is not None and not isinstance(args, dict):
+            errors.append(f"steps[{i}].tool.args must be an object")
+        if "args" in s:
+            errors.append(f"steps[{i}] must not provide both step.args and tool.args")
+    else:
+        errors.append(f"steps[{i}].tool must be a string or an object")
+
+
+def compile_plan(
+    payload: Dict[str, Any],
+    *,
+    expected_steps: Optional[int] = None,
+    strict_tool_object: bool = True,
+) -> CompiledPlan:
+    """
+    Normalize and validate a parsed plan in a single walk over its steps (mutates payload).
+
+    Normalization (the runner's deterministic hard-fixes):
+    - pad with echo_tool placeholder steps up to expected_steps
+    - renumber step_ids to step_1..step_N in plan order, rewriting dependencies accordingly
+    - keep only dependencies on earlier steps (self / forward / unknown / non-string refs dropped)
+
+    Validation: the validate_plan_payload contract on the normalized plan (same messages, same
+    order), then the expected_steps check. Dependency integrity and ordering hold by
+    construction after normalization, so they are not re-checked.
+    """
+    if not isinstance(payload, dict):
+        return CompiledPlan(payload, build_plan_index({}), ["payload must be an object"])
+
+    steps = payload.get("steps")
+    if isinstance(steps, list):
+        _pad_steps(steps, expected_steps)
+    else:
+        steps = []
+
+    # step_ids are positional after normalization; the old -> new mapping needs every old id
+    # first (a repeated id maps to its last position), so this one light scan precedes the walk
+    new_ids = [f"step_{idx}" for idx in range(1, len(steps) + 1)]
+    mapping: Dict[str, str] = {}
+    renumber = False
+    for s, new_id in zip(steps, new_ids):
+        sid = s.get("step_id") if isinstance(s, dict) else None
+        if isinstance(sid, str) and sid.strip():
+            mapping[sid] = new_id
+            renumber = renumber or sid != new_id
+
+    errors: List[str] = [f"missing top-level field: {k}" for k in _REQUIRED_TOP if k not in payload]
+    validate = not errors
+    if validate:
+        task_summary = payload["task_summary"]
+        if not isinstance(task_summary, str) or not task_summary.strip():
+            errors.append("task_summary must be a non-empty string")
+        if not steps:
+            errors.append("steps must be a non-empty array")
+            validate = False
+    if validate:
+        for k in ("assumptions", "risks"):
+            v = payload.get(k)
+            if not isinstance(v, list) or not all(isinstance(x, str) for x in v):
+                errors.append(f"{k} must be an array of strings")
+
+    # ---- single walk: renumber, fix dependencies, index, per-step checks ----
+    ids: List[str] = []
+    by_id: Dict[str, Dict[str, Any]] = {}
+    dependencies: Dict[str, List[Any]] = {}
+    step_errors: List[str] = []
+    shape_errors: List[str] = []
+    first_gap: Optional[int] = None  # position of the first non-object step
+    last_object = -1  # position of the last object step
+
+    for i, (s, sid) in enumerate(zip(steps, new_ids)):
+        if not isinstance(s, dict):
+            shape_errors.append(f"steps[{i}] must be an object")
+            if first_gap is None:
+                first_gap = i
+            continue
+
+        last_object = i
+        s["step_id"] = sid
+        deps = s.get("dependencies")
+        fixed: List[str] = []
+        if isinstance(deps, list):
+            for d in deps:
+                if isinstance(d, str):
+                    if renumber:
+                        d = mapping.get(d, d)
+                    if d in by_id:  # earlier steps only (also drops self / forward / unknown)
+                        fixed.append(d)
+        s["dependencies"] = fixed
+
+        ids.append(sid)
+        by_id[sid] = s
+        dependencies[sid] = fixed
+
+        if validate:
+            if not s.keys() >= _REQUIRED_STEP_KEYS:
+                for k in _REQUIRED_STEP_FIELDS:
+                    if k not in s:
+                        step_errors.append(f"steps[{i}] missing field: {k}")
+            for k in _STRING_STEP_FIELDS:
+                v = s.get(k)
+                if not isinstance(v, str) or not v.strip():
+                    if k in s:
+                        step_errors.append(f"steps[{i}].{k} must be a non-empty string")
+            tool = s.get("tool")
+            if not (
+                isinstance(tool, dict)
+                and "args" not in s
+                and isinstance(tool.get("name"), str)
+                and tool["name"].strip()
+                and isinstance(tool.get("args") or {}, dict)
+            ):
+                _check_tool(i, s, step_errors, strict_tool_object)
+            if "timeout_s" in s:
+                t = s["timeout_s"]
+                if isinstance(t, bool) or not isinstance(t, (int, float)) or t <= 0:
+                    step_errors.append(f"steps[{i}].timeout_s must be a positive number")
+
+    index = PlanIndex(ids=tuple(ids), steps=by_id, dependencies=dependencies, size=len(steps))
+
+    if validate:
+        errors.extend(shape_errors)
+        errors.extend(step_errors)
+        # step_id sequencing: ids are positional, so a non-object step leaves a gap
+        if ids and first_gap is not None:
+            if first_gap == 0:
+                errors.append("step_id sequence must start from step_1")
+            elif first_gap < last_object:
+                errors.append("step_id sequence must be contiguous: step_1..step_N")
+
+    expected_steps_error: Optional[str] = None
+    if not errors and expected_steps is not None:
+        if len(steps) != expected_steps:
+            expected_steps_error = f"expected_steps mismatch: expected {expected_steps} steps, got {len(steps)}"
+        elif len(ids) != expected_steps:
+            expected_ids = [f"step_{i}" for i in range(1, expected_steps + 1)]
+            expected_steps_error = (
+                f"expected_steps mismatch: step_ids must be {sorted(expected_ids)}, got {sorted(ids)}"
+            )
+
+    return CompiledPlan(payload, index, errors, expected_steps_error)
+
+
+def build_plan_index(payload: Dict[str, Any]) -> PlanIndex:
+    """
+    PlanIndex of a plan as-is (no normalization), e.g. a cached or hand-written plan.
+
+    Only object steps with a non-empty string step_id are indexed (a repeated id keeps its
+    first position in ids and its last step object, like a dict built in plan order).
+    """
+    steps = payload.get("steps") if isinstance(payload, dict) else None
+    if not isinstance(steps, list):
+        steps = []
+    ids: List[str] = []
+    by_id: Dict[str, Dict[str, Any]] = {}
+    dependencies: Dict[str, List[Any]] = {}
+    for s in steps:
+        if not isinstance(s, dict):
+            continue
+        sid = s.get("step_id")
+        if isinstance(sid, str) and sid.strip():
+            if sid not in by_id:
+                ids.append(sid)
+            by_id[sid] = s
+            deps = s.get("dependencies") or []
+            dependencies[sid] = deps if isinstance(deps, list) else []
+    return PlanIndex(ids=tuple(ids), steps=by_id, dependencies=dependencies, size=len(steps))
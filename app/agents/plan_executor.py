@@ -3,9 +3,21 @@ from __future__ import annotations
 # Boundary: do NOT import runner/entry_shell; do NOT own contract rules (keep those in plan_validator/prompt)
 # See: docs/architecture/modules.md
 
-from typing import Any, Optional, Tuple
-
-from app.tools.registry import dispatch_tool
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import AbstractSet, Any, AsyncIterator, Iterator, Optional, Tuple
+
+from app.agents.plan_compiler import PlanIndex
+from app.agents.spans import NULL_RECORDER
+from app.tools.base import ToolTimeoutError
+from app.tools.registry import dispatch_tool_cached, dispatch_tool_cached_async, get_tool
+from app.tools.result_cache import ToolResultCache
 
 
 def _parse_tool(step: dict[str, Any]) -> tuple[str, dict[str, Any]]:
@@ -74,7 +86,7 @@ def _detect_degraded(tool_name: str, args: dict[str, Any]) -> Tuple[bool, Option
     return True, reason, degraded_from
 
 
-def _normalize_ref_string(ref: str, *, deps: list[str], context: dict[str, dict[str, Any]]) -> str:
+def _normalize_ref_string(ref: str, *, relative_to: Optional[str]) -> str:
     """
     Normalize common model-drift reference strings into the canonical form.
 
@@ -88,8 +100,8 @@ def _normalize_ref_string(ref: str, *, deps: list[str], context: dict[str, dict[
     - ".output.docs" / "output.docs"   (relative form)
 
     Relative rule (Skeleton, deterministic):
-    - If ref is ".output.*" (no step_id) AND there is exactly 1 dependency,
-      rewrite it to "$<dep>.output.*".
+    - If ref is ".output.*" (no step_id) AND the step has exactly 1 dependency (relative_to),
+      rewrite it to "$<dep>.output.*". (A step only runs once that dependency succeeded.)
 
     Notes:
     - If normalization cannot safely infer intent, return the original string.
@@ -104,13 +116,12 @@ def _normalize_ref_string(ref: str, *, deps: list[str], context: dict[str, dict[
 
     # Relative: ".output.docs" or "output.docs" -> "$<only_dep>.output.docs"
     if (s.startswith(".output.") or s.startswith("output.")) and "step_" not in s:
-        if isinstance(deps, list) and len(deps) == 1 and isinstance(deps[0], str) and deps[0] in context:
-            dep = deps[0]
+        if relative_to is not None:
             if s.startswith(".output."):
                 tail = s[len(".output.") :]
             else:
                 tail = s[len("output.") :]
-            return f"${dep}.output.{tail}"
+            return f"${relative_to}.output.{tail}"
         return s
 
     # Drift: ".output.step_1.output.docs" or "output.step_1.output.docs"
@@ -133,121 +144,1244 @@ def _normalize_ref_string(ref: str, *, deps: list[str], context: dict[str, dict[
     return s
 
 
-def _resolve_ref_string(ref: str, *, deps: list[str], context: dict[str, dict[str, Any]]) -> Any:
+@dataclass(frozen=True)
+class _Ref:
+    """
+    A pre-parsed step reference: "$step_1.output.docs" -> step_id "step_1", path ("output", "docs").
+    source is the string as written in the plan (used in error messages).
     """
-    Resolve a minimal step reference expression.
+    source: str
+    step_id: str
+    path: Tuple[str, ...]
+
+    def lookup(self, status: dict[str, dict[str, Any]]) -> Any:
+        """
+        Resolve against the status entries ("$step_1" returns the whole status dict).
+        Raises ValueError if the reference cannot be resolved.
+        """
+        cur: Any = status.get(self.step_id)
+        if not cur:
+            raise ValueError(f"unresolved reference: {self.source} (unknown step_id)")
+        for key in self.path:
+            if isinstance(cur, dict) and key in cur:
+                cur = cur[key]
+            else:
+                raise ValueError(f"unresolved reference: {self.source} (missing path: {key})")
+        return cur
 
-    Supported canonical after normalization:
-    - "$step_1.output"
-    - "$step_1.output.docs"
-    - "$step_1" (returns the whole step status dict)
 
-    Notes:
-    - This is intentionally minimal and deterministic (Skeleton phase).
-    - If the reference cannot be resolved, raise ValueError.
+@dataclass(frozen=True)
+class _ArgTemplate:
+    """
+    A step's args, compiled once: the same list/dict tree with every reference string replaced
+    by a _Ref; everything else is a static value.
+
+    - refs: step_ids the args read (what the step observes besides its dependencies)
+    - render(status) builds fresh args (new lists/dicts, so tools never share the plan's objects)
     """
-    s = _normalize_ref_string(ref, deps=deps, context=context)
+    tree: Any
+    refs: frozenset[str]
 
-    if not s.startswith("$step_"):
-        return ref  # keep original unmodified if not resolvable / not a ref
+    def render(self, status: dict[str, dict[str, Any]]) -> Any:
+        return _render(self.tree, status)
 
-    expr = s[1:]  # strip leading '$'
-    parts = expr.split(".")
-    step_id = parts[0]  # "step_1"
-    rest = parts[1:]  # ["output", "docs"] etc.
 
-    st = context.get(step_id)
-    if not st:
-        raise ValueError(f"unresolved reference: {ref} (unknown step_id)")
+def _render(node: Any, status: dict[str, dict[str, Any]]) -> Any:
+    cls = node.__class__
+    if cls is _Ref:
+        return node.lookup(status)
+    if cls is list:
+        return [_render(v, status) for v in node]
+    if cls is dict:
+        return {k: _render(v, status) for k, v in node.items()}
+    return node
 
-    cur: Any = st
-    for key in rest:
-        if isinstance(cur, dict) and key in cur:
-            cur = cur[key]
-        else:
-            raise ValueError(f"unresolved reference: {ref} (missing path: {key})")
-    return cur
+
+def _raw_args(step: dict[str, Any]) -> Any:
+    # the args _parse_tool would return (not validated here)
+    tool = step.get("tool")
+    args = tool.get("args") if isinstance(tool, dict) else step.get("args")
+    return args or {}
+
+
+def _relative_target(deps: Any) -> Optional[str]:
+    if isinstance(deps, list) and len(deps) == 1 and isinstance(deps[0], str):
+        return deps[0]
+    return None
 
 
-def _resolve_refs(value: Any, *, deps: list[str], context: dict[str, dict[str, Any]]) -> Any:
+def _compile_args(args: Any, relative_to: Optional[str]) -> _ArgTemplate:
     """
-    Recursively resolve step references inside args.
+    Parse args once (canonical + deterministic drift forms, see _normalize_ref_string).
 
-    - str: normalize; if becomes "$step_" => resolve
-    - dict/list: deep-walk
-    - otherwise: passthrough
+    - str: normalize; if it becomes "$step_..." => _Ref, else keep the original string
+    - dict/list: deep-walk (dict keys are never references)
+    - otherwise: static
     """
-    if isinstance(value, str):
-        s = _normalize_ref_string(value, deps=deps, context=context)
-        if s.startswith("$step_"):
-            return _resolve_ref_string(value, deps=deps, context=context)
+    refs: set[str] = set()
+
+    def walk(value: Any) -> Any:
+        if isinstance(value, str):
+            s = _normalize_ref_string(value, relative_to=relative_to)
+            if not s.startswith("$step_"):
+                return value
+            parts = s[1:].split(".")
+            refs.add(parts[0])
+            return _Ref(value, parts[0], tuple(parts[1:]))
+        if isinstance(value, list):
+            return [walk(v) for v in value]
+        if isinstance(value, dict):
+            return {k: walk(v) for k, v in value.items()}
         return value
 
-    if isinstance(value, list):
-        return [_resolve_refs(v, deps=deps, context=context) for v in value]
+    return _ArgTemplate(walk(args), frozenset(refs))
+
+
+def _compile_step_template(step: Any) -> Optional[_ArgTemplate]:
+    if not isinstance(step, dict):
+        return None
+    return _compile_args(_raw_args(step), _relative_target(step.get("dependencies") or []))
+
+
+_TEMPLATE_CACHE_MAX = 256
+_TEMPLATE_CACHE: "OrderedDict[str, Tuple[Optional[_ArgTemplate], ...]]" = OrderedDict()
+_TEMPLATE_CACHE_LOCK = threading.Lock()
+
+
+def _template_fingerprint(steps: list[Any]) -> Optional[str]:
+    """
+    Identity of a plan for template compilation: per step, its args and its relative-reference
+    target (None when args are not plain JSON; such plans are compiled but not cached).
+    """
+    shape = [
+        [_raw_args(s), _relative_target(s.get("dependencies") or [])] if isinstance(s, dict) else None
+        for s in steps
+    ]
+    try:
+        raw = json.dumps(shape, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    except (TypeError, ValueError):
+        return None
+    return hashlib.sha256(raw).hexdigest()
+
+
+def _plan_templates(steps: list[Any]) -> Tuple[Optional[_ArgTemplate], ...]:
+    """
+    Compiled args templates of a plan, one per position (None for a non-object step).
 
-    if isinstance(value, dict):
-        return {k: _resolve_refs(v, deps=deps, context=context) for k, v in value.items()}
+    Templates are immutable and cached by _template_fingerprint (bounded LRU, process-wide), so
+    repeat runs of a plan -- and replans that come back with the same steps -- skip parsing.
+    """
+    key = _template_fingerprint(steps)
+    if key is not None:
+        with _TEMPLATE_CACHE_LOCK:
+            cached = _TEMPLATE_CACHE.get(key)
+            if cached is not None:
+                _TEMPLATE_CACHE.move_to_end(key)
+                return cached
+
+    templates = tuple(_compile_step_template(s) for s in steps)
+    if key is not None:
+        with _TEMPLATE_CACHE_LOCK:
+            _TEMPLATE_CACHE[key] = templates
+            while len(_TEMPLATE_CACHE) > _TEMPLATE_CACHE_MAX:
+                _TEMPLATE_CACHE.popitem(last=False)
+    return templates
+
+
+# Step status codes (execution_results[].status_code), set where each outcome is decided.
+# reason / error keep their human-readable text; classification uses the code.
+STATUS_OK = "OK"
+STATUS_FAILED = "FAILED"
+STATUS_SKIPPED_DEP = "SKIPPED_DEP"
+STATUS_SKIPPED_DEGRADED = "SKIPPED_DEGRADED"
+STATUS_BLOCKED_UNKNOWN_DEP = "BLOCKED_UNKNOWN_DEP"
+STATUS_TIMEOUT = "TIMEOUT"
+
+STEP_STATUS_CODES = frozenset(
+    {
+        STATUS_OK,
+        STATUS_FAILED,
+        STATUS_SKIPPED_DEP,
+        STATUS_SKIPPED_DEGRADED,
+        STATUS_BLOCKED_UNKNOWN_DEP,
+        STATUS_TIMEOUT,
+    }
+)
+
+
+def step_status_code(r: dict[str, Any]) -> Optional[str]:
+    """
+    Status code of a result row: its status_code, or (rows without one, e.g. stored by an older
+    version) the code inferred from ok / skipped / timed_out and the reason / error text.
+    None for a skipped row that gives no dependency reason (it only makes the task PARTIAL).
+    """
+    code = r.get("status_code")
+    if code in STEP_STATUS_CODES:
+        return code
+    if r.get("ok"):
+        return STATUS_OK
+    if r.get("timed_out"):
+        return STATUS_TIMEOUT
+    reason = r.get("reason") or ""
+    if r.get("skipped"):
+        if "dependency not satisfied (degraded)" in reason:
+            return STATUS_SKIPPED_DEGRADED
+        if "dependency not satisfied" in reason:
+            return STATUS_SKIPPED_DEP
+        return None
+    if "unknown dependency" in reason or "unknown dependency" in (r.get("error") or ""):
+        return STATUS_BLOCKED_UNKNOWN_DEP
+    return STATUS_FAILED
+
+
+# first step with one of these codes (plan order) decides the task status
+_DECISIVE_TASK_STATUS = {
+    STATUS_TIMEOUT: "TIMEOUT",
+    STATUS_SKIPPED_DEP: "BLOCKED",
+    STATUS_BLOCKED_UNKNOWN_DEP: "BLOCKED",
+    STATUS_FAILED: "FAILED",
+}
+
+
+class _MetaBuilder:
+    """
+    __meta__ counters, updated once per result row (in plan order); build() is O(1) apart from
+    copying the step id lists.
+    """
 
-    return value
+    def __init__(self) -> None:
+        self.rows = 0  # including __meta__ rows (ignored otherwise)
+        self.total = 0
+        self.ok = 0
+        self.skipped = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.decided: Optional[str] = None  # task status fixed by the first decisive step
+        self.partial = False  # a non-ok step that does not decide (skipped)
+        self.degraded_steps: list[str] = []
+        self.blocked_steps: list[str] = []
+        self.failed_steps: list[str] = []
+        self.timeout_steps: list[str] = []
+
+    def add(self, r: dict[str, Any]) -> None:
+        self.rows += 1
+        if r.get("step_id") == "__meta__":
+            return
+        sid = r.get("step_id")
+        named = isinstance(sid, str)
+        code = step_status_code(r)
+        self.total += 1
+        if r.get("ok") is True:
+            self.ok += 1
+        if r.get("skipped") is True:
+            self.skipped += 1
+        elif not r.get("ok"):
+            self.failed += 1
+        if r.get("timed_out") is True:
+            self.timed_out += 1
+        if r.get("degraded") is True and named:
+            self.degraded_steps.append(sid)
+
+        if code in _DECISIVE_TASK_STATUS:
+            if self.decided is None:
+                self.decided = _DECISIVE_TASK_STATUS[code]
+        elif code != STATUS_OK:
+            self.partial = True
+        if named:
+            if code == STATUS_TIMEOUT:
+                self.timeout_steps.append(sid)
+            elif code in (STATUS_SKIPPED_DEP, STATUS_BLOCKED_UNKNOWN_DEP):
+                self.blocked_steps.append(sid)
+            elif code == STATUS_FAILED:
+                self.failed_steps.append(sid)
+
+    def task_status(self) -> str:
+        if self.rows == 0:
+            return "BLOCKED"
+        if self.decided is not None:
+            return self.decided
+        return "PARTIAL" if self.partial else "COMPLETED"
+
+    def build(self, *, strict_degraded: bool) -> dict[str, Any]:
+        task_status = self.task_status()
+        return {
+            "step_id": "__meta__",
+            "tool": None,
+            "ok": (task_status == "COMPLETED"),
+            "skipped": False,
+            "reason": _TASK_STATUS_REASONS.get(task_status),
+            "task_status": task_status,
+            "stats": {
+                "total_steps": self.total,
+                "ok": self.ok,
+                "skipped": self.skipped,
+                "failed": self.failed,
+                "degraded_count": len(self.degraded_steps),
+                "timed_out": self.timed_out,
+            },
+            "degraded_steps": list(self.degraded_steps),
+            "blocked_steps": list(self.blocked_steps),
+            "failed_steps": list(self.failed_steps),
+            "timeout_steps": list(self.timeout_steps),
+            "strict_degraded": strict_degraded,
+        }
+
+
+_TASK_STATUS_REASONS = {
+    "PARTIAL": "some steps skipped",
+    "FAILED": "one or more steps failed",
+    "BLOCKED": "blocked by dependency resolution",
+    "TIMEOUT": "one or more steps timed out",
+}
 
 
 def compute_task_status(execution_results: list[dict[str, Any]]) -> str:
     """
-    Compute overall task status from per-step execution_results.
+    Compute overall task status from per-step execution_results (by status code, see
+    step_status_code).
 
     Status priority:
-    1) BLOCKED: any step has unknown dependency OR is skipped due to dependency not satisfied (hard)
-    2) FAILED: any step failed (ok=false) and not skipped
-    3) PARTIAL: some ok and some skipped (including strict-degraded skips)
+    1) BLOCKED: any step is BLOCKED_UNKNOWN_DEP OR SKIPPED_DEP (dependency not satisfied, hard)
+    2) FAILED: any step FAILED (ok=false and not skipped)
+    3) PARTIAL: some ok and some skipped (including SKIPPED_DEGRADED strict-degraded skips)
     4) COMPLETED: all ok
 
+    TIMEOUT: a step timed out (tool call over its limit, plan deadline passed, or a dependency
+    timed out); like BLOCKED / FAILED, the first such step in plan order decides.
+
     Notes:
     - __meta__ result (if present) is ignored for status computation.
     - empty results => BLOCKED
     """
-    if not execution_results:
-        return "BLOCKED"
+    agg = _MetaBuilder()
+    for r in execution_results:
+        agg.add(r)
+    return agg.task_status()
 
-    any_ok = False
-    any_skipped = False
 
-    for r in execution_results:
-        if r.get("step_id") == "__meta__":
-            continue
+def _canonical_json(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def step_fingerprint(tool_name: str, resolved_args: dict[str, Any], upstream: list[Optional[str]]) -> str:
+    """
+    Identity of one step execution: (tool name, canonicalized resolved args, upstream fingerprints).
+
+    Two steps with the same fingerprint would call the same tool with the same inputs,
+    so a previous successful result can be carried forward instead of re-executing.
+    """
+    raw = _canonical_json([tool_name, resolved_args, upstream])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
 
-        ok = bool(r.get("ok"))
-        skipped = bool(r.get("skipped"))
-        reason = (r.get("reason") or "")
-        error = (r.get("error") or "")
 
-        if ok:
-            any_ok = True
+def _collect_reusable(reuse_results: Optional[list[dict[str, Any]]]) -> dict[str, dict[str, Any]]:
+    """
+    fingerprint -> previous successful result row (ok, not skipped).
+    """
+    reusable: dict[str, dict[str, Any]] = {}
+    for r in reuse_results or []:
+        if not isinstance(r, dict) or r.get("step_id") == "__meta__":
             continue
+        fp = r.get("fingerprint")
+        if isinstance(fp, str) and r.get("ok") is True and not r.get("skipped"):
+            reusable.setdefault(fp, r)
+    return reusable
+
+
+def _base_result(step_id: Any, status_code: str = STATUS_OK) -> dict[str, Any]:
+    return {
+        "step_id": step_id,
+        "tool": None,
+        "ok": True,
+        "skipped": False,
+        "status_code": status_code,
+        "reason": None,
+        "degraded": False,
+        "degraded_reason": None,
+        "degraded_from": None,
+    }
+
+
+def _status_entry(r: dict[str, Any]) -> dict[str, Any]:
+    """
+    Dependency/reference view of a result row.
+    shape: {"ok": bool, "skipped": bool, "degraded": bool, "timed_out": bool, "output": Any, "fingerprint": str | None}
+    """
+    ok = r.get("ok") is True
+    return {
+        "ok": ok,
+        "skipped": bool(r.get("skipped")),
+        "timed_out": bool(r.get("timed_out")),
+        "degraded": bool(r.get("degraded")) if ok else False,
+        "output": r.get("output") if ok else None,
+        "fingerprint": r.get("fingerprint") if ok else None,
+    }
+
+
+def _check_dependencies(
+    step_id: Any,
+    deps: Any,
+    *,
+    declared_ids: AbstractSet[str],
+    status: dict[str, dict[str, Any]],
+    strict_degraded: bool,
+    deadline: Optional[float] = None,
+) -> Optional[dict[str, Any]]:
+    """
+    Dependency gate for one step.
+
+    Returns a result row if the step must not execute (unknown dependency / dependency
+    not satisfied / dependency timed out / plan deadline passed), otherwise None.
+    deadline: time.monotonic() value after which no step starts.
+    """
+    base = _base_result(step_id)
+
+    # --- dependency existence check ---
+    unknown: list[str] = []
+    if isinstance(deps, list):
+        for d in deps:
+            if isinstance(d, str) and d not in declared_ids:
+                unknown.append(d)
+    else:
+        unknown = ["<invalid dependencies>"]
+
+    if unknown:
+        return {
+            **base,
+            "ok": False,
+            "skipped": False,
+            "status_code": STATUS_BLOCKED_UNKNOWN_DEP,
+            "reason": f"unknown dependency: {unknown}",
+            "error": f"unknown dependency: {unknown}",
+        }
+
+    # --- dependency satisfiable check ---
+    failed_deps: list[str] = []
+    degraded_deps: list[str] = []
 
-        if skipped:
-            any_skipped = True
-            if "dependency not satisfied (degraded)" in reason:
-                continue
-            if "dependency not satisfied" in reason:
-                return "BLOCKED"
+    for d in deps:
+        st = status.get(d)
+        if (not st) or (not st.get("ok", False)) or st.get("skipped", False):
+            failed_deps.append(d)
             continue
+        if strict_degraded and st.get("degraded", False):
+            degraded_deps.append(d)
+
+    timed_out_deps = [d for d in failed_deps if (status.get(d) or {}).get("timed_out")]
+    if timed_out_deps:
+        return {
+            **base,
+            "ok": False,
+            "skipped": True,
+            "status_code": STATUS_TIMEOUT,
+            "timed_out": True,
+            "reason": f"dependency timed out: {timed_out_deps}",
+        }
 
-        if "unknown dependency" in reason or "unknown dependency" in error:
-            return "BLOCKED"
+    if failed_deps or degraded_deps:
+        if degraded_deps and not failed_deps:
+            code = STATUS_SKIPPED_DEGRADED
+            reason = f"dependency not satisfied (degraded): {degraded_deps}"
+        else:
+            code = STATUS_SKIPPED_DEP
+            all_bad = failed_deps + degraded_deps
+            reason = f"dependency not satisfied: {all_bad}"
+
+        return {
+            **base,
+            "ok": False,
+            "skipped": True,
+            "status_code": code,
+            "reason": reason,
+        }
 
-        return "FAILED"
+    if deadline is not None and time.monotonic() >= deadline:
+        return {
+            **base,
+            "ok": False,
+            "skipped": True,
+            "status_code": STATUS_TIMEOUT,
+            "timed_out": True,
+            "reason": "plan deadline exceeded",
+        }
 
-    if any_skipped:
-        return "PARTIAL"
-    return "COMPLETED"
+    return None
 
 
-def execute_plan(payload: dict[str, Any], *, strict_degraded: bool = False) -> dict[str, Any]:
+def _infer_tool_name(step: dict[str, Any]) -> Optional[str]:
+    raw_tool = step.get("tool")
+    if isinstance(raw_tool, str):
+        return raw_tool
+    if isinstance(raw_tool, dict):
+        maybe_name = raw_tool.get("name")
+        if isinstance(maybe_name, str):
+            return maybe_name
+    return None
+
+
+def _step_timeout(step: dict[str, Any]) -> Optional[float]:
+    v = step.get("timeout_s")
+    if isinstance(v, (int, float)) and not isinstance(v, bool) and v > 0:
+        return float(v)
+    return None
+
+
+def _call_timeout(tool_name: str, step: dict[str, Any], deadline: Optional[float]) -> Optional[float]:
+    """
+    Time limit for one tool call: the step's timeout_s, else the tool's default (None here lets
+    dispatch apply it), capped by what is left until the plan deadline.
+    """
+    limit = _step_timeout(step)
+    if deadline is None:
+        return limit
+    if limit is None:
+        limit = get_tool(tool_name).timeout_s
+    remaining = max(0.0, deadline - time.monotonic())
+    return remaining if limit is None else min(limit, remaining)
+
+
+def _prepare_call(
+    step: dict[str, Any],
+    deps: list[str],
+    *,
+    status: dict[str, dict[str, Any]],
+    reusable: dict[str, dict[str, Any]],
+    template: Optional[_ArgTemplate] = None,
+) -> tuple[str, dict[str, Any], str, Optional[dict[str, Any]]]:
+    """
+    Parse the tool, resolve references in args and fingerprint the call.
+    template: the step's compiled args (compiled here when not given).
+    Returns (tool_name, resolved_args, fingerprint, reusable previous row or None).
+    """
+    tool_name, _ = _parse_tool(step)
+
+    # Resolve references in args (canonical + deterministic drift support)
+    if template is None:
+        template = _compile_step_template(step)
+    resolved_args = template.render(status)
+    if not isinstance(resolved_args, dict):
+        raise ValueError("tool.args must resolve to an object")
+
+    upstream = [(status.get(d) or {}).get("fingerprint") for d in deps]
+    fingerprint = step_fingerprint(tool_name, resolved_args, upstream)
+    return tool_name, resolved_args, fingerprint, reusable.get(fingerprint)
+
+
+def _ok_result(
+    step: dict[str, Any],
+    tool_name: str,
+    resolved_args: dict[str, Any],
+    out: Any,
+    fingerprint: str,
+    previous: Optional[dict[str, Any]],
+    cached: bool = False,
+) -> dict[str, Any]:
+    degraded, degraded_reason, degraded_from = _detect_degraded(tool_name, resolved_args)
+
+    r = {
+        **_base_result(step.get("step_id")),
+        "tool": tool_name,
+        "ok": True,
+        "skipped": False,
+        "reason": None,
+        "output": out,
+        "degraded": degraded,
+        "degraded_reason": degraded_reason,
+        "degraded_from": degraded_from,
+        "fingerprint": fingerprint,
+    }
+    if previous is not None:
+        r["reused"] = True
+        r["reused_from"] = previous.get("step_id")
+    elif cached:
+        r["cached"] = True
+    return r
+
+
+def _error_result(step: dict[str, Any], tool_name: Optional[str], e: Exception) -> dict[str, Any]:
+    if isinstance(e, ToolTimeoutError):
+        return {
+            **_base_result(step.get("step_id"), STATUS_TIMEOUT),
+            "tool": tool_name,
+            "ok": False,
+            "skipped": False,
+            "timed_out": True,
+            "reason": "timeout",
+            "error": str(e),
+        }
+    return {
+        **_base_result(step.get("step_id"), STATUS_FAILED),
+        "tool": tool_name or _infer_tool_name(step),
+        "ok": False,
+        "skipped": False,
+        "reason": None,
+        "error": str(e),
+    }
+
+
+def _run_step(
+    step: dict[str, Any],
+    deps: list[str],
+    *,
+    status: dict[str, dict[str, Any]],
+    reusable: dict[str, dict[str, Any]],
+    deadline: Optional[float] = None,
+    tool_cache: Optional[ToolResultCache] = None,
+    template: Optional[_ArgTemplate] = None,
+) -> dict[str, Any]:
+    """
+    Execute one dependency-satisfied step and build its result row.
+    """
+    tool_name: Optional[str] = None
+    try:
+        tool_name, resolved_args, fingerprint, previous = _prepare_call(
+            step, deps, status=status, reusable=reusable, template=template
+        )
+        cached = False
+        if previous is not None:
+            out = previous.get("output")
+        else:
+            out, cached = dispatch_tool_cached(
+                tool_name, resolved_args, cache=tool_cache, timeout_s=_call_timeout(tool_name, step, deadline)
+            )
+        return _ok_result(step, tool_name, resolved_args, out, fingerprint, previous, cached)
+    except Exception as e:
+        return _error_result(step, tool_name, e)
+
+
+async def _run_step_async(
+    step: dict[str, Any],
+    deps: list[str],
+    *,
+    status: dict[str, dict[str, Any]],
+    reusable: dict[str, dict[str, Any]],
+    deadline: Optional[float] = None,
+    tool_cache: Optional[ToolResultCache] = None,
+    template: Optional[_ArgTemplate] = None,
+) -> dict[str, Any]:
+    """
+    _run_step with async dispatch (native async handlers are awaited, sync ones run in a thread).
+    """
+    tool_name: Optional[str] = None
+    try:
+        tool_name, resolved_args, fingerprint, previous = _prepare_call(
+            step, deps, status=status, reusable=reusable, template=template
+        )
+        cached = False
+        if previous is not None:
+            out = previous.get("output")
+        else:
+            out, cached = await dispatch_tool_cached_async(
+                tool_name, resolved_args, cache=tool_cache, timeout_s=_call_timeout(tool_name, step, deadline)
+            )
+        return _ok_result(step, tool_name, resolved_args, out, fingerprint, previous, cached)
+    except Exception as e:
+        return _error_result(step, tool_name, e)
+
+
+def _run_step_recorded(
+    step: dict[str, Any],
+    deps: list[str],
+    *,
+    status: dict[str, dict[str, Any]],
+    reusable: dict[str, dict[str, Any]],
+    rec: Any,
+    deadline: Optional[float] = None,
+    tool_cache: Optional[ToolResultCache] = None,
+    template: Optional[_ArgTemplate] = None,
+) -> dict[str, Any]:
+    t0 = time.perf_counter()
+    r = _run_step(
+        step,
+        deps,
+        status=status,
+        reusable=reusable,
+        deadline=deadline,
+        tool_cache=tool_cache,
+        template=template,
+    )
+    _record_step_span(rec, step, r, t0)
+    return r
+
+
+async def _run_step_recorded_async(
+    step: dict[str, Any],
+    deps: list[str],
+    *,
+    status: dict[str, dict[str, Any]],
+    reusable: dict[str, dict[str, Any]],
+    rec: Any,
+    deadline: Optional[float] = None,
+    tool_cache: Optional[ToolResultCache] = None,
+    template: Optional[_ArgTemplate] = None,
+) -> dict[str, Any]:
+    t0 = time.perf_counter()
+    r = await _run_step_async(
+        step,
+        deps,
+        status=status,
+        reusable=reusable,
+        deadline=deadline,
+        tool_cache=tool_cache,
+        template=template,
+    )
+    _record_step_span(rec, step, r, t0)
+    return r
+
+
+def _record_step_span(rec: Any, step: dict[str, Any], r: dict[str, Any], t0: float) -> None:
+    if rec.enabled:
+        rec.add(
+            "step",
+            t0,
+            time.perf_counter(),
+            step_id=step.get("step_id"),
+            tool=r.get("tool"),
+            ok=bool(r.get("ok")),
+            reused=bool(r.get("reused")),
+            cached=bool(r.get("cached")),
+            timed_out=bool(r.get("timed_out")),
+        )
+
+
+def _declared_step_ids(steps: list[dict[str, Any]], index: Optional[PlanIndex] = None) -> AbstractSet[str]:
+    if index is not None and index.matches_steps(steps):
+        return index.declared
+    declared_ids: set[str] = set()
+    for s in steps:
+        sid = s.get("step_id")
+        if isinstance(sid, str) and sid.strip():
+            declared_ids.add(sid)
+    return declared_ids
+
+
+class _PlanSchedule:
+    """
+    Dependency wavefront over plan positions (shared by the concurrent executors).
+
+    Sequentially, a step sees the status of every earlier step. What it actually reads is the
+    status of its dependencies and of the steps its args reference; for each such id the entry
+    comes from the last earlier step declaring it (its producer). A step is ready once its
+    producers finished, and is checked / run against a status view holding exactly their
+    entries -- so every result row equals the sequential one, only independent steps overlap.
+    """
+
+    def __init__(self, steps: list[dict[str, Any]], templates: Tuple[Optional[_ArgTemplate], ...]) -> None:
+        self.steps = steps
+        self.templates = templates
+        n = len(steps)
+        self._producers: list[dict[str, int]] = []
+        self._waiting: list[int] = [0] * n
+        self._dependents: list[list[int]] = [[] for _ in range(n)]
+        self._entries: list[dict[str, Any]] = [{} for _ in range(n)]
+        self.results: list[dict[str, Any]] = [{} for _ in range(n)]  # filled by complete()
+        self.meta = _MetaBuilder()  # fed in plan order as the finished prefix grows
+        self._flushed = 0
+
+        last: dict[str, int] = {}
+        for p, step in enumerate(steps):
+            deps = step.get("dependencies") or []
+            observed = {d for d in deps if isinstance(d, str)} if isinstance(deps, list) else set()
+            template = templates[p]
+            if template is not None:
+                observed |= template.refs
+            producers = {sid: last[sid] for sid in observed if sid in last}
+            self._producers.append(producers)
+            for q in set(producers.values()):
+                self._dependents[q].append(p)
+                self._waiting[p] += 1
+            sid = step.get("step_id")
+            if isinstance(sid, str):
+                last[sid] = p
+
+    def initial(self) -> list[int]:
+        return [p for p, w in enumerate(self._waiting) if w == 0]
+
+    def gate(
+        self,
+        p: int,
+        *,
+        declared_ids: AbstractSet[str],
+        strict_degraded: bool,
+        deadline: Optional[float] = None,
+    ) -> Tuple[Optional[dict[str, Any]], Any, dict[str, dict[str, Any]]]:
+        """
+        Dependency gate for a ready step: (result row if it must not execute, deps, status view).
+        """
+        step = self.steps[p]
+        deps = step.get("dependencies") or []
+        view = {sid: self._entries[q] for sid, q in self._producers[p].items()}
+        r = _check_dependencies(
+            step.get("step_id"),
+            deps,
+            declared_ids=declared_ids,
+            status=view,
+            strict_degraded=strict_degraded,
+            deadline=deadline,
+        )
+        return r, deps, view
+
+    def complete(self, p: int, r: dict[str, Any]) -> list[int]:
+        """
+        Record a finished step; returns the positions that became ready (plan order).
+        """
+        self.results[p] = r
+        self._entries[p] = _status_entry(r)
+        while self._flushed < len(self.results) and self.results[self._flushed]:
+            self.meta.add(self.results[self._flushed])
+            self._flushed += 1
+        ready: list[int] = []
+        for c in self._dependents[p]:
+            self._waiting[c] -= 1
+            if self._waiting[c] == 0:
+                ready.append(c)
+        return ready
+
+
+def _can_schedule(steps: list[Any]) -> bool:
+    # malformed steps keep the sequential path (and its error behavior)
+    return len(steps) > 1 and all(isinstance(s, dict) for s in steps)
+
+
+def _step_event(kind: str, p: int, step: dict[str, Any], r: Optional[dict[str, Any]] = None) -> dict[str, Any]:
+    """
+    shape: {"event": kind, "index": plan position, "step_id": ..., "tool": ... (step_started) | "result": row}
+    """
+    event: dict[str, Any] = {"event": kind, "index": p, "step_id": step.get("step_id")}
+    if r is None:
+        event["tool"] = _infer_tool_name(step)
+    else:
+        event["result"] = r
+    return event
+
+
+def _iter_steps_sequential(
+    steps: list[dict[str, Any]],
+    *,
+    declared_ids: AbstractSet[str],
+    strict_degraded: bool,
+    reusable: dict[str, dict[str, Any]],
+    rec: Any,
+    templates: Tuple[Optional[_ArgTemplate], ...],
+    deadline: Optional[float] = None,
+    tool_cache: Optional[ToolResultCache] = None,
+) -> Iterator[dict[str, Any]]:
+    # status for dependency checks + reference resolution
+    # shape: {step_id: {"ok": bool, "skipped": bool, "degraded": bool, "output": Any, "fingerprint": str | None}}
+    status: dict[str, dict[str, Any]] = {}
+    meta = _MetaBuilder()
+
+    for p, (step, template) in enumerate(zip(steps, templates)):
+        step_id = step.get("step_id")
+        deps = step.get("dependencies") or []
+
+        r = _check_dependencies(
+            step_id,
+            deps,
+            declared_ids=declared_ids,
+            status=status,
+            strict_degraded=strict_degraded,
+            deadline=deadline,
+        )
+        if r is None:
+            yield _step_event("step_started", p, step)
+            r = _run_step_recorded(
+                step,
+                deps,
+                status=status,
+                reusable=reusable,
+                rec=rec,
+                deadline=deadline,
+                tool_cache=tool_cache,
+                template=template,
+            )
+            kind = "step_finished"
+        else:
+            kind = "step_skipped"
+
+        meta.add(r)
+        if isinstance(step_id, str):
+            status[step_id] = _status_entry(r)
+        yield _step_event(kind, p, step, r)
+
+    yield {"event": "meta", "result": meta.build(strict_degraded=strict_degraded)}
+
+
+async def _iter_steps_sequential_async(
+    steps: list[dict[str, Any]],
+    *,
+    declared_ids: AbstractSet[str],
+    strict_degraded: bool,
+    reusable: dict[str, dict[str, Any]],
+    rec: Any,
+    templates: Tuple[Optional[_ArgTemplate], ...],
+    deadline: Optional[float] = None,
+    tool_cache: Optional[ToolResultCache] = None,
+) -> AsyncIterator[dict[str, Any]]:
+    status: dict[str, dict[str, Any]] = {}
+    meta = _MetaBuilder()
+
+    for p, (step, template) in enumerate(zip(steps, templates)):
+        step_id = step.get("step_id")
+        deps = step.get("dependencies") or []
+
+        r = _check_dependencies(
+            step_id,
+            deps,
+            declared_ids=declared_ids,
+            status=status,
+            strict_degraded=strict_degraded,
+            deadline=deadline,
+        )
+        if r is None:
+            yield _step_event("step_started", p, step)
+            r = await _run_step_recorded_async(
+                step,
+                deps,
+                status=status,
+                reusable=reusable,
+                rec=rec,
+                deadline=deadline,
+                tool_cache=tool_cache,
+                template=template,
+            )
+            kind = "step_finished"
+        else:
+            kind = "step_skipped"
+
+        meta.add(r)
+        if isinstance(step_id, str):
+            status[step_id] = _status_entry(r)
+        yield _step_event(kind, p, step, r)
+
+    yield {"event": "meta", "result": meta.build(strict_degraded=strict_degraded)}
+
+
+def _iter_steps_threaded(
+    steps: list[dict[str, Any]],
+    *,
+    declared_ids: AbstractSet[str],
+    strict_degraded: bool,
+    reusable: dict[str, dict[str, Any]],
+    rec: Any,
+    max_workers: int,
+    templates: Tuple[Optional[_ArgTemplate], ...],
+    deadline: Optional[float] = None,
+    tool_cache: Optional[ToolResultCache] = None,
+) -> Iterator[dict[str, Any]]:
+    """
+    Run ready steps on a bounded thread pool (at most max_workers started and unfinished); the
+    scheduling state stays on the iterating thread. Closing the iterator early does not wait for
+    in-flight tool calls (they finish in the background and their rows are dropped).
+    """
+    schedule = _PlanSchedule(steps, templates)
+    ready = deque(schedule.initial())
+    running: dict[Future[dict[str, Any]], int] = {}
+
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="plan-step")
+    try:
+        while ready or running:
+            while ready and len(running) < max_workers:
+                p = ready.popleft()
+                r, deps, view = schedule.gate(
+                    p, declared_ids=declared_ids, strict_degraded=strict_degraded, deadline=deadline
+                )
+                if r is None:
+                    yield _step_event("step_started", p, steps[p])
+                    fut = pool.submit(
+                        _run_step_recorded,
+                        steps[p],
+                        deps,
+                        status=view,
+                        reusable=reusable,
+                        rec=rec,
+                        deadline=deadline,
+                        tool_cache=tool_cache,
+                        template=templates[p],
+                    )
+                    running[fut] = p
+                else:
+                    ready.extend(schedule.complete(p, r))
+                    yield _step_event("step_skipped", p, steps[p], r)
+            if running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in sorted(done, key=running.__getitem__):
+                    p = running.pop(fut)
+                    r = fut.result()
+                    ready.extend(schedule.complete(p, r))
+                    yield _step_event("step_finished", p, steps[p], r)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    yield {"event": "meta", "result": schedule.meta.build(strict_degraded=strict_degraded)}
+
+
+async def _iter_steps_async(
+    steps: list[dict[str, Any]],
+    *,
+    declared_ids: AbstractSet[str],
+    strict_degraded: bool,
+    reusable: dict[str, dict[str, Any]],
+    rec: Any,
+    max_workers: int,
+    templates: Tuple[Optional[_ArgTemplate], ...],
+    deadline: Optional[float] = None,
+    tool_cache: Optional[ToolResultCache] = None,
+) -> AsyncIterator[dict[str, Any]]:
+    """
+    _iter_steps_threaded on the event loop: one task per started step, at most max_workers
+    in flight. Cancelling the caller (or closing the iterator) cancels the running steps.
+    """
+    schedule = _PlanSchedule(steps, templates)
+    ready = deque(schedule.initial())
+    running: dict[asyncio.Task[dict[str, Any]], int] = {}
+
+    try:
+        while ready or running:
+            while ready and len(running) < max_workers:
+                p = ready.popleft()
+                r, deps, view = schedule.gate(
+                    p, declared_ids=declared_ids, strict_degraded=strict_degraded, deadline=deadline
+                )
+                if r is None:
+                    yield _step_event("step_started", p, steps[p])
+                    task = asyncio.ensure_future(
+                        _run_step_recorded_async(
+                            steps[p],
+                            deps,
+                            status=view,
+                            reusable=reusable,
+                            rec=rec,
+                            deadline=deadline,
+                            tool_cache=tool_cache,
+                            template=templates[p],
+                        )
+                    )
+                    running[task] = p
+                else:
+                    ready.extend(schedule.complete(p, r))
+                    yield _step_event("step_skipped", p, steps[p], r)
+            if running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in sorted(done, key=running.__getitem__):
+                    p = running.pop(task)
+                    r = task.result()
+                    ready.extend(schedule.complete(p, r))
+                    yield _step_event("step_finished", p, steps[p], r)
+    finally:
+        for task in running:
+            task.cancel()
+
+    yield {"event": "meta", "result": schedule.meta.build(strict_degraded=strict_degraded)}
+
+
+def _checkpoint_begin(
+    checkpoint: Any,
+    run_id: Optional[str],
+    payload: dict[str, Any],
+    reuse_results: Optional[list[dict[str, Any]]],
+    *,
+    strict_degraded: bool,
+    max_workers: Optional[int],
+) -> list[dict[str, Any]]:
+    """
+    Record the plan under run_id and return reuse_results extended with the steps already
+    checkpointed for it (an earlier, interrupted execution of this run).
+    """
+    if not run_id:
+        raise ValueError("checkpoint requires run_id")
+    saved = checkpoint.load(run_id)
+    checkpoint.save_plan(run_id, payload, {"strict_degraded": strict_degraded, "max_workers": max_workers})
+    return [*(saved.rows if saved is not None else []), *(reuse_results or [])]
+
+
+def _checkpoint_event(checkpoint: Any, run_id: Any, event: dict[str, Any]) -> None:
+    if event["event"] == "step_finished":
+        r = event["result"]
+        fp = r.get("fingerprint")
+        if r.get("ok") is True and isinstance(fp, str):
+            checkpoint.save_step(run_id, fp, r)
+    elif event["event"] == "meta":
+        checkpoint.finish(run_id, event["result"].get("task_status"))
+
+
+def execute_plan_iter(
+    payload: dict[str, Any],
+    *,
+    strict_degraded: bool = False,
+    reuse_results: Optional[list[dict[str, Any]]] = None,
+    recorder: Optional[Any] = None,
+    index: Optional[PlanIndex] = None,
+    max_workers: Optional[int] = None,
+    deadline_s: Optional[float] = None,
+    tool_cache: Optional[ToolResultCache] = None,
+    checkpoint: Optional[Any] = None,
+    run_id: Optional[str] = None,
+) -> Iterator[dict[str, Any]]:
+    """
+    execute_plan as a stream of events, in completion order (options as in execute_plan):
+
+    - {"event": "step_started", "index", "step_id", "tool"}: the step passed the dependency gate
+      and its tool call begins
+    - {"event": "step_finished", "index", "step_id", "result"}: a started step's result row
+    - {"event": "step_skipped", "index", "step_id", "result"}: the step did not run (dependency
+      not satisfied / unknown / timed out, plan deadline); result is its row
+    - {"event": "meta", "result"}: the __meta__ row, always last
+
+    index is the step's plan position: every step gets exactly one step_finished or step_skipped,
+    and placing their rows by index reproduces execute_plan's execution_results. Sequentially the
+    order is plan order; with max_workers > 1 independent steps finish in any order.
+
+    Execution is lazy (it starts with the first next(), and deadline_s counts from there).
+    Stopping early (break / close()) abandons the rest of the plan: no further steps start,
+    and in-flight calls are not waited for.
+
+    With checkpoint (see execute_plan) each completed step is saved before its step_finished
+    event is yielded.
+    """
+    steps: list[dict[str, Any]] = payload.get("steps", []) or []
+    if checkpoint is not None:
+        reuse_results = _checkpoint_begin(
+            checkpoint, run_id, payload, reuse_results, strict_degraded=strict_degraded, max_workers=max_workers
+        )
+    reusable = _collect_reusable(reuse_results)
+    rec = recorder if recorder is not None else NULL_RECORDER
+
+    declared_ids = _declared_step_ids(steps, index)
+    deadline = None if deadline_s is None else time.monotonic() + deadline_s
+    templates = _plan_templates(steps)
+
+    if max_workers is not None and max_workers > 1 and _can_schedule(steps):
+        events = _iter_steps_threaded(
+            steps,
+            declared_ids=declared_ids,
+            strict_degraded=strict_degraded,
+            reusable=reusable,
+            rec=rec,
+            max_workers=max_workers,
+            templates=templates,
+            deadline=deadline,
+            tool_cache=tool_cache,
+        )
+    else:
+        events = _iter_steps_sequential(
+            steps,
+            declared_ids=declared_ids,
+            strict_degraded=strict_degraded,
+            reusable=reusable,
+            rec=rec,
+            templates=templates,
+            deadline=deadline,
+            tool_cache=tool_cache,
+        )
+    try:
+        for event in events:
+            if checkpoint is not None:
+                _checkpoint_event(checkpoint, run_id, event)
+            yield event
+    finally:
+        events.close()
+
+
+async def execute_plan_aiter(
+    payload: dict[str, Any],
+    *,
+    strict_degraded: bool = False,
+    reuse_results: Optional[list[dict[str, Any]]] = None,
+    recorder: Optional[Any] = None,
+    index: Optional[PlanIndex] = None,
+    max_workers: Optional[int] = None,
+    deadline_s: Optional[float] = None,
+    tool_cache: Optional[ToolResultCache] = None,
+    checkpoint: Optional[Any] = None,
+    run_id: Optional[str] = None,
+) -> AsyncIterator[dict[str, Any]]:
+    """
+    Async execute_plan_iter (dispatch as in execute_plan_async): the same events, as an async
+    iterator. Closing it early (aclose(), or breaking out of `async for` in a task that is then
+    cancelled) cancels in-flight tool calls.
+    """
+    steps: list[dict[str, Any]] = payload.get("steps", []) or []
+    if checkpoint is not None:
+        reuse_results = _checkpoint_begin(
+            checkpoint, run_id, payload, reuse_results, strict_degraded=strict_degraded, max_workers=max_workers
+        )
+    reusable = _collect_reusable(reuse_results)
+    rec = recorder if recorder is not None else NULL_RECORDER
+    declared_ids = _declared_step_ids(steps, index)
+    deadline = None if deadline_s is None else time.monotonic() + deadline_s
+    templates = _plan_templates(steps)
+
+    if max_workers is not None and max_workers > 1 and _can_schedule(steps):
+        events = _iter_steps_async(
+            steps,
+            declared_ids=declared_ids,
+            strict_degraded=strict_degraded,
+            reusable=reusable,
+            rec=rec,
+            max_workers=max_workers,
+            templates=templates,
+            deadline=deadline,
+            tool_cache=tool_cache,
+        )
+    else:
+        events = _iter_steps_sequential_async(
+            steps,
+            declared_ids=declared_ids,
+            strict_degraded=strict_degraded,
+            reusable=reusable,
+            rec=rec,
+            templates=templates,
+            deadline=deadline,
+            tool_cache=tool_cache,
+        )
+    try:
+        async for event in events:
+            if checkpoint is not None:
+                _checkpoint_event(checkpoint, run_id, event)
+            yield event
+    finally:
+        await events.aclose()
+
+
+class _ResultCollector:
+    """
+    execution_results from execute_plan_iter events: step rows placed by plan index, __meta__ last.
+    """
+
+    def __init__(self, n: int) -> None:
+        self.rows: list[dict[str, Any]] = [{} for _ in range(n)]
+        self.meta: Optional[dict[str, Any]] = None
+
+    def add(self, event: dict[str, Any]) -> None:
+        if event["event"] == "meta":
+            self.meta = event["result"]
+        elif "result" in event:
+            self.rows[event["index"]] = event["result"]
+
+    def results(self) -> list[dict[str, Any]]:
+        return [*self.rows, self.meta] if self.meta is not None else self.rows
+
+
+def execute_plan(
+    payload: dict[str, Any],
+    *,
+    strict_degraded: bool = False,
+    reuse_results: Optional[list[dict[str, Any]]] = None,
+    recorder: Optional[Any] = None,
+    index: Optional[PlanIndex] = None,
+    max_workers: Optional[int] = None,
+    deadline_s: Optional[float] = None,
+    tool_cache: Optional[ToolResultCache] = None,
+    checkpoint: Optional[Any] = None,
+    run_id: Optional[str] = None,
+) -> dict[str, Any]:
     """
     Execute tools described in payload["steps"][].tool
     Returns: payload + execution_results (JSON-safe)
 
+    Collects execute_plan_iter (use that to stream progress or stop at the first failure).
+
     Execution semantics (contract):
     - unknown dependency -> fail-fast for that step (do not execute)
     - dependency failed/skipped -> skip that step (do not execute)
@@ -264,210 +1398,218 @@ def execute_plan(payload: dict[str, Any], *, strict_degraded: bool = False) -> d
     Step reference semantics (minimal):
     - args may include "$step_1.output.docs" style references (canonical).
     - Also supports a few deterministic drift forms (see _normalize_ref_string).
+    - args are parsed once into templates (see _plan_templates, cached across runs); executing a
+      step only looks the references up.
+
+    Incremental re-execution (reuse_results):
+    - Every successful step carries a `fingerprint` (tool, resolved args, upstream fingerprints).
+    - When reuse_results (a previous execution_results list) has a successful row with the same
+      fingerprint, its output is carried forward instead of calling the tool again; the row is
+      marked `reused: true` with `reused_from: <previous step_id>`.
+    - Changed steps get new fingerprints, and so do their downstream steps (upstream fingerprints
+      are part of the identity), so only those re-execute.
+
+    recorder (optional, app.agents.spans.SpanRecorder):
+    - records one "step" span per executed step (step_id, tool, ok, reused); skipped steps are not timed.
+
+    index (optional, app.agents.plan_compiler.PlanIndex):
+    - the index compile_plan() built for this payload; declared step ids are taken from it instead
+      of being collected again (ignored if its step count does not match the payload).
+
+    max_workers:
+    - None / 1 (default): steps run one at a time in list order.
+    - N > 1: steps whose dependencies (and referenced steps) have finished run concurrently on a
+      pool of N threads (see _PlanSchedule). Result rows, their order and __meta__ are identical
+      to sequential execution; only independent tool calls overlap, so tools must be thread-safe.
+
+    Timeouts:
+    - each tool call is limited by the step's "timeout_s", else the tool's ToolSpec.timeout_s
+      (no limit when neither is set); a call over its limit fails the step with timed_out: true
+      and tool_cancelled() turns True for the abandoned call.
+    - deadline_s: budget for the whole plan; in-flight calls are capped by the time left, and
+      steps not started when it passes are skipped with reason "plan deadline exceeded".
+      None (default here) means no budget: a tool without a timeout can then block the plan;
+      the runner passes DEFAULT_PLAN_DEADLINE_S (120s) unless told otherwise.
+    - steps depending on a timed-out step are skipped with "dependency timed out" (timed_out: true);
+      task_status becomes TIMEOUT (see compute_task_status).
+
+    tool_cache (optional, app.tools.result_cache.ToolResultCache):
+    - calls to pure tools (ToolSpec.pure) are memoized by canonical args across steps, plans and
+      runs; a row served from the cache is a normal result row marked `cached: true`.
+    - reuse_results takes precedence (a reused row is not looked up in the cache).
+
+    checkpoint (optional, app.agents.checkpoint_store.SqliteCheckpointStore / DirCheckpointStore)
+    + run_id:
+    - the plan is recorded under run_id, and every successful step is saved (keyed by run_id and
+      fingerprint) as soon as it completes, so a crash or timeout loses only in-flight steps.
+    - steps already saved for run_id are reused like reuse_results; see resume_plan.
     """
     steps: list[dict[str, Any]] = payload.get("steps", []) or []
-    results: list[dict[str, Any]] = []
+    collector = _ResultCollector(len(steps))
+    for event in execute_plan_iter(
+        payload,
+        strict_degraded=strict_degraded,
+        reuse_results=reuse_results,
+        recorder=recorder,
+        index=index,
+        max_workers=max_workers,
+        deadline_s=deadline_s,
+        tool_cache=tool_cache,
+        checkpoint=checkpoint,
+        run_id=run_id,
+    ):
+        collector.add(event)
+    return {**payload, "execution_results": collector.results()}
+
+
+async def execute_plan_async(
+    payload: dict[str, Any],
+    *,
+    strict_degraded: bool = False,
+    reuse_results: Optional[list[dict[str, Any]]] = None,
+    recorder: Optional[Any] = None,
+    index: Optional[PlanIndex] = None,
+    max_workers: Optional[int] = None,
+    deadline_s: Optional[float] = None,
+    tool_cache: Optional[ToolResultCache] = None,
+    checkpoint: Optional[Any] = None,
+    run_id: Optional[str] = None,
+) -> dict[str, Any]:
+    """
+    Async execute_plan: same semantics and output; tools are dispatched with
+    dispatch_tool_async (async handlers awaited, sync handlers in a worker thread),
+    so the event loop is never blocked by tool I/O.
 
-    declared_ids: set[str] = set()
-    for s in steps:
-        sid = s.get("step_id")
-        if isinstance(sid, str) and sid.strip():
-            declared_ids.add(sid)
+    max_workers:
+    - None / 1 (default): steps run one at a time in list order.
+    - N > 1: ready steps run as concurrent tasks, at most N in flight. Scheduling,
+      dependency gate and reference resolution are execute_plan's (_PlanSchedule), so results
+      and __meta__ are identical to sequential execution; no extra threads beyond the ones
+      sync handlers already use.
 
-    # status for dependency checks + reference resolution
-    # shape: {step_id: {"ok": bool, "skipped": bool, "degraded": bool, "output": Any}}
-    status: dict[str, dict[str, Any]] = {}
+    Timeouts / deadline_s: as in execute_plan. Async handlers are cancelled on timeout, and
+    cancelling the caller cancels in-flight tool calls.
 
-    for step in steps:
-        step_id = step.get("step_id")
-        deps = step.get("dependencies") or []
-        tool_name: Optional[str] = None
+    tool_cache / checkpoint: as in execute_plan.
 
-        base: dict[str, Any] = {
-            "step_id": step_id,
-            "tool": None,
-            "ok": True,
-            "skipped": False,
-            "reason": None,
-            "degraded": False,
-            "degraded_reason": None,
-            "degraded_from": None,
-        }
+    Collects execute_plan_aiter.
+    """
+    steps: list[dict[str, Any]] = payload.get("steps", []) or []
+    collector = _ResultCollector(len(steps))
+    async for event in execute_plan_aiter(
+        payload,
+        strict_degraded=strict_degraded,
+        reuse_results=reuse_results,
+        recorder=recorder,
+        index=index,
+        max_workers=max_workers,
+        deadline_s=deadline_s,
+        tool_cache=tool_cache,
+        checkpoint=checkpoint,
+        run_id=run_id,
+    ):
+        collector.add(event)
+    return {**payload, "execution_results": collector.results()}
+
+
+def _resume_args(checkpoint: Any, run_id: str, kwargs: dict[str, Any]) -> Tuple[dict[str, Any], dict[str, Any]]:
+    saved = checkpoint.load(run_id)
+    if saved is None:
+        raise KeyError(f"no checkpoint for run_id: {run_id}")
+    options = {k: v for k, v in saved.options.items() if k in ("strict_degraded", "max_workers")}
+    return saved.payload, {**options, **kwargs}
+
+
+def resume_plan(run_id: str, *, checkpoint: Any, **kwargs: Any) -> dict[str, Any]:
+    """
+    Continue a checkpointed run (e.g. after a worker restart): execute the plan saved under
+    run_id again with the same options; steps saved for it are carried forward (reused: true,
+    no tool call) and only the rest run. Returns what execute_plan returns.
 
-        # --- dependency existence check ---
-        unknown: list[str] = []
-        if isinstance(deps, list):
-            for d in deps:
-                if isinstance(d, str) and d not in declared_ids:
-                    unknown.append(d)
-        else:
-            unknown = ["<invalid dependencies>"]
-
-        if unknown:
-            r = {
-                **base,
-                "ok": False,
-                "skipped": False,
-                "reason": f"unknown dependency: {unknown}",
-                "error": f"unknown dependency: {unknown}",
-            }
-            results.append(r)
-            if isinstance(step_id, str):
-                status[step_id] = {"ok": False, "skipped": False, "degraded": False, "output": None}
-            continue
+    The consistent point is per step, not a prefix: a saved step is reused only when its
+    fingerprint matches again, i.e. its resolved args and upstream steps are unchanged. Failed,
+    skipped, timed-out and interrupted steps were never saved, so they run again.
 
-        # --- dependency satisfiable check ---
-        failed_deps: list[str] = []
-        degraded_deps: list[str] = []
-
-        if isinstance(deps, list):
-            for d in deps:
-                st = status.get(d)
-                if (not st) or (not st.get("ok", False)) or st.get("skipped", False):
-                    failed_deps.append(d)
-                    continue
-                if strict_degraded and st.get("degraded", False):
-                    degraded_deps.append(d)
-
-        if failed_deps or degraded_deps:
-            if degraded_deps and not failed_deps:
-                reason = f"dependency not satisfied (degraded): {degraded_deps}"
-            else:
-                all_bad = failed_deps + degraded_deps
-                reason = f"dependency not satisfied: {all_bad}"
-
-            r = {
-                **base,
-                "ok": False,
-                "skipped": True,
-                "reason": reason,
-            }
-            results.append(r)
-            if isinstance(step_id, str):
-                status[step_id] = {"ok": False, "skipped": True, "degraded": False, "output": None}
-            continue
+    kwargs are execute_plan options (recorder, max_workers, deadline_s, tool_cache, ...); they
+    override the saved strict_degraded / max_workers. Raises KeyError for an unknown run_id.
+    """
+    payload, options = _resume_args(checkpoint, run_id, kwargs)
+    return execute_plan(payload, checkpoint=checkpoint, run_id=run_id, **options)
 
-        # --- execute tool ---
-        try:
-            tool_name, args = _parse_tool(step)
-
-            # Resolve references in args (canonical + deterministic drift support)
-            resolved_args = _resolve_refs(args, deps=deps if isinstance(deps, list) else [], context=status)
-            if not isinstance(resolved_args, dict):
-                raise ValueError("tool.args must resolve to an object")
-
-            out = dispatch_tool(tool_name, resolved_args)
-
-            degraded, degraded_reason, degraded_from = _detect_degraded(tool_name, resolved_args)
-
-            r = {
-                **base,
-                "tool": tool_name,
-                "ok": True,
-                "skipped": False,
-                "reason": None,
-                "output": out,
-                "degraded": degraded,
-                "degraded_reason": degraded_reason,
-                "degraded_from": degraded_from,
-            }
-            results.append(r)
-            if isinstance(step_id, str):
-                status[step_id] = {"ok": True, "skipped": False, "degraded": degraded, "output": out}
-        except Exception as e:
-            inferred_tool = None
-            if tool_name:
-                inferred_tool = tool_name
-            else:
-                raw_tool = step.get("tool")
-                if isinstance(raw_tool, str):
-                    inferred_tool = raw_tool
-                elif isinstance(raw_tool, dict):
-                    maybe_name = raw_tool.get("name")
-                    if isinstance(maybe_name, str):
-                        inferred_tool = maybe_name
-
-            r = {
-                **base,
-                "tool": inferred_tool,
-                "ok": False,
-                "skipped": False,
-                "reason": None,
-                "error": str(e),
-            }
-            results.append(r)
-            if isinstance(step_id, str):
-                status[step_id] = {"ok": False, "skipped": False, "degraded": False, "output": None}
-
-    task_status = compute_task_status(results)
-
-    total_steps = sum(1 for r in results if r.get("step_id") != "__meta__")
-    ok_count = sum(1 for r in results if r.get("step_id") != "__meta__" and r.get("ok") is True)
-    skipped_count = sum(1 for r in results if r.get("step_id") != "__meta__" and r.get("skipped") is True)
-    failed_count = sum(
-        1
-        for r in results
-        if r.get("step_id") != "__meta__" and (not r.get("ok")) and (not r.get("skipped", False))
-    )
 
-    degraded_steps: list[str] = []
-    for r in results:
-        if r.get("step_id") == "__meta__":
-            continue
-        if r.get("degraded") is True:
-            sid = r.get("step_id")
-            if isinstance(sid, str):
-                degraded_steps.append(sid)
-
-    summary_reason = None
-    if task_status == "PARTIAL":
-        summary_reason = "some steps skipped"
-    elif task_status == "FAILED":
-        summary_reason = "one or more steps failed"
-    elif task_status == "BLOCKED":
-        summary_reason = "blocked by dependency resolution"
-
-    blocked_steps: list[str] = []
-    failed_steps: list[str] = []
-    for r in results:
-        sid = r.get("step_id")
-        if sid == "__meta__":
-            continue
+async def resume_plan_async(run_id: str, *, checkpoint: Any, **kwargs: Any) -> dict[str, Any]:
+    """
+    Async resume_plan (executes with execute_plan_async).
+    """
+    payload, options = _resume_args(checkpoint, run_id, kwargs)
+    return await execute_plan_async(payload, checkpoint=checkpoint, run_id=run_id, **options)
 
-        reason = (r.get("reason") or "")
-        msg = reason + " " + (r.get("error") or "")
 
-        if r.get("skipped") and "dependency not satisfied" in reason and "dependency not satisfied (degraded)" not in reason:
-            if isinstance(sid, str):
-                blocked_steps.append(sid)
-        elif (not r.get("ok")) and (not r.get("skipped", False)):
-            if "unknown dependency" in msg:
-                if isinstance(sid, str):
-                    blocked_steps.append(sid)
-            else:
-                if isinstance(sid, str):
-                    failed_steps.append(sid)
+class IncrementalExecution:
+    """
+    Execute plan steps one at a time as they become known (pipelined planning).
+
+    - add_step() applies the same dependency gate, reference resolution and fingerprinting as
+      execute_plan; only steps added so far count as declared.
+    - results holds the result rows in add order (no __meta__). They are not a final answer:
+      pass them as execute_plan(reuse_results=...) for the validated plan, so matching steps are
+      carried forward and anything else is discarded.
+    - cancel() makes later add_step() calls no-ops (returns None).
+    - deadline_s: plan budget counted from construction (as execute_plan(deadline_s=...)): calls
+      are capped by the time left, and steps added after it passes are skipped with
+      "plan deadline exceeded".
+
+    Not thread-safe: feed it from a single worker.
+    """
 
-    results.append(
-        {
-            "step_id": "__meta__",
-            "tool": None,
-            "ok": (task_status == "COMPLETED"),
-            "skipped": False,
-            "reason": summary_reason,
-            "task_status": task_status,
-            "stats": {
-                "total_steps": total_steps,
-                "ok": ok_count,
-                "skipped": skipped_count,
-                "failed": failed_count,
-                "degraded_count": len(degraded_steps),
-            },
-            "degraded_steps": degraded_steps,
-            "blocked_steps": blocked_steps,
-            "failed_steps": failed_steps,
-            "strict_degraded": strict_degraded,
-        }
-    )
+    def __init__(
+        self,
+        *,
+        strict_degraded: bool = False,
+        recorder: Optional[Any] = None,
+        tool_cache: Optional[ToolResultCache] = None,
+        deadline_s: Optional[float] = None,
+    ) -> None:
+        self.strict_degraded = strict_degraded
+        self.deadline = None if deadline_s is None else time.monotonic() + deadline_s
+        self._tool_cache = tool_cache
+        self.results: list[dict[str, Any]] = []
+        self.cancelled = False
+        self._rec = recorder if recorder is not None else NULL_RECORDER
+        self._declared_ids: set[str] = set()
+        self._status: dict[str, dict[str, Any]] = {}
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+    def add_step(self, step: dict[str, Any]) -> Optional[dict[str, Any]]:
+        if self.cancelled:
+            return None
+        step_id = step.get("step_id")
+        if isinstance(step_id, str) and step_id.strip():
+            self._declared_ids.add(step_id)
+        deps = step.get("dependencies") or []
 
-    return {**payload, "execution_results": results}
+        r = _check_dependencies(
+            step_id,
+            deps,
+            declared_ids=self._declared_ids,
+            status=self._status,
+            strict_degraded=self.strict_degraded,
+            deadline=self.deadline,
+        )
+        if r is None:
+            r = _run_step_recorded(
+                step,
+                deps,
+                status=self._status,
+                reusable={},
+                rec=self._rec,
+                deadline=self.deadline,
+                tool_cache=self._tool_cache,
+            )
+
+        self.results.append(r)
+        if isinstance(step_id, str):
+            self._status[step_id] = _status_entry(r)
+        return r
@@ -0,0 +1,141 @@
+from __future__ import annotations
+# Module: agent_orchestration (streamed plan parsing)
+# Boundary: do NOT import app.tools/* or plan_executor; this only turns planner deltas into step objects
+# See: docs/architecture/modules.md
+
+import json
+from typing import Any, Dict, List, Optional
+
+from app.agents.plan_validator import validate_plan_payload
+from app.agents.plan_wire import expand_compact_step
+
+_STEPS_KEYS = {"steps": False, "st": True}  # key -> compact wire format
+
+
+class StreamingStepParser:
+    """
+    Incremental scanner over a streamed planner output.
+
+    feed(delta) returns the step objects of the top-level "steps" array (or the compact "st"
+    array, expanded to canonical steps) that became complete with this delta, in order.
+
+    - Only string / escape state and nesting depth are tracked; each completed step object is
+      parsed on its own, so a truncated or malformed plan still yields its complete prefix.
+    - Text before the top-level object (e.g. a ```json fence) is ignored.
+    - A step object that does not parse stops the parser (later steps may depend on it);
+      the full output is still parsed / repaired by the normal path afterwards.
+    - Each character is scanned once, and the buffer only keeps the unfinished step (or top-level
+      key), so long streams cost linear time.
+    """
+
+    def __init__(self) -> None:
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = -1
+        self._last_string: Optional[str] = None
+        self._key: Optional[str] = None
+        self._steps_depth: Optional[int] = None
+        self._compact = False
+        self._step_start = -1
+        self._count = 0
+        self.done = False
+
+    @property
+    def steps_seen(self) -> int:
+        return self._count
+
+    def feed(self, delta: str) -> List[Dict[str, Any]]:
+        if self.done or not delta:
+            return []
+        self._text += delta
+        out: List[Dict[str, Any]] = []
+        text = self._text
+        i = self._pos
+        n = len(text)
+        while i < n and not self.done:
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_string = text[self._string_start + 1 : i]
+            elif ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch in "{[":
+                if ch == "[" and self._depth == 1 and self._key in _STEPS_KEYS and self._steps_depth is None:
+                    self._steps_depth = self._depth + 1
+                    self._compact = _STEPS_KEYS[self._key]
+                elif ch == "{" and self._steps_depth is not None and self._depth == self._steps_depth:
+                    self._step_start = i
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._steps_depth is not None:
+                    if ch == "}" and self._depth == self._steps_depth and self._step_start >= 0:
+                        step = self._complete_step(text[self._step_start : i + 1])
+                        self._step_start = -1
+                        if step is None:
+                            self.done = True
+                        else:
+                            out.append(step)
+                    elif ch == "]" and self._depth == self._steps_depth - 1:
+                        self.done = True
+                if self._depth <= 0:
+                    self.done = True
+            elif self._depth == 1:
+                if ch == ":":
+                    self._key = self._last_string
+                elif ch == ",":
+                    self._key = None
+            i += 1
+        self._pos = i
+        self._trim()
+        return out
+
+    def _trim(self) -> None:
+        # drop scanned text no later slice needs: only the open step object and an open
+        # top-level string (a key candidate) are ever sliced out of the buffer
+        keep = self._pos
+        if self._step_start >= 0:
+            keep = min(keep, self._step_start)
+        if self._in_string and self._depth == 1:
+            keep = min(keep, self._string_start)
+        if keep <= 0:
+            return
+        self._text = self._text[keep:]
+        self._pos -= keep
+        self._string_start -= keep
+        if self._step_start >= 0:
+            self._step_start -= keep
+
+    def _complete_step(self, raw: str) -> Optional[Dict[str, Any]]:
+        try:
+            obj = json.loads(raw)
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(obj, dict):
+            return None
+        self._count += 1
+        if self._compact:
+            return expand_compact_step(obj, self._count)
+        return obj
+
+
+def validate_step_prefix(steps: List[Dict[str, Any]]) -> List[str]:
+    """
+    Contract errors of a streamed step prefix (the steps so far as a plan of their own).
+
+    Step-level rules (fields, tool shape, step_id sequence, no unknown/forward dependencies)
+    apply unchanged; plan-level fields are not known yet and are not checked here.
+    """
+    return validate_plan_payload(
+        {"task_summary": "(streaming)", "assumptions": [], "risks": [], "steps": steps}
+    )
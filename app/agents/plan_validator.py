@@ -2,6 +2,12 @@ from __future__ import annotations
 
 from typing import Any
 
+_STEP_STATUS_CODES = ("OK", "FAILED", "SKIPPED_DEP", "SKIPPED_DEGRADED", "BLOCKED_UNKNOWN_DEP", "TIMEOUT")
+
+
+def _is_positive_number(v: Any) -> bool:
+    return isinstance(v, (int, float)) and not isinstance(v, bool) and v > 0
+
 
 def validate_plan_payload(
     payload: dict[str, Any],
@@ -148,6 +154,10 @@ def validate_plan_payload(
             else:
                 errors.append(f"steps[{i}].tool must be a string or an object")
 
+        # optional per-step time limit (overrides the tool's default timeout)
+        if "timeout_s" in s and not _is_positive_number(s["timeout_s"]):
+            errors.append(f"steps[{i}].timeout_s must be a positive number")
+
     # ---- step_id sequencing contract when using step_{k} convention ----
     # Prevent plans like: step_2/step_3 without step_1, or step_1/step_3 (gap).
     nums: list[int] = []
@@ -181,6 +191,8 @@ def validate_execution_results(execution_results: list[dict[str, Any]]) -> list[
     - skipped=True => ok must be False
     - ok=True => error must be absent or None
     - failed and not skipped => must have error or reason
+    - status_code (optional) is one of OK/FAILED/SKIPPED_DEP/SKIPPED_DEGRADED/BLOCKED_UNKNOWN_DEP/TIMEOUT
+      and agrees with ok
     """
     errors: list[str] = []
 
@@ -230,13 +242,20 @@ def validate_execution_results(execution_results: list[dict[str, Any]]) -> list[
             if (r.get("error") is None) and (r.get("reason") is None):
                 errors.append(f"execution_results[{i}] invalid: failed step should include error or reason")
 
+        if "status_code" in r:
+            code = r.get("status_code")
+            if code not in _STEP_STATUS_CODES:
+                errors.append(f"execution_results[{i}].status_code must be one of {'/'.join(_STEP_STATUS_CODES)}")
+            elif (code == "OK") != ok:
+                errors.append(f"execution_results[{i}] invalid: status_code {code} does not match ok={ok}")
+
     # optional meta fields validation
     if meta_indices:
         meta = execution_results[meta_indices[0]]
         if isinstance(meta, dict):
             ts = meta.get("task_status")
-            if ts is not None and ts not in ("COMPLETED", "PARTIAL", "FAILED", "BLOCKED"):
-                errors.append("__meta__.task_status must be one of COMPLETED/PARTIAL/FAILED/BLOCKED")
+            if ts is not None and ts not in ("COMPLETED", "PARTIAL", "FAILED", "BLOCKED", "TIMEOUT"):
+                errors.append("__meta__.task_status must be one of COMPLETED/PARTIAL/FAILED/BLOCKED/TIMEOUT")
 
             stats = meta.get("stats")
             if stats is not None:
@@ -0,0 +1,159 @@
+from __future__ import annotations
+# Module: agent_orchestration (plan wire formats)
+# Boundary: stdlib only; do NOT import app.tools/* or plan_executor
+# See: docs/architecture/modules.md
+
+import re
+from typing import Any, Dict, List
+
+WIRE_FORMATS = ("canonical", "compact")
+
+# Compact generation schema (model output only; never validated or executed directly):
+#
+#   {"s": task_summary, "as": [assumptions]?, "rk": [risks]?,
+#    "st": [{"t": tool_name, "a": {args}?, "d": [1-based earlier step positions]?,
+#            "n": title?, "x": description?, "o": deliverable?, "c": acceptance?}]}
+#
+# - step ids are positional: the k-th entry becomes "step_k"
+# - "$k.output..." in args is shorthand for "$step_k.output..."
+# - omitted prose fields are filled from the tool name when expanding
+COMPACT_SCHEMA_ADDENDUM = """
+Output Format (Compact Plan JSON) — overrides any plan output format described above:
+- Return ONE JSON object with keys: "s" (task summary, string), "st" (steps array),
+  optional "as" (assumptions, array of strings) and "rk" (risks, array of strings).
+- Each step in "st": {"t": "<tool name>", "a": {<tool args>}, "d": [<dependency positions>]}
+  with optional "n" (short title). Omit description/deliverable/acceptance text.
+- Step positions are 1-based in array order; "d" MUST only list earlier positions, e.g. "d": [1].
+- Reference an earlier step output in args as "$<position>.output.<field>", e.g. "$1.output.docs".
+- No markdown, no comments, no extra keys.
+
+Example:
+{"s":"search and summarize","st":[{"t":"search_tool","a":{"query":"rag","top_k":3}},{"t":"summarize_tool","a":{"docs":"$1.output.docs"},"d":[1]}]}
+""".strip()
+
+_POSITIONAL_REF = re.compile(r"\$(\d+)(?=[.\[])")
+
+
+def is_compact_plan(payload: Any) -> bool:
+    return isinstance(payload, dict) and "st" in payload and "steps" not in payload
+
+
+def _expand_refs(value: Any) -> Any:
+    if isinstance(value, str):
+        return _POSITIONAL_REF.sub(r"$step_\1", value) if "$" in value else value
+    if isinstance(value, dict):
+        return {k: _expand_refs(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_expand_refs(v) for v in value]
+    return value
+
+
+def _expand_dep(dep: Any) -> Any:
+    if isinstance(dep, bool):
+        return dep
+    if isinstance(dep, int):
+        return f"step_{dep}"
+    if isinstance(dep, str) and dep.strip().isdigit():
+        return f"step_{int(dep)}"
+    return dep
+
+
+def _as_text(value: Any, default: str) -> str:
+    if isinstance(value, str) and value.strip():
+        return value
+    return default
+
+
+def expand_compact_step(s: Any, position: int) -> Any:
+    """
+    Expand one compact step (1-based position) into a canonical step object.
+    Non-object entries are passed through for the validator to report.
+    """
+    if not isinstance(s, dict):
+        return s
+    tool_name = s.get("t")
+    label = tool_name if isinstance(tool_name, str) and tool_name.strip() else f"step {position}"
+    title = _as_text(s.get("n"), f"Run {label}")
+    deps = s.get("d")
+    if deps is None:
+        deps = []
+    elif isinstance(deps, list):
+        deps = [_expand_dep(d) for d in deps]
+    return {
+        "step_id": f"step_{position}",
+        "title": title,
+        "description": _as_text(s.get("x"), title),
+        "dependencies": deps,
+        "deliverable": _as_text(s.get("o"), f"Output of {label}"),
+        "acceptance": _as_text(s.get("c"), f"{label} returns without error"),
+        "tool": {"name": tool_name, "args": _expand_refs(s.get("a") or {})},
+    }
+
+
+def expand_compact_plan(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Expand a compact wire-format plan into the canonical plan contract.
+
+    Shape problems are passed through (e.g. a non-list "st" stays non-list) so that
+    validate_plan_payload reports them with the canonical field names.
+    """
+    steps_in = payload.get("st")
+    steps: Any = steps_in
+    if isinstance(steps_in, list):
+        steps = [expand_compact_step(s, i) for i, s in enumerate(steps_in, start=1)]
+
+    assumptions = payload.get("as")
+    risks = payload.get("rk")
+    return {
+        "task_summary": payload.get("s"),
+        "assumptions": [] if assumptions is None else assumptions,
+        "risks": [] if risks is None else risks,
+        "steps": steps,
+    }
+
+
+def compact_plan(payload: Dict[str, Any], *, keep_prose: bool = False) -> Dict[str, Any]:
+    """
+    Canonical plan -> compact wire format (used by benchmarks and few-shot examples).
+
+    keep_prose=False drops description/deliverable/acceptance, as the model is asked to.
+    """
+    steps = payload.get("steps") or []
+    position = {s.get("step_id"): i for i, s in enumerate(steps, start=1) if isinstance(s, dict)}
+
+    def _ref(value: Any) -> Any:
+        if isinstance(value, str):
+            for sid, k in position.items():
+                if isinstance(sid, str):
+                    value = value.replace(f"${sid}.", f"${k}.")
+            return value
+        if isinstance(value, dict):
+            return {k: _ref(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [_ref(v) for v in value]
+        return value
+
+    out_steps: List[Dict[str, Any]] = []
+    for s in steps:
+        tool = s.get("tool")
+        name = tool.get("name") if isinstance(tool, dict) else tool
+        args = tool.get("args") if isinstance(tool, dict) else s.get("args")
+        entry: Dict[str, Any] = {"t": name}
+        if args:
+            entry["a"] = _ref(args)
+        deps = [position.get(d, d) for d in (s.get("dependencies") or [])]
+        if deps:
+            entry["d"] = deps
+        if keep_prose:
+            entry["n"] = s.get("title")
+            entry["x"] = s.get("description")
+            entry["o"] = s.get("deliverable")
+            entry["c"] = s.get("acceptance")
+        out_steps.append(entry)
+
+    out: Dict[str, Any] = {"s": payload.get("task_summary"), "st": out_steps}
+    if payload.get("assumptions"):
+        out["as"] = payload["assumptions"]
+    if payload.get("risks"):
+        out["rk"] = payload["risks"]
+    return out
@@ -0,0 +1,206 @@
+from __future__ import annotations
+# Module: agent_orchestration (run log)
+# Boundary: stdlib only; do NOT import runner/plan_executor/tools (runner writes entries here)
+# See: docs/architecture/modules.md
+
+import json
+import math
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+DEFAULT_RUN_LOG_PATH = "docs-private/_runs/run_log.sqlite3"
+
+_COLUMNS = (
+    "run_id",
+    "started_at",
+    "prompt_version",
+    "model",
+    "input_sha256",
+    "latency_ms",
+    "planner_calls",
+    "repair_calls",
+    "replan_calls",
+    "prompt_tokens",
+    "completion_tokens",
+    "task_status",
+    "bucket",
+    "plan_source",
+    "error",
+    "timings_json",
+)
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile over an ascending list (empty -> 0.0).
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize_latencies(latencies_ms: List[float]) -> Dict[str, float]:
+    values = sorted(latencies_ms)
+    return {
+        "count": float(len(values)),
+        "p50": _percentile(values, 50),
+        "p90": _percentile(values, 90),
+        "p95": _percentile(values, 95),
+        "p99": _percentile(values, 99),
+        "max": values[-1] if values else 0.0,
+        "mean": (sum(values) / len(values)) if values else 0.0,
+    }
+
+
+class RunLog:
+    """
+    Append-only agent run log (stdlib sqlite3, one row per run).
+
+    Row fields: run_id, started_at (unix seconds), prompt_version, model, input_sha256, latency_ms,
+    planner/repair/replan call counts, prompt/completion tokens (when the service reports usage),
+    task_status, bucket (exception bucket, None for finished runs), plan_source, error,
+    timings_json (per-phase totals in ms).
+
+    Indexed by started_at and prompt_version, so window / version queries stay cheap as it grows.
+    """
+
+    def __init__(self, path: str = DEFAULT_RUN_LOG_PATH) -> None:
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        self.path = str(p)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS agent_runs ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " run_id TEXT NOT NULL,"
+                " started_at REAL NOT NULL,"
+                " prompt_version TEXT,"
+                " model TEXT,"
+                " input_sha256 TEXT,"
+                " latency_ms REAL NOT NULL,"
+                " planner_calls INTEGER NOT NULL DEFAULT 0,"
+                " repair_calls INTEGER NOT NULL DEFAULT 0,"
+                " replan_calls INTEGER NOT NULL DEFAULT 0,"
+                " prompt_tokens INTEGER,"
+                " completion_tokens INTEGER,"
+                " task_status TEXT,"
+                " bucket TEXT,"
+                " plan_source TEXT,"
+                " error TEXT,"
+                " timings_json TEXT)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_agent_runs_started_at ON agent_runs (started_at)")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_agent_runs_prompt_version ON agent_runs (prompt_version, started_at)"
+            )
+            self._conn.commit()
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        row = dict(entry)
+        timings = row.pop("timings", None)
+        row["timings_json"] = json.dumps(timings, ensure_ascii=False) if timings is not None else None
+        row.setdefault("started_at", time.time())
+        values = [row.get(c) for c in _COLUMNS]
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO agent_runs ({', '.join(_COLUMNS)}) VALUES ({placeholders})",
+                values,
+            )
+            self._conn.commit()
+
+    def query(
+        self,
+        *,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        prompt_version: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        clauses: List[str] = []
+        params: List[Any] = []
+        if since is not None:
+            clauses.append("started_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("started_at < ?")
+            params.append(until)
+        if prompt_version:
+            clauses.append("prompt_version = ?")
+            params.append(prompt_version)
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        with self._lock:
+            cur = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM agent_runs{where} ORDER BY started_at", params
+            )
+            rows = cur.fetchall()
+        out: List[Dict[str, Any]] = []
+        for values in rows:
+            item = dict(zip(_COLUMNS, values))
+            raw = item.pop("timings_json")
+            item["timings"] = json.loads(raw) if raw else None
+            out.append(item)
+        return out
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _group_key(row: Dict[str, Any], group_by: Optional[str]) -> str:
+    if group_by is None:
+        return "all"
+    if group_by == "prompt_version":
+        return str(row.get("prompt_version") or "-")
+    if group_by in ("hour", "day"):
+        fmt = "%Y-%m-%d %H:00" if group_by == "hour" else "%Y-%m-%d"
+        return time.strftime(fmt, time.gmtime(float(row.get("started_at") or 0.0)))
+    raise ValueError(f"unsupported group_by: {group_by!r}")
+
+
+def summarize_runs(rows: Iterable[Dict[str, Any]], *, group_by: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Aggregate run log rows (optionally grouped by prompt_version / hour / day, UTC).
+
+    Per group: runs, latency percentiles (finished runs only), repair_rate, replan_rate
+    (share of runs with >= 1 such call), exception_rate, task_status and bucket counts,
+    and average token usage when recorded.
+    """
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        groups.setdefault(_group_key(row, group_by), []).append(row)
+
+    out: Dict[str, Dict[str, Any]] = {}
+    for key, items in groups.items():
+        n = len(items)
+        finished = [r for r in items if not r.get("bucket")]
+        statuses: Dict[str, int] = {}
+        buckets: Dict[str, int] = {}
+        for r in items:
+            if r.get("bucket"):
+                buckets[r["bucket"]] = buckets.get(r["bucket"], 0) + 1
+            elif r.get("task_status"):
+                statuses[r["task_status"]] = statuses.get(r["task_status"], 0) + 1
+        with_tokens = [r for r in items if r.get("completion_tokens") is not None]
+
+        summary: Dict[str, Any] = {
+            "runs": n,
+            "latency_ms": summarize_latencies([float(r["latency_ms"]) for r in finished]),
+            "repair_rate": sum(1 for r in items if (r.get("repair_calls") or 0) > 0) / n,
+            "replan_rate": sum(1 for r in items if (r.get("replan_calls") or 0) > 0) / n,
+            "exception_rate": (n - len(finished)) / n,
+            "task_status": statuses,
+            "buckets": buckets,
+        }
+        if with_tokens:
+            summary["avg_prompt_tokens"] = sum(r.get("prompt_tokens") or 0 for r in with_tokens) / len(with_tokens)
+            summary["avg_completion_tokens"] = sum(r["completion_tokens"] for r in with_tokens) / len(with_tokens)
+        out[key] = summary
+    return out
@@ -2,14 +2,41 @@ from __future__ import annotations
 # Module: agent_orchestration
 # Boundary: do NOT import app.tools/* (tool dispatch is execution_engine/tool_runtime responsibility)
 # See: docs/architecture/modules.md
-from app.agents.plan_executor import execute_plan
-
+from app.agents.plan_executor import (
+    STATUS_BLOCKED_UNKNOWN_DEP,
+    STATUS_TIMEOUT,
+    IncrementalExecution,
+    ToolResultCache,
+    execute_plan,
+    execute_plan_async,
+    step_status_code,
+)
+
+import asyncio
+import copy
 import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Optional, List
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, List, Tuple
 
 from app.services.chat_completion_service import ChatCompletionService
+from app.agents.debug_artifacts import get_debug_writer
+from app.agents.fast_path import FastPathPlanner
+from app.agents.plan_cache import PlanCache, hash_text, make_plan_cache_key, make_plan_scope_key
+from app.agents.plan_stream import StreamingStepParser, validate_step_prefix
+from app.agents.run_log import RunLog, summarize_latencies
+from app.agents.semantic_plan_cache import SemanticPlanCache
+from app.agents.plan_wire import COMPACT_SCHEMA_ADDENDUM, WIRE_FORMATS, expand_compact_plan, is_compact_plan
+from app.agents.plan_compiler import CompiledPlan, PlanIndex, compile_plan
 from app.agents.plan_validator import validate_plan_payload
+from app.agents.tool_catalog import UNKNOWN_TOOL_STATS, get_tool_catalog
+from app.agents.spans import NULL_RECORDER, SpanRecorder, emit_spans, has_span_hooks
+from app.agents.token_budget import dumps_compact, estimate_json_tokens, truncate_json_value, truncate_text
 
 # ✅ PCL schema (minimal wiring, optional)
 from app.prompts.pcl.schema import SchemaSpec, build_schema_prompt
@@ -34,13 +61,29 @@ def validate_payload(payload: dict) -> None:
         raise ValueError("plan contract validation failed: " + "; ".join(errors))
 
 
+def _meta_row(results: Any) -> Optional[Dict[str, Any]]:
+    """
+    The __meta__ row of execution_results: the last item by contract (checked first, O(1)),
+    otherwise the first one found.
+    """
+    if not isinstance(results, list) or not results:
+        return None
+    last = results[-1]
+    if isinstance(last, dict) and last.get("step_id") == "__meta__":
+        return last
+    for r in results:
+        if isinstance(r, dict) and r.get("step_id") == "__meta__":
+            return r
+    return None
+
+
 def finalize_output(payload: Dict[str, Any], debug: bool) -> Dict[str, Any]:
     """
     Decide what to return to the caller.
 
     - debug=True: always return full payload
     - debug=False:
-        - if task failed/blocked/partial -> return full payload (keep errors visible)
+        - if task failed/blocked/partial/timed out -> return full payload (keep errors visible)
         - if task succeeded -> return a stable summary
     """
     if debug:
@@ -51,18 +94,14 @@ def finalize_output(payload: Dict[str, Any], debug: bool) -> Dict[str, Any]:
         return payload
 
     # Find __meta__ row if present
-    meta = None
-    for r in results:
-        if isinstance(r, dict) and r.get("step_id") == "__meta__":
-            meta = r
-            break
+    meta = _meta_row(results)
 
     task_status = None
     if isinstance(meta, dict):
         task_status = meta.get("task_status")
 
     # If task is not OK, return full payload for visibility
-    if task_status in ("FAILED", "BLOCKED", "PARTIAL"):
+    if task_status in ("FAILED", "BLOCKED", "PARTIAL", "TIMEOUT"):
         return payload
 
     # Otherwise: return a stable summary (still JSON-safe)
@@ -81,6 +120,16 @@ def finalize_output(payload: Dict[str, Any], debug: bool) -> Dict[str, Any]:
         stats = meta.get("stats")
         if isinstance(stats, dict):
             summary["stats"] = stats
+        plan_source = meta.get("plan_source")
+        if isinstance(plan_source, str):
+            summary["plan_source"] = plan_source
+        timings = meta.get("timings")
+        if isinstance(timings, dict):
+            summary["timings"] = timings
+        session_id = meta.get("session_id")
+        if isinstance(session_id, str):
+            summary["session_id"] = session_id
+            summary["session_turn"] = meta.get("session_turn")
 
     if isinstance(last_step, dict):
         summary["last_step_id"] = last_step.get("step_id")
@@ -132,9 +181,59 @@ def _build_pcl_schema_system_addendum() -> str:
     return step_index_contract + "\n\n" + string_escaping_contract
 
 
-def _save_debug_raw(filename: str, content: str) -> None:
-    Path("docs-private/_debug").mkdir(parents=True, exist_ok=True)
-    Path(f"docs-private/_debug/{filename}").write_text(content or "", encoding="utf-8")
+_STATIC_PREFIX_CACHE: Dict[Tuple[str, int, bool, str], Tuple[str, str, str]] = {}
+_STATIC_PREFIX_LOCK = threading.Lock()
+
+
+def _load_static_prefix(prompt_path: str, *, schema_enabled: bool, wire_format: str) -> Tuple[str, str, str]:
+    """
+    (base_system_prompt, schema_addendum, planner_addendum), cached per prompt file version.
+
+    These system messages are byte-identical across runs and always sent first, so the provider's
+    prompt-prefix cache can reuse them; per-run content (session context, user input) comes after.
+    """
+    p = Path(prompt_path)
+    try:
+        version = p.stat().st_mtime_ns
+    except OSError:
+        version = -1
+    key = (str(p.resolve()), version, schema_enabled, wire_format)
+
+    cached = _STATIC_PREFIX_CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    base_system_prompt = load_text(prompt_path).strip()
+    schema_addendum = _build_pcl_schema_system_addendum() if schema_enabled else ""
+    planner_addendum = COMPACT_SCHEMA_ADDENDUM if wire_format == "compact" else schema_addendum
+    cached = (base_system_prompt, schema_addendum, planner_addendum)
+    with _STATIC_PREFIX_LOCK:
+        _STATIC_PREFIX_CACHE[key] = cached
+    return cached
+
+
+def _tool_catalog_message(tool_catalog: Optional[str]) -> List[Dict[str, str]]:
+    """
+    Registry-generated tool catalog (cached in app.agents.tool_catalog); None -> current catalog.
+    """
+    text = get_tool_catalog().text if tool_catalog is None else tool_catalog
+    if not text:
+        return []
+    return [{"role": "system", "content": text}]
+
+
+def _context_message(context: Optional[str]) -> List[Dict[str, str]]:
+    if not context or not context.strip():
+        return []
+    return [{"role": "system", "content": context.strip()}]
+
+
+def _save_debug_raw(run_id: str, filename: str, content: str) -> Optional[str]:
+    """
+    Queue a raw model output for the background debug writer (no disk I/O here).
+    Returns the artifact path, or None if this run is sampled out / the queue is full.
+    """
+    return get_debug_writer().submit(run_id, filename, content)
 
 
 def _call_model(
@@ -143,13 +242,83 @@ def _call_model(
     temperature: float,
     max_tokens: int,
     service: Optional[ChatCompletionService] = None,
+    rec: Any = NULL_RECORDER,
+    attempt: Optional[int] = None,
+    kind: str = "planner",
+    **span_attrs: Any,
 ) -> str:
     svc = service or ChatCompletionService()
-    raw = svc.create(
-        messages=messages,
-        temperature=temperature,
-        max_tokens=max_tokens,
-    )
+    if not rec.enabled:
+        raw = svc.create(
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
+        return (raw or "").strip()
+
+    # recording: attach provider token usage to the span when the service reports it
+    usage: Optional[Dict[str, Any]] = None
+    start = time.perf_counter()
+    try:
+        create_with_usage = getattr(svc, "create_with_usage", None)
+        if callable(create_with_usage):
+            raw, usage = create_with_usage(
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+            )
+        else:
+            raw = svc.create(
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+            )
+    finally:
+        rec.add("model_call", start, time.perf_counter(), attempt=attempt, kind=kind, **span_attrs, **(usage or {}))
+    return (raw or "").strip()
+
+
+async def _call_model_async(
+    messages: List[Dict[str, str]],
+    *,
+    temperature: float,
+    max_tokens: int,
+    service: Optional[ChatCompletionService] = None,
+    rec: Any = NULL_RECORDER,
+    attempt: Optional[int] = None,
+    kind: str = "planner",
+    **span_attrs: Any,
+) -> str:
+    """
+    _call_model for async callers: awaits service.acreate_with_usage when the service has it,
+    otherwise runs the sync call in a worker thread.
+    """
+    svc = service or ChatCompletionService()
+    acreate_with_usage = getattr(svc, "acreate_with_usage", None)
+    if not callable(acreate_with_usage):
+        return await asyncio.to_thread(
+            _call_model,
+            messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            service=svc,
+            rec=rec,
+            attempt=attempt,
+            kind=kind,
+            **span_attrs,
+        )
+
+    usage: Optional[Dict[str, Any]] = None
+    start = time.perf_counter()
+    try:
+        raw, usage = await acreate_with_usage(
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
+    finally:
+        if rec.enabled:
+            rec.add("model_call", start, time.perf_counter(), attempt=attempt, kind=kind, **span_attrs, **(usage or {}))
     return (raw or "").strip()
 
 
@@ -194,6 +363,12 @@ def _parse_json_best_effort(raw: str) -> Dict[str, Any]:
     raise json.JSONDecodeError("No JSON object found in model output", text, 0)
 
 
+# ---- multi-pass reference hard-fixes ----
+# The run pipeline uses app.agents.plan_compiler.compile_plan (the same fixes and checks fused
+# into one pass); these stay as the readable reference it is checked and benchmarked against
+# (scripts/bench_plan_compile.py).
+
+
 def _normalize_step_ids_inplace(payload: Dict[str, Any]) -> None:
     """
     Hard-fix for step_id drift:
@@ -404,6 +579,8 @@ def _build_repair_messages(
     user_input: str,
     broken_text: str,
     expected_steps: Optional[int] = None,
+    context: Optional[str] = None,
+    tool_catalog: Optional[str] = None,
 ) -> List[Dict[str, str]]:
     """
     Repair mode:
@@ -466,7 +643,9 @@ def _build_repair_messages(
     messages: List[Dict[str, str]] = [{"role": "system", "content": base_system_prompt}]
     if schema_addendum:
         messages.append({"role": "system", "content": schema_addendum})
+    messages.extend(_tool_catalog_message(tool_catalog))
     messages.append({"role": "system", "content": repair_system})
+    messages.extend(_context_message(context))
     messages.append({"role": "user", "content": user_repair})
     return messages
 
@@ -474,16 +653,13 @@ def _build_repair_messages(
 def _get_task_status_from_execution_results(payload: Dict[str, Any]) -> Optional[str]:
     """
     Extract task_status from execution_results.__meta__ if present.
-    Returns: "COMPLETED"/"FAILED"/"BLOCKED"/"PARTIAL"/None
+    Returns: "COMPLETED"/"FAILED"/"BLOCKED"/"PARTIAL"/"TIMEOUT"/None
     """
-    results = payload.get("execution_results")
-    if not isinstance(results, list):
+    meta = _meta_row(payload.get("execution_results"))
+    if meta is None:
         return None
-    for r in results:
-        if isinstance(r, dict) and r.get("step_id") == "__meta__":
-            v = r.get("task_status")
-            return v if isinstance(v, str) else None
-    return None
+    v = meta.get("task_status")
+    return v if isinstance(v, str) else None
 
 
 def _has_degraded_steps(payload: Dict[str, Any]) -> bool:
@@ -493,25 +669,18 @@ def _has_degraded_steps(payload: Dict[str, Any]) -> bool:
     - meta.stats.degraded_count
     - meta.degraded_steps
     """
-    results = payload.get("execution_results")
-    if not isinstance(results, list):
+    meta = _meta_row(payload.get("execution_results"))
+    if meta is None:
         return False
-    for r in results:
-        if not isinstance(r, dict) or r.get("step_id") != "__meta__":
-            continue
 
-        stats = r.get("stats")
-        if isinstance(stats, dict):
-            dc = stats.get("degraded_count")
-            if isinstance(dc, int) and dc > 0:
-                return True
-
-        ds = r.get("degraded_steps")
-        if isinstance(ds, list) and len(ds) > 0:
+    stats = meta.get("stats")
+    if isinstance(stats, dict):
+        dc = stats.get("degraded_count")
+        if isinstance(dc, int) and dc > 0:
             return True
 
-        return False
-    return False
+    ds = meta.get("degraded_steps")
+    return isinstance(ds, list) and len(ds) > 0
 
 
 def _mark_meta_as_partial_due_to_degraded(payload: Dict[str, Any]) -> None:
@@ -519,14 +688,141 @@ def _mark_meta_as_partial_due_to_degraded(payload: Dict[str, Any]) -> None:
     If strict_degraded triggers, we mark meta as PARTIAL to prevent finalize_output from hiding details.
     This is a local annotation; the real execution results stay intact.
     """
-    results = payload.get("execution_results")
-    if not isinstance(results, list):
-        return
+    meta = _meta_row(payload.get("execution_results"))
+    if meta is not None:
+        meta["task_status"] = "PARTIAL"
+        meta["reason"] = "strict degraded: degraded steps present, quality gate tripped"
+
+
+REPLAN_MODES = ("compact", "full")
+
+# default execution budget per plan for run_agent_once_json(_async): a hung tool without its own
+# timeout_s cannot block a run forever (pass plan_deadline_s=None to disable)
+DEFAULT_PLAN_DEADLINE_S = 120.0
+
+
+def _step_tool_name(step: Dict[str, Any]) -> Optional[str]:
+    tool = step.get("tool")
+    if isinstance(tool, str):
+        return tool
+    if isinstance(tool, dict) and isinstance(tool.get("name"), str):
+        return tool.get("name")
+    return None
+
+
+def _step_tool_args(step: Dict[str, Any]) -> Any:
+    tool = step.get("tool")
+    if isinstance(tool, dict):
+        return tool.get("args") or {}
+    return step.get("args") or {}
+
+
+def _build_compact_replan_view(
+    last_payload: Dict[str, Any],
+    *,
+    token_budget: int = 800,
+    output_chars: int = 300,
+) -> Dict[str, Any]:
+    """
+    Delta view of an executed plan for REPLAN MODE.
+
+    Instead of the full payload, keep:
+    - plan: dependency skeleton of every step (step_id, title, tool, deps, args while budget allows)
+    - problems: only failed / timed-out / blocked / skipped / degraded steps, with error strings and truncated outputs
+    - task_status / reason from __meta__
+
+    The view is shrunk level by level until its estimated size fits token_budget:
+    outputs shorter -> outputs dropped -> skeleton args dropped -> dependency-skipped
+    problems reduced to ids -> titles truncated.
+    """
+    steps = last_payload.get("steps")
+    steps = steps if isinstance(steps, list) else []
+    results = last_payload.get("execution_results")
+    results = results if isinstance(results, list) else []
+
+    meta: Dict[str, Any] = {}
+    by_id: Dict[str, Dict[str, Any]] = {}
     for r in results:
-        if isinstance(r, dict) and r.get("step_id") == "__meta__":
-            r["task_status"] = "PARTIAL"
-            r["reason"] = "strict degraded: degraded steps present, quality gate tripped"
-            return
+        if not isinstance(r, dict):
+            continue
+        if r.get("step_id") == "__meta__":
+            meta = r
+        elif isinstance(r.get("step_id"), str):
+            by_id[r["step_id"]] = r
+
+    def _problem_kind(r: Dict[str, Any]) -> Optional[str]:
+        if r.get("skipped"):
+            return "skipped"
+        if not r.get("ok"):
+            code = step_status_code(r)
+            if code == STATUS_TIMEOUT:
+                return "timeout"
+            return "blocked" if code == STATUS_BLOCKED_UNKNOWN_DEP else "failed"
+        if r.get("degraded"):
+            return "degraded"
+        return None
+
+    def _render(level: int, out_chars: int) -> Dict[str, Any]:
+        skeleton: List[Dict[str, Any]] = []
+        problems: List[Dict[str, Any]] = []
+        for s in steps:
+            if not isinstance(s, dict):
+                continue
+            sid = s.get("step_id")
+            title = s.get("title") if isinstance(s.get("title"), str) else ""
+            entry: Dict[str, Any] = {
+                "step_id": sid,
+                "title": truncate_text(title, 40 if level >= 4 else 120),
+                "tool": _step_tool_name(s),
+                "deps": s.get("dependencies") or [],
+            }
+            if level < 2:
+                entry["args"] = truncate_json_value(_step_tool_args(s), 200)
+            skeleton.append(entry)
+
+            r = by_id.get(sid) if isinstance(sid, str) else None
+            if r is None:
+                continue
+            kind = _problem_kind(r)
+            if kind is None:
+                continue
+
+            problem: Dict[str, Any] = {"step_id": sid, "status": kind}
+            if r.get("reason"):
+                problem["reason"] = truncate_text(str(r.get("reason")), 200)
+            if r.get("error"):
+                problem["error"] = truncate_text(str(r.get("error")), 300)
+            if kind == "skipped" and level >= 3:
+                problems.append(problem)
+                continue
+            if kind == "degraded" and r.get("degraded_reason"):
+                problem["degraded_reason"] = r.get("degraded_reason")
+            problem["args"] = truncate_json_value(_step_tool_args(s), 200)
+            if level < 1 and "output" in r:
+                problem["output"] = truncate_json_value(r.get("output"), out_chars)
+            problems.append(problem)
+
+        view: Dict[str, Any] = {
+            "task_summary": last_payload.get("task_summary"),
+            "task_status": meta.get("task_status"),
+            "reason": meta.get("reason"),
+            "plan": skeleton,
+            "problems": problems,
+        }
+        return view
+
+    out_chars = output_chars
+    view = _render(0, out_chars)
+    while estimate_json_tokens(view) > token_budget and out_chars > 40:
+        out_chars //= 2
+        view = _render(0, out_chars)
+
+    level = 1
+    while estimate_json_tokens(view) > token_budget and level <= 4:
+        view = _render(level, out_chars)
+        level += 1
+
+    return view
 
 
 def _build_replan_messages(
@@ -536,14 +832,24 @@ def _build_replan_messages(
     user_input: str,
     last_payload: Dict[str, Any],
     expected_steps: Optional[int] = None,
+    replan_mode: str = "compact",
+    token_budget: int = 800,
+    context: Optional[str] = None,
+    tool_catalog: Optional[str] = None,
 ) -> List[Dict[str, str]]:
     """
     Replan mode (Execution Loop):
-    - When tool execution FAILED/BLOCKED (or strict degraded gate), ask the model to produce a corrected plan JSON.
+    - When tool execution FAILED/BLOCKED/TIMEOUT (or strict degraded gate), ask the model to produce a corrected plan JSON.
     - Must keep plan contract.
     - Must avoid unknown tools.
     - MUST output JSON only, no extra text.
+
+    replan_mode:
+    - "compact" (default): send the delta view from _build_compact_replan_view (bounded by token_budget)
+    - "full": send the whole previous payload including execution_results (legacy form)
     """
+    if replan_mode not in REPLAN_MODES:
+        raise ValueError(f"replan_mode must be one of {REPLAN_MODES}, got {replan_mode!r}")
     expected_steps_rule = ""
     if expected_steps is not None:
         expected_steps_rule = f"""
@@ -556,7 +862,7 @@ def _build_replan_messages(
     You are in REPLAN MODE.
 
     Context:
-    - The previous plan was executed, but it FAILED or was BLOCKED (or a strict degraded quality gate tripped).
+    - The previous plan was executed, but it FAILED, was BLOCKED or TIMED OUT (or a strict degraded quality gate tripped).
     - You MUST generate a new corrected plan that can execute successfully.
 
     Hard rules:
@@ -566,25 +872,35 @@ def _build_replan_messages(
     4) step_id MUST start from "step_1" and be continuous with no gaps: step_1..step_N.
     5) dependencies MUST only reference earlier step_ids.
     6) Tool rule (MUST):
-       - Use ONLY these tool names:
-         - echo_tool
-         - get_time
-         - time_tool
-         - get_time_tool
-       - If the previous plan used an unknown tool, replace it with echo_tool.
+       - Use ONLY tool names from the "Available tools" list, with args matching their signatures.
+       - If the previous plan used an unknown tool, replace it with the closest available tool
+         (echo_tool if none fits).
     7) If the task was BLOCKED due to dependencies, fix dependencies so they reference valid earlier steps.
-    8) Keep the user intent. Do not add unrelated steps.
-    9) String safety:
+    8) If steps TIMED OUT, make them lighter (narrower queries, fewer items) or drop non-essential ones.
+    9) Keep the user intent. Do not add unrelated steps.
+    10) String safety:
        - Do NOT embed raw JSON snippets or braces inside string fields.
     {expected_steps_rule}
     """.strip()
 
+    if replan_mode == "full":
+        previous_block = (
+            "Previous payload (including execution_results):\n"
+            + json.dumps(last_payload, ensure_ascii=False, indent=2)
+        )
+    else:
+        view = _build_compact_replan_view(last_payload, token_budget=token_budget)
+        previous_block = (
+            "Previous plan (compact: dependency skeleton + problem steps only; "
+            "steps not listed under problems executed ok):\n"
+            + dumps_compact(view)
+        )
+
     user_replan = f"""
     User intent:
     {user_input.strip()}
 
-    Previous payload (including execution_results):
-    {json.dumps(last_payload, ensure_ascii=False, indent=2)}
+    {previous_block}
 
     Task:
     Return a corrected JSON plan only.
@@ -593,11 +909,345 @@ def _build_replan_messages(
     messages: List[Dict[str, str]] = [{"role": "system", "content": base_system_prompt}]
     if schema_addendum:
         messages.append({"role": "system", "content": schema_addendum})
+    messages.extend(_tool_catalog_message(tool_catalog))
     messages.append({"role": "system", "content": replan_system})
+    messages.extend(_context_message(context))
     messages.append({"role": "user", "content": user_replan})
     return messages
 
 
+@dataclass
+class _PlannerRace:
+    plan: Optional[CompiledPlan]
+    backups: List[CompiledPlan]
+    first_raw: str
+    winner_index: Optional[int]
+
+
+def _dry_check_candidate(
+    raw: str,
+    expected_steps: Optional[int],
+    *,
+    rec: Any = NULL_RECORDER,
+) -> Optional[CompiledPlan]:
+    """
+    Parse + normalize + validate one planner candidate; None if it is not directly executable.
+    """
+    try:
+        compiled = _prepare_plan(raw, expected_steps, rec=rec, attempt=1)
+        _check_plan(compiled, rec=rec, attempt=1)
+    except Exception:
+        return None
+    return compiled
+
+
+def _race_planner_candidates(
+    messages: List[Dict[str, str]],
+    *,
+    k: int,
+    temperature: float,
+    max_tokens: int,
+    service: ChatCompletionService,
+    expected_steps: Optional[int],
+    rec: Any = NULL_RECORDER,
+) -> _PlannerRace:
+    """
+    Speculative planning: issue K planner calls at once and take the first acceptable plan.
+
+    - Candidate i uses temperature + 0.2 * i (capped at 1.0) so candidates differ.
+    - Candidates are dry-checked in arrival order; the first that passes wins.
+    - Candidates that already arrived are dry-checked as backups; the rest are abandoned
+      (not-yet-started calls are cancelled; in-flight HTTP calls finish in the background).
+    - If nothing passes, first_raw is the earliest non-empty output (for the repair path).
+    """
+    temps = [min(1.0, temperature + 0.2 * i) for i in range(k)]
+    pool = ThreadPoolExecutor(max_workers=k, thread_name_prefix="planner-spec")
+    futures = {
+        pool.submit(
+            _call_model,
+            messages,
+            temperature=t,
+            max_tokens=max_tokens,
+            service=service,
+            rec=rec,
+            attempt=1,
+            candidate=i,
+        ): i
+        for i, t in enumerate(temps)
+    }
+
+    first_raw: Optional[str] = None
+    first_error: Optional[BaseException] = None
+    winner: Optional[CompiledPlan] = None
+    winner_index: Optional[int] = None
+    backups: List[CompiledPlan] = []
+
+    try:
+        for fut in as_completed(futures):
+            try:
+                raw = fut.result()
+            except Exception as e:
+                first_error = first_error or e
+                continue
+            if not raw or not raw.strip():
+                continue
+            if first_raw is None:
+                first_raw = raw
+            plan = _dry_check_candidate(raw, expected_steps, rec=rec)
+            if plan is not None:
+                winner = plan
+                winner_index = futures[fut]
+                break
+
+        if winner is not None:
+            for fut, i in futures.items():
+                if i == winner_index or not fut.done() or fut.cancelled() or fut.exception() is not None:
+                    continue
+                backup = _dry_check_candidate(fut.result(), expected_steps, rec=rec)
+                if backup is not None:
+                    backups.append(backup)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    if first_raw is None:
+        if first_error is not None:
+            raise first_error
+        raise ValueError("Model output is empty. Check API key/base_url/model, or prompt constraints.")
+
+    return _PlannerRace(plan=winner, backups=backups, first_raw=first_raw, winner_index=winner_index)
+
+
+async def _race_planner_candidates_async(
+    messages: List[Dict[str, str]],
+    *,
+    k: int,
+    temperature: float,
+    max_tokens: int,
+    service: ChatCompletionService,
+    expected_steps: Optional[int],
+    rec: Any = NULL_RECORDER,
+) -> _PlannerRace:
+    """
+    _race_planner_candidates on the event loop: same candidate temperatures, arrival-order dry
+    check and backup rules; unfinished candidates are cancelled once a winner is found.
+    """
+    temps = [min(1.0, temperature + 0.2 * i) for i in range(k)]
+    tasks = {
+        asyncio.ensure_future(
+            _call_model_async(
+                messages,
+                temperature=t,
+                max_tokens=max_tokens,
+                service=service,
+                rec=rec,
+                attempt=1,
+                candidate=i,
+            )
+        ): i
+        for i, t in enumerate(temps)
+    }
+
+    first_raw: Optional[str] = None
+    first_error: Optional[BaseException] = None
+    winner: Optional[CompiledPlan] = None
+    winner_index: Optional[int] = None
+    backups: List[CompiledPlan] = []
+
+    pending = set(tasks)
+    try:
+        while pending and winner is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for fut in sorted(done, key=lambda f: tasks[f]):
+                if winner is not None:
+                    break
+                if fut.exception() is not None:
+                    first_error = first_error or fut.exception()
+                    continue
+                raw = fut.result()
+                if not raw or not raw.strip():
+                    continue
+                if first_raw is None:
+                    first_raw = raw
+                plan = _dry_check_candidate(raw, expected_steps, rec=rec)
+                if plan is not None:
+                    winner = plan
+                    winner_index = tasks[fut]
+
+        if winner is not None:
+            for fut, i in tasks.items():
+                if i == winner_index or not fut.done() or fut.cancelled() or fut.exception() is not None:
+                    continue
+                backup = _dry_check_candidate(fut.result(), expected_steps, rec=rec)
+                if backup is not None:
+                    backups.append(backup)
+    finally:
+        for fut in pending:
+            fut.cancel()
+
+    if first_raw is None:
+        if first_error is not None:
+            raise first_error
+        raise ValueError("Model output is empty. Check API key/base_url/model, or prompt constraints.")
+
+    return _PlannerRace(plan=winner, backups=backups, first_raw=first_raw, winner_index=winner_index)
+
+
+@dataclass
+class _PipelinedCall:
+    raw: str
+    pre_results: List[Dict[str, Any]]
+    streamed_steps: int
+    rejected_step: Optional[str]
+
+
+def _stream_and_pre_execute(
+    messages: List[Dict[str, str]],
+    *,
+    temperature: float,
+    max_tokens: int,
+    service: Any,
+    rec: Any = NULL_RECORDER,
+    tool_cache: Optional[ToolResultCache] = None,
+    plan_deadline_s: Optional[float] = None,
+) -> _PipelinedCall:
+    """
+    Pipelined planning: stream the planner output and execute steps while it is generated.
+
+    - Each completed step object is validated as part of the prefix streamed so far
+      (validate_step_prefix); accepted steps are queued to one worker, in order, so a step
+      starts as soon as it arrives and the steps before it have run.
+    - The first rejected step stops pre-execution (later steps may depend on it); streaming
+      continues so the full output can go through the normal parse/repair/validate path.
+    - Pre-executed rows are only reuse candidates: the caller executes the validated plan
+      with reuse_results=pre_results, so rows of steps that changed (or were repaired away)
+      are discarded by fingerprint.
+    - plan_deadline_s applies from the start of the stream, as it would to execute_plan: calls
+      are capped by the time left and steps not started by then are skipped. After the stream
+      the queued steps get until the deadline; anything still running is abandoned.
+    """
+    parser = StreamingStepParser()
+    runner = IncrementalExecution(
+        recorder=rec if rec.enabled else None, tool_cache=tool_cache, deadline_s=plan_deadline_s
+    )
+    pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="planner-pipeline")
+    submitted: List["Future[Any]"] = []
+    accepted: List[Dict[str, Any]] = []
+    chunks: List[str] = []
+    rejected: Optional[str] = None
+
+    start = time.perf_counter()
+    try:
+        for delta in service.create_stream(messages=messages, temperature=temperature, max_tokens=max_tokens):
+            chunks.append(delta)
+            if rejected is not None:
+                continue
+            for step in parser.feed(delta):
+                errors = validate_step_prefix(accepted + [step])
+                if errors:
+                    rejected = "; ".join(errors)
+                    break
+                accepted.append(step)
+                submitted.append(pool.submit(runner.add_step, step))
+    except BaseException:
+        runner.cancel()
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    finally:
+        rec.add("model_call", start, time.perf_counter(), attempt=1, kind="planner", streamed=True)
+
+    remaining = None if runner.deadline is None else max(0.0, runner.deadline - time.monotonic())
+    wait(submitted, timeout=remaining)
+    runner.cancel()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+    return _PipelinedCall(
+        raw="".join(chunks).strip(),
+        pre_results=list(runner.results),
+        streamed_steps=len(accepted),
+        rejected_step=rejected,
+    )
+
+
+def _pipeline_stats(call: _PipelinedCall, executed: Dict[str, Any]) -> Dict[str, Any]:
+    pre_ok = [r for r in call.pre_results if r.get("ok") is True and not r.get("skipped")]
+    reused_from = {
+        r.get("reused_from")
+        for r in executed.get("execution_results") or []
+        if isinstance(r, dict) and r.get("reused")
+    }
+    reused = sum(1 for r in pre_ok if r.get("step_id") in reused_from)
+    return {
+        "streamed_steps": call.streamed_steps,
+        "pre_executed": len(pre_ok),
+        "reused": reused,
+        "discarded": len(pre_ok) - reused,
+        "rejected_step": call.rejected_step,
+    }
+
+
+class _SyncIO:
+    """
+    Blocking operations of the run pipeline, run inline on the calling thread (the sync entry:
+    same clients, threads and executor as a plain sync implementation). Nothing here suspends,
+    so the pipeline coroutine completes in a single step (see _drive_inline).
+    """
+
+    async def call_model(self, messages: List[Dict[str, str]], **kwargs: Any) -> str:
+        return _call_model(messages, **kwargs)
+
+    async def execute(self, payload: Dict[str, Any], strict_degraded: bool, **kwargs: Any) -> Dict[str, Any]:
+        return _execute_with_gate(payload, strict_degraded, **kwargs)
+
+    async def race(self, messages: List[Dict[str, str]], **kwargs: Any) -> _PlannerRace:
+        return _race_planner_candidates(messages, **kwargs)
+
+    async def stream_pre_execute(self, messages: List[Dict[str, str]], **kwargs: Any) -> _PipelinedCall:
+        return _stream_and_pre_execute(messages, **kwargs)
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        return fn(*args, **kwargs)
+
+
+class _AsyncIO:
+    """
+    Blocking operations of the run pipeline for the async entry: awaited natively where
+    possible, otherwise moved to worker threads so the event loop never blocks.
+    """
+
+    async def call_model(self, messages: List[Dict[str, str]], **kwargs: Any) -> str:
+        return await _call_model_async(messages, **kwargs)
+
+    async def execute(self, payload: Dict[str, Any], strict_degraded: bool, **kwargs: Any) -> Dict[str, Any]:
+        return await _execute_with_gate_async(payload, strict_degraded, **kwargs)
+
+    async def race(self, messages: List[Dict[str, str]], **kwargs: Any) -> _PlannerRace:
+        return await _race_planner_candidates_async(messages, **kwargs)
+
+    async def stream_pre_execute(self, messages: List[Dict[str, str]], **kwargs: Any) -> _PipelinedCall:
+        # the stream is a sync iterator feeding a worker thread: keep the whole call off the loop
+        return await asyncio.to_thread(_stream_and_pre_execute, messages, **kwargs)
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        return await asyncio.to_thread(fn, *args, **kwargs)
+
+
+_SYNC_IO = _SyncIO()
+_ASYNC_IO = _AsyncIO()
+
+
+def _drive_inline(coro: Any) -> Any:
+    """
+    Run a coroutine that never suspends (the pipeline with _SyncIO) to completion on the
+    calling thread, without an event loop; safe to call from inside a running loop too.
+    """
+    try:
+        coro.send(None)
+    except StopIteration as done:
+        return done.value
+    coro.close()
+    raise RuntimeError("sync agent pipeline suspended on an awaitable; use run_agent_once_json_async")
+
+
 def run_agent_once_raw(
     user_input: str,
     *,
@@ -620,6 +1270,7 @@ def run_agent_once_raw(
         if schema_addendum:
             messages.append({"role": "system", "content": schema_addendum})
 
+    messages.extend(_tool_catalog_message(None))
     messages.append({"role": "user", "content": user_input.strip()})
 
     return _call_model(
@@ -630,6 +1281,155 @@ def run_agent_once_raw(
     )
 
 
+def _prepare_plan(
+    raw: str,
+    expected_steps: Optional[int],
+    *,
+    rec: Any = NULL_RECORDER,
+    attempt: Optional[int] = None,
+) -> CompiledPlan:
+    """
+    Parse model output, then apply the deterministic hard-fixes and the contract checks in one
+    pass (app.agents.plan_compiler.compile_plan); _check_plan() raises on the errors found.
+    Compact wire-format plans (app.agents.plan_wire) are expanded to the canonical contract first.
+
+    Raises json.JSONDecodeError when the output is not parseable.
+    """
+    with rec.span("parse", attempt=attempt):
+        payload = _parse_json_best_effort(raw)
+        if is_compact_plan(payload):
+            payload = expand_compact_plan(payload)
+    with rec.span("normalize", attempt=attempt):
+        return compile_plan(payload, expected_steps=expected_steps)
+
+
+def _check_plan(
+    compiled: CompiledPlan,
+    *,
+    rec: Any = NULL_RECORDER,
+    attempt: Optional[int] = None,
+) -> None:
+    """
+    Raise the errors compile_plan() found (same messages as validate_payload / expected_steps).
+    """
+    with rec.span("validate", attempt=attempt):
+        if compiled.errors:
+            raise ValueError("plan contract validation failed: " + "; ".join(compiled.errors))
+        if compiled.expected_steps_error is not None:
+            raise ValueError(compiled.expected_steps_error)
+    UNKNOWN_TOOL_STATS.record(get_tool_catalog().unknown_tools(compiled.payload))
+
+
+def _execute_with_gate(
+    payload: Dict[str, Any],
+    strict_degraded: bool,
+    *,
+    reuse_from: Optional[Dict[str, Any]] = None,
+    index: Optional[PlanIndex] = None,
+    max_workers: int = 1,
+    plan_deadline_s: Optional[float] = None,
+    tool_cache: Optional[ToolResultCache] = None,
+    checkpoint: Optional[Any] = None,
+    run_id: Optional[str] = None,
+    rec: Any = NULL_RECORDER,
+    attempt: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Execute a validated plan, then apply the strict-degraded quality gate.
+
+    reuse_from: a previously executed payload (e.g. the attempt being replanned); steps whose
+    fingerprint matches a successful previous step are carried forward instead of re-executed.
+    index: the PlanIndex compile_plan() built for this payload (None for cached / rule plans).
+    max_workers: > 1 runs independent steps concurrently (execute_plan(max_workers=...)).
+    plan_deadline_s: execution time budget for this plan (execute_plan(deadline_s=...)).
+    tool_cache: memo of pure tool calls shared across runs (execute_plan(tool_cache=...)).
+    checkpoint / run_id: save completed steps under run_id (execute_plan(checkpoint=...)).
+    """
+    with rec.span("execute", attempt=attempt):
+        executed = execute_plan(
+            payload,
+            reuse_results=_reuse_results(reuse_from),
+            recorder=rec if rec.enabled else None,
+            index=index,
+            max_workers=max_workers,
+            deadline_s=plan_deadline_s,
+            tool_cache=tool_cache,
+            checkpoint=checkpoint,
+            run_id=run_id,
+        )
+    return _apply_degraded_gate(executed, strict_degraded)
+
+
+async def _execute_with_gate_async(
+    payload: Dict[str, Any],
+    strict_degraded: bool,
+    *,
+    reuse_from: Optional[Dict[str, Any]] = None,
+    index: Optional[PlanIndex] = None,
+    max_workers: int = 1,
+    plan_deadline_s: Optional[float] = None,
+    tool_cache: Optional[ToolResultCache] = None,
+    checkpoint: Optional[Any] = None,
+    run_id: Optional[str] = None,
+    rec: Any = NULL_RECORDER,
+    attempt: Optional[int] = None,
+) -> Dict[str, Any]:
+    with rec.span("execute", attempt=attempt):
+        executed = await execute_plan_async(
+            payload,
+            reuse_results=_reuse_results(reuse_from),
+            recorder=rec if rec.enabled else None,
+            index=index,
+            max_workers=max_workers,
+            deadline_s=plan_deadline_s,
+            tool_cache=tool_cache,
+            checkpoint=checkpoint,
+            run_id=run_id,
+        )
+    return _apply_degraded_gate(executed, strict_degraded)
+
+
+def _reuse_results(reuse_from: Optional[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+    if reuse_from is not None and isinstance(reuse_from.get("execution_results"), list):
+        return reuse_from["execution_results"]
+    return None
+
+
+def _apply_degraded_gate(executed: Dict[str, Any], strict_degraded: bool) -> Dict[str, Any]:
+    # ✅ strict-degraded gate (treat as PARTIAL and trigger replan once)
+    if strict_degraded and _has_degraded_steps(executed):
+        _mark_meta_as_partial_due_to_degraded(executed)
+    return executed
+
+
+def _needs_replan(payload: Dict[str, Any]) -> bool:
+    return _get_task_status_from_execution_results(payload) in ("FAILED", "BLOCKED", "PARTIAL", "TIMEOUT")
+
+
+def annotate_meta(payload: Dict[str, Any], **fields: Any) -> None:
+    """
+    Attach run-level annotations to execution_results.__meta__ (if present).
+    Public for wrappers around run_agent_once_json (e.g. app.agents.session).
+    """
+    meta = _meta_row(payload.get("execution_results"))
+    if meta is not None:
+        meta.update(fields)
+
+
+def unknown_tool_stats() -> Dict[str, Any]:
+    """
+    Process-wide unknown-tool rate over validated LLM plans (see app.agents.tool_catalog).
+    """
+    return UNKNOWN_TOOL_STATS.stats()
+
+
+def _resolve_model_name(service: Optional[ChatCompletionService]) -> Optional[str]:
+    model = getattr(service, "model", None) if service is not None else None
+    if isinstance(model, str) and model:
+        return model
+    return os.getenv("OPENAI_MODEL")
+
+
 def run_agent_once_json(
     user_input: str,
     *,
@@ -641,221 +1441,1030 @@ def run_agent_once_json(
     expected_steps: Optional[int] = None,
     strict_degraded: bool = False,
     service: Optional[ChatCompletionService] = None,
+    plan_cache: Optional[PlanCache] = None,
+    run_id: Optional[str] = None,
+    replan_mode: str = "compact",
+    replan_token_budget: int = 800,
+    speculative_k: int = 1,
+    record_timings: bool = False,
+    fast_path: Optional[FastPathPlanner] = None,
+    wire_format: str = "canonical",
+    context: Optional[str] = None,
+    run_log: Optional[RunLog] = None,
+    pipelined: bool = False,
+    semantic_cache: Optional[SemanticPlanCache] = None,
+    max_workers: int = 1,
+    plan_deadline_s: Optional[float] = DEFAULT_PLAN_DEADLINE_S,
+    tool_cache: Optional[ToolResultCache] = None,
+    checkpoint: Optional[Any] = None,
 ) -> Dict[str, Any]:
-    base_system_prompt = load_text(prompt_path).strip()
+    """
+    Run one agent request: plan -> (repair) -> validate -> execute -> (replan once) -> finalize.
+
+    plan_cache:
+    - If provided, a cached validated plan for the same (normalized input, system prompt,
+      schema mode, expected_steps, model) skips the planner call and goes straight to execute_plan.
+    - A cached plan that no longer executes cleanly is invalidated and the normal LLM path runs.
+    - The plan whose execution completed is stored: the first attempt, a speculative backup or
+      the replanned plan, whichever ran last; a run that ends FAILED / BLOCKED / PARTIAL /
+      TIMEOUT stores nothing.
+    - __meta__.plan_source records where the executed plan came from ("llm" / "plan_cache").
+
+    run_id:
+    - Scopes debug artifacts (docs-private/_debug/runs/<run_id>/...) and is echoed in __meta__.run_id.
+    - Generated per call when not provided.
+
+    replan_mode / replan_token_budget:
+    - "compact" sends only the dependency skeleton and problem steps (bounded), "full" the whole payload.
+
+    speculative_k:
+    - 1 (default): a single planner call.
+    - K > 1: race K planner calls with varied temperature; the first candidate that passes the
+      dry check (parse + normalize + validate) is executed. Other candidates that already
+      arrived are kept as backups and executed before a replan call is paid.
+
+    record_timings:
+    - Record per-phase, per-attempt spans (prompt_load, model_call, parse, normalize, validate,
+      execute, per-step tool calls) and attach them as __meta__.timings.
+    - Spans are also recorded (without being attached) when a span hook is registered
+      (app.agents.spans.register_span_hook) or a run_log is given; hooks receive every run's
+      spans (including failed runs) for forwarding to metrics.
+
+    fast_path (optional, app.agents.fast_path.FastPathPlanner):
+    - Inputs matching a known intent rule get a deterministic plan without any LLM call
+      (__meta__.plan_source="fast_path", __meta__.fast_path_rule=<rule>).
+    - No match, or a rule plan that does not complete, falls back to the normal LLM path.
+
+    wire_format:
+    - "canonical" (default): the planner is asked for the full plan contract.
+    - "compact": the first planner call (and speculative candidates) uses the compact generation
+      schema (short keys, positional dependencies, no prose fields) to cut output tokens; it is
+      expanded locally before validation. Repair/replan prompts stay canonical.
+
+    context (optional):
+    - Conversation context (e.g. AgentSession.render_context()) sent as a system message after
+      the cached static prompt prefix, in planner/repair/replan calls. It is part of the plan
+      cache key; the fast path is skipped because follow-ups may refer back to earlier turns.
+
+    run_log (optional, app.agents.run_log.RunLog):
+    - Append one row per run (finished or raised): input hash, planner/repair/replan call counts,
+      per-phase timings, token usage (when the service reports it), task_status, exception bucket
+      and prompt_version (hash of the static prompt prefix). Query with scripts/query_run_log.py.
+
+    pipelined:
+    - False (default): execution starts after the whole plan is generated and validated.
+    - True: the first planner call is streamed (service.create_stream); each completed step that
+      passes step-level validation starts executing while the rest of the plan is generated.
+      The full plan is still parsed / repaired / validated at the end and executed with the
+      pre-executed rows as reuse candidates: unchanged steps are carried forward, the rest are
+      discarded (a plan that fails validation discards them all). Counts are in __meta__.pipelined.
+    - Only use it with tools that are safe to run speculatively (a discarded step has still run).
+    - Ignored when speculative_k > 1 or the service cannot stream.
+
+    semantic_cache (optional, app.agents.semantic_plan_cache.SemanticPlanCache):
+    - Consulted after an exact plan_cache miss: the nearest cached plan (same prompt / schema /
+      expected_steps / model / context scope) is reused when its input similarity passes the
+      threshold, all of its tools are still registered and its args fit this input (same numbers /
+      quoted spans / names, see args_fit_input) (__meta__.plan_source="semantic_cache",
+      __meta__.semantic_similarity). A reused plan that does not complete, or whose args do not fit
+      the input, counts as a false reuse, is dropped, and the normal LLM path runs.
+    - The plan that completed (first attempt, backup or replan, as for plan_cache) is added to
+      the index.
+    - Shadow mode never reuses; it compares the nearest cached plan with the fresh plan
+      (__meta__.semantic_shadow) to calibrate the threshold (SemanticPlanCache.calibration()).
+
+    max_workers:
+    - 1 (default): plan steps execute one at a time in list order.
+    - N > 1: steps whose dependencies have finished run concurrently on N threads
+      (execute_plan(max_workers=N)); results and __meta__ are identical to sequential execution.
+
+    plan_deadline_s:
+    - time budget for executing one plan (execute_plan(deadline_s=...)); each attempt gets its own.
+      Default DEFAULT_PLAN_DEADLINE_S (120s); None disables it.
+      Tool calls are also limited by the step's timeout_s / the tool's ToolSpec.timeout_s.
+    - Timed-out steps and their dependents are marked timed_out; task_status TIMEOUT triggers the
+      single replan like FAILED / BLOCKED.
+
+    tool_cache (optional, ToolResultCache):
+    - Pure tool calls (echo / search / summarize) are memoized by canonical args, so replans,
+      repeat runs and duplicate steps do not recompute them; such rows are marked `cached: true`.
+      Pass the same instance to every run to share it.
+
+    checkpoint (optional, app.agents.checkpoint_store.SqliteCheckpointStore / DirCheckpointStore):
+    - Each executed plan is recorded under run_id and its successful steps are saved as they
+      complete. If the process dies mid-execution, resume_plan(run_id, checkpoint=...) finishes
+      the last plan without recomputing saved steps (pass run_id to know which one to resume).
+    """
+    return _drive_inline(
+        _run_agent_once_json_entry(
+            user_input,
+            io=_SYNC_IO,
+            prompt_path=prompt_path,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            debug=debug,
+            schema_enabled=schema_enabled,
+            expected_steps=expected_steps,
+            strict_degraded=strict_degraded,
+            service=service,
+            plan_cache=plan_cache,
+            run_id=run_id,
+            replan_mode=replan_mode,
+            replan_token_budget=replan_token_budget,
+            speculative_k=speculative_k,
+            record_timings=record_timings,
+            fast_path=fast_path,
+            wire_format=wire_format,
+            context=context,
+            run_log=run_log,
+            pipelined=pipelined,
+            semantic_cache=semantic_cache,
+            max_workers=max_workers,
+            plan_deadline_s=plan_deadline_s,
+            tool_cache=tool_cache,
+            checkpoint=checkpoint,
+        )
+    )
 
-    schema_addendum = ""
-    if schema_enabled:
-        schema_addendum = _build_pcl_schema_system_addendum()
 
-    # ---- Attempt #1 ----
-    messages_1: List[Dict[str, str]] = [{"role": "system", "content": base_system_prompt}]
-    if schema_addendum:
-        messages_1.append({"role": "system", "content": schema_addendum})
-    messages_1.append({"role": "user", "content": user_input.strip()})
+async def run_agent_once_json_async(
+    user_input: str,
+    *,
+    prompt_path: str = "app/prompts/system/agent_system.md",
+    temperature: float = 0.2,
+    max_tokens: int = 512,
+    debug: bool = False,
+    schema_enabled: bool = True,
+    expected_steps: Optional[int] = None,
+    strict_degraded: bool = False,
+    service: Optional[ChatCompletionService] = None,
+    plan_cache: Optional[PlanCache] = None,
+    run_id: Optional[str] = None,
+    replan_mode: str = "compact",
+    replan_token_budget: int = 800,
+    speculative_k: int = 1,
+    record_timings: bool = False,
+    fast_path: Optional[FastPathPlanner] = None,
+    wire_format: str = "canonical",
+    context: Optional[str] = None,
+    run_log: Optional[RunLog] = None,
+    pipelined: bool = False,
+    semantic_cache: Optional[SemanticPlanCache] = None,
+    max_workers: int = 1,
+    plan_deadline_s: Optional[float] = DEFAULT_PLAN_DEADLINE_S,
+    tool_cache: Optional[ToolResultCache] = None,
+    checkpoint: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """
+    Async run_agent_once_json: same parameters, same output, for event-loop servers.
+
+    - Planner / repair / replan calls are awaited (service.acreate_with_usage when the service
+      has it, otherwise the sync client runs in a worker thread).
+    - Plans run through execute_plan_async (async tool handlers awaited, sync ones in threads;
+      max_workers > 1 runs independent steps as concurrent tasks).
+    - Plan cache backends, semantic cache embeddings and the run log run in worker threads;
+      debug artifacts are already queued to the background writer.
 
-    raw1 = _call_model(
-        messages_1,
+    So one process can keep many agent runs in flight. run_agent_once_json drives the same
+    pipeline inline on the calling thread.
+    """
+    return await _run_agent_once_json_entry(
+        user_input,
+        io=_ASYNC_IO,
+        prompt_path=prompt_path,
         temperature=temperature,
         max_tokens=max_tokens,
+        debug=debug,
+        schema_enabled=schema_enabled,
+        expected_steps=expected_steps,
+        strict_degraded=strict_degraded,
         service=service,
+        plan_cache=plan_cache,
+        run_id=run_id,
+        replan_mode=replan_mode,
+        replan_token_budget=replan_token_budget,
+        speculative_k=speculative_k,
+        record_timings=record_timings,
+        fast_path=fast_path,
+        wire_format=wire_format,
+        context=context,
+        run_log=run_log,
+        pipelined=pipelined,
+        semantic_cache=semantic_cache,
+        max_workers=max_workers,
+        plan_deadline_s=plan_deadline_s,
+        tool_cache=tool_cache,
+        checkpoint=checkpoint,
     )
 
-    if not raw1 or not raw1.strip():
-        raise ValueError("Model output is empty. Check API key/base_url/model, or prompt constraints.")
 
-    # Parse attempt #1; if JSON invalid -> repair once
+async def _run_agent_once_json_entry(
+    user_input: str,
+    *,
+    io: Any,
+    prompt_path: str,
+    temperature: float,
+    max_tokens: int,
+    debug: bool,
+    schema_enabled: bool,
+    expected_steps: Optional[int],
+    strict_degraded: bool,
+    service: Optional[ChatCompletionService],
+    plan_cache: Optional[PlanCache],
+    run_id: Optional[str],
+    replan_mode: str,
+    replan_token_budget: int,
+    speculative_k: int,
+    record_timings: bool,
+    fast_path: Optional[FastPathPlanner],
+    wire_format: str,
+    context: Optional[str],
+    run_log: Optional[RunLog],
+    pipelined: bool,
+    semantic_cache: Optional[SemanticPlanCache],
+    max_workers: int,
+    plan_deadline_s: Optional[float],
+    tool_cache: Optional[ToolResultCache],
+    checkpoint: Optional[Any],
+) -> Dict[str, Any]:
+    """
+    Shared body of run_agent_once_json / run_agent_once_json_async; io decides how blocking
+    operations run (_SyncIO inline, _AsyncIO awaited / in threads).
+    """
+    if replan_mode not in REPLAN_MODES:
+        raise ValueError(f"replan_mode must be one of {REPLAN_MODES}, got {replan_mode!r}")
+    if wire_format not in WIRE_FORMATS:
+        raise ValueError(f"wire_format must be one of {WIRE_FORMATS}, got {wire_format!r}")
+
+    run_id = run_id or uuid.uuid4().hex
+    rec = SpanRecorder() if (record_timings or run_log is not None or has_span_hooks()) else NULL_RECORDER
+    started_at = time.time()
+
+    executed: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    bucket: Optional[str] = None
+    try:
+        executed = await _run_agent_once_json(
+            user_input,
+            io=io,
+            run_id=run_id,
+            rec=rec,
+            prompt_path=prompt_path,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            schema_enabled=schema_enabled,
+            expected_steps=expected_steps,
+            strict_degraded=strict_degraded,
+            service=service,
+            plan_cache=plan_cache,
+            replan_mode=replan_mode,
+            replan_token_budget=replan_token_budget,
+            speculative_k=speculative_k,
+            fast_path=fast_path,
+            wire_format=wire_format,
+            context=context,
+            pipelined=pipelined,
+            semantic_cache=semantic_cache,
+            max_workers=max_workers,
+            plan_deadline_s=plan_deadline_s,
+            tool_cache=tool_cache,
+            checkpoint=checkpoint,
+        )
+        if record_timings:
+            annotate_meta(executed, timings=rec.to_dict())
+        with rec.span("finalize"):
+            return finalize_output(executed, debug)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        bucket = classify_exception(e)
+        raise
+    finally:
+        emit_spans(run_id, rec, error=error)
+        if run_log is not None:
+            await io.run(
+                _record_run_log,
+                run_log,
+                run_id=run_id,
+                started_at=started_at,
+                user_input=user_input,
+                prompt_version=_prompt_version(prompt_path, schema_enabled=schema_enabled, wire_format=wire_format),
+                model=_resolve_model_name(service),
+                timings=rec.to_dict(),
+                executed=executed,
+                error=error,
+                bucket=bucket,
+            )
+
+
+def _prompt_version(prompt_path: str, *, schema_enabled: bool, wire_format: str) -> Optional[str]:
+    try:
+        base_system_prompt, _, planner_addendum = _load_static_prefix(
+            prompt_path,
+            schema_enabled=schema_enabled,
+            wire_format=wire_format,
+        )
+    except OSError:
+        return None
+    return hash_text(base_system_prompt + "\n\n" + planner_addendum + "\n\n" + get_tool_catalog().text)[:12]
+
+
+def _record_run_log(
+    run_log: RunLog,
+    *,
+    run_id: str,
+    started_at: float,
+    user_input: str,
+    prompt_version: Optional[str],
+    model: Optional[str],
+    timings: Dict[str, Any],
+    executed: Optional[Dict[str, Any]],
+    error: Optional[str],
+    bucket: Optional[str],
+) -> None:
+    calls = {"planner": 0, "repair": 0, "replan": 0}
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    for sp in timings.get("spans", []):
+        if sp.get("phase") != "model_call":
+            continue
+        kind = sp.get("kind", "planner")
+        calls[kind] = calls.get(kind, 0) + 1
+        if "completion_tokens" in sp:
+            prompt_tokens = (prompt_tokens or 0) + int(sp.get("prompt_tokens") or 0)
+            completion_tokens = (completion_tokens or 0) + int(sp.get("completion_tokens") or 0)
+
+    meta: Dict[str, Any] = {}
+    if executed is not None:
+        meta = _meta_row(executed.get("execution_results")) or {}
+
     try:
-        payload1 = _parse_json_best_effort(raw1)
-        _pad_steps_to_expected(payload1, expected_steps)
-        _normalize_step_ids_inplace(payload1)
-        _fix_forward_dependencies_inplace(payload1)
+        run_log.record(
+            {
+                "run_id": run_id,
+                "started_at": started_at,
+                "prompt_version": prompt_version,
+                "model": model,
+                "input_sha256": hash_text(user_input),
+                "latency_ms": timings.get("total_ms", 0.0),
+                "planner_calls": calls["planner"],
+                "repair_calls": calls["repair"],
+                "replan_calls": calls["replan"],
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "task_status": meta.get("task_status"),
+                "bucket": bucket,
+                "plan_source": meta.get("plan_source"),
+                "error": error,
+                "timings": timings.get("totals_ms"),
+            }
+        )
+    except Exception:
+        # the run log is observability only; never fail (or mask the error of) a run because of it
+        pass
 
-    except json.JSONDecodeError:
-        _save_debug_raw("last_agent_raw_attempt1.txt", raw1)
 
+async def _run_agent_once_json(
+    user_input: str,
+    *,
+    io: Any,
+    run_id: str,
+    rec: Any,
+    prompt_path: str,
+    temperature: float,
+    max_tokens: int,
+    schema_enabled: bool,
+    expected_steps: Optional[int],
+    strict_degraded: bool,
+    service: Optional[ChatCompletionService],
+    plan_cache: Optional[PlanCache],
+    replan_mode: str,
+    replan_token_budget: int,
+    speculative_k: int,
+    fast_path: Optional[FastPathPlanner],
+    wire_format: str,
+    context: Optional[str],
+    pipelined: bool = False,
+    semantic_cache: Optional[SemanticPlanCache] = None,
+    max_workers: int = 1,
+    plan_deadline_s: Optional[float] = None,
+    tool_cache: Optional[ToolResultCache] = None,
+    checkpoint: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """
+    Body of run_agent_once_json: returns the executed payload (with __meta__ annotations),
+    before finalize_output.
+    """
+    if fast_path is not None and not context:
+        with rec.span("fast_path"):
+            match = fast_path.plan(user_input, expected_steps=expected_steps)
+        if match is not None:
+            executed = await io.execute(
+                match.plan,
+                strict_degraded,
+                max_workers=max_workers,
+                plan_deadline_s=plan_deadline_s,
+                tool_cache=tool_cache,
+                checkpoint=checkpoint,
+                run_id=run_id,
+                rec=rec,
+                attempt=0,
+            )
+            if not _needs_replan(executed):
+                annotate_meta(executed, plan_source="fast_path", fast_path_rule=match.rule, run_id=run_id)
+                return executed
+            # rule plan did not complete: let the LLM planner handle this input
+            fast_path.record_fallback(match.rule)
+
+    with rec.span("prompt_load"):
+        base_system_prompt, schema_addendum, planner_addendum = _load_static_prefix(
+            prompt_path,
+            schema_enabled=schema_enabled,
+            wire_format=wire_format,
+        )
+        tool_catalog = get_tool_catalog().text
+
+    cache_key: Optional[str] = None
+    if plan_cache is not None:
+        cache_key = make_plan_cache_key(
+            user_input,
+            system_prompt=base_system_prompt + "\n\n" + planner_addendum + "\n\n" + tool_catalog,
+            schema_enabled=schema_enabled,
+            expected_steps=expected_steps,
+            model=_resolve_model_name(service),
+            context=context,
+        )
+        with rec.span("plan_cache_lookup"):
+            cached_plan = await io.run(plan_cache.get, cache_key)
+        if cached_plan is not None:
+            executed = await io.execute(
+                cached_plan,
+                strict_degraded,
+                max_workers=max_workers,
+                plan_deadline_s=plan_deadline_s,
+                tool_cache=tool_cache,
+                checkpoint=checkpoint,
+                run_id=run_id,
+                rec=rec,
+                attempt=0,
+            )
+            if not _needs_replan(executed):
+                annotate_meta(executed, plan_source="plan_cache", run_id=run_id)
+                return executed
+            # stale plan (tools/semantics changed): drop it and plan again
+            await io.run(plan_cache.invalidate, cache_key)
+
+    semantic_scope = ""
+    semantic_vector: Optional[List[float]] = None
+    semantic_match = None
+    if semantic_cache is not None:
+        semantic_scope = make_plan_scope_key(
+            system_prompt=base_system_prompt + "\n\n" + planner_addendum + "\n\n" + tool_catalog,
+            schema_enabled=schema_enabled,
+            expected_steps=expected_steps,
+            model=_resolve_model_name(service),
+            context=context,
+        )
+        with rec.span("semantic_cache_lookup"):
+            semantic_vector = await io.run(semantic_cache.embed, user_input)
+            if semantic_vector is not None:
+                semantic_match = semantic_cache.lookup(
+                    semantic_vector,
+                    scope=semantic_scope,
+                    user_input=user_input,
+                    plan_ok=lambda p: not get_tool_catalog().unknown_tools(p),
+                )
+        if semantic_match is not None and semantic_cache.usable(semantic_match):
+            executed = await io.execute(
+                semantic_match.plan,
+                strict_degraded,
+                max_workers=max_workers,
+                plan_deadline_s=plan_deadline_s,
+                tool_cache=tool_cache,
+                checkpoint=checkpoint,
+                run_id=run_id,
+                rec=rec,
+                attempt=0,
+            )
+            completed = semantic_cache.record_outcome(
+                semantic_match, ok=not _needs_replan(executed), user_input=user_input
+            )
+            if completed:
+                annotate_meta(
+                    executed,
+                    plan_source="semantic_cache",
+                    semantic_similarity=round(semantic_match.similarity, 4),
+                    run_id=run_id,
+                )
+                return executed
+            # false reuse (failed, or answered the neighbour's question): plan again
+            semantic_match = None
+
+    async def _repair(broken_text: str, *, wrap_json_error: bool) -> CompiledPlan:
         repair_messages = _build_repair_messages(
             base_system_prompt=base_system_prompt,
             schema_addendum=schema_addendum,
             user_input=user_input,
-            broken_text=raw1,
+            broken_text=broken_text,
             expected_steps=expected_steps,
+            context=context,
+            tool_catalog=tool_catalog,
         )
-        raw2 = _call_model(
+        raw2 = await io.call_model(
             repair_messages,
             temperature=0.0,
             max_tokens=max_tokens,
             service=service,
+            rec=rec,
+            attempt=2,
+            kind="repair",
         )
-        _save_debug_raw("last_agent_raw_attempt2.txt", raw2)
+        saved_to = _save_debug_raw(run_id, "raw_attempt2.txt", raw2)
 
         try:
-            payload2 = _parse_json_best_effort(raw2)
-            _pad_steps_to_expected(payload2, expected_steps)
-            _normalize_step_ids_inplace(payload2)
-            _fix_forward_dependencies_inplace(payload2)
+            compiled2 = _prepare_plan(raw2, expected_steps, rec=rec, attempt=2)
         except json.JSONDecodeError as e2:
+            if not wrap_json_error:
+                raise
             preview = (raw2 or "")[:200].replace("\n", "\\n")
             raise ValueError(
                 f"Repair output is still not valid JSON: {e2}. Raw preview: {preview} "
-                f"(saved to docs-private/_debug/last_agent_raw_attempt2.txt)"
+                f"(saved to {saved_to or 'nowhere: debug capture skipped'})"
             ) from e2
 
         # Validate repaired payload; fail-fast if still invalid (no loops)
-        validate_payload(payload2)
-        _enforce_expected_steps(payload2, expected_steps)
+        _check_plan(compiled2, rec=rec, attempt=2)
+        return compiled2
+
+    async def _first_attempt(raw1: str) -> Tuple[CompiledPlan, int]:
+        """
+        Parse + validate attempt #1; repair once on invalid JSON or step_id contract errors.
+        Returns (validated plan, number of planner calls used).
+        """
+        # Parse attempt #1; if JSON invalid -> repair once
+        try:
+            compiled1 = _prepare_plan(raw1, expected_steps, rec=rec, attempt=1)
+        except json.JSONDecodeError:
+            _save_debug_raw(run_id, "raw_attempt1.txt", raw1)
+            return await _repair(raw1, wrap_json_error=True), 2
 
-        payload2 = execute_plan(payload2)
+        # Validate attempt #1; if step_id contract fails -> repair once
+        try:
+            _check_plan(compiled1, rec=rec, attempt=1)
+        except ValueError as e:
+            if not _needs_repair_due_to_validation(e):
+                raise
+            _save_debug_raw(run_id, "raw_attempt1.txt", raw1)
+            return await _repair(json.dumps(compiled1.payload, ensure_ascii=False, indent=2), wrap_json_error=False), 2
 
-        # ✅ strict-degraded gate (treat as PARTIAL and trigger replan once)
-        if strict_degraded and _has_degraded_steps(payload2):
-            _mark_meta_as_partial_due_to_degraded(payload2)
+        return compiled1, 1
 
-        # ✅ execution loop (replan once on FAILED/BLOCKED/PARTIAL)
-        status2 = _get_task_status_from_execution_results(payload2)
-        if status2 in ("FAILED", "BLOCKED", "PARTIAL"):
-            replan_messages = _build_replan_messages(
-                base_system_prompt=base_system_prompt,
-                schema_addendum=schema_addendum,
-                user_input=user_input,
-                last_payload=payload2,
-                expected_steps=expected_steps,
-            )
-            raw3 = _call_model(
-                replan_messages,
-                temperature=0.0,
-                max_tokens=max_tokens,
-                service=service,
-            )
-            _save_debug_raw("last_agent_raw_replan_attempt3.txt", raw3)
+    # ---- Attempt #1 ----
+    messages_1: List[Dict[str, str]] = [{"role": "system", "content": base_system_prompt}]
+    if planner_addendum:
+        messages_1.append({"role": "system", "content": planner_addendum})
+    messages_1.extend(_tool_catalog_message(tool_catalog))
+    messages_1.extend(_context_message(context))
+    messages_1.append({"role": "user", "content": user_input.strip()})
 
-            payload3 = _parse_json_best_effort(raw3)
-            _pad_steps_to_expected(payload3, expected_steps)
-            _normalize_step_ids_inplace(payload3)
-            _fix_forward_dependencies_inplace(payload3)
-            validate_payload(payload3)
-            _enforce_expected_steps(payload3, expected_steps)
+    backups: List[CompiledPlan] = []
+    speculative_meta: Dict[str, Any] = {}
+    pipelined_call: Optional[_PipelinedCall] = None
+    keep_snapshot = plan_cache is not None or semantic_cache is not None
+
+    if speculative_k > 1:
+        if service is None:
+            service = ChatCompletionService()  # one client shared by all candidates
+        race = await io.race(
+            messages_1,
+            k=speculative_k,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            service=service,
+            expected_steps=expected_steps,
+            rec=rec,
+        )
+        backups = race.backups
+        speculative_meta = {"speculative_k": speculative_k, "speculative_winner": race.winner_index}
+        if race.plan is not None:
+            compiled, attempt = race.plan, 1
+        else:
+            # no candidate passed the dry check: fall back to the normal repair path
+            compiled, attempt = await _first_attempt(race.first_raw)
+    elif pipelined and callable(getattr(service or ChatCompletionService, "create_stream", None)):
+        if service is None:
+            service = ChatCompletionService()
+        pipelined_call = await io.stream_pre_execute(
+            messages_1,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            service=service,
+            rec=rec,
+            tool_cache=tool_cache,
+            plan_deadline_s=plan_deadline_s,
+        )
+        if not pipelined_call.raw:
+            raise ValueError("Model output is empty. Check API key/base_url/model, or prompt constraints.")
+
+        # whole-plan parse / repair / validation still decides what runs
+        compiled, attempt = await _first_attempt(pipelined_call.raw)
+    else:
+        raw1 = await io.call_model(
+            messages_1,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            service=service,
+            rec=rec,
+            attempt=1,
+        )
 
-            payload3 = execute_plan(payload3)
+        if not raw1 or not raw1.strip():
+            raise ValueError("Model output is empty. Check API key/base_url/model, or prompt constraints.")
+
+        compiled, attempt = await _first_attempt(raw1)
+
+    plan = compiled.payload
+    plan_snapshot = copy.deepcopy(plan) if keep_snapshot else None
+    if pipelined_call is not None:
+        executed = await io.execute(
+            plan,
+            strict_degraded,
+            reuse_from={"execution_results": pipelined_call.pre_results},
+            index=compiled.index,
+            max_workers=max_workers,
+            plan_deadline_s=plan_deadline_s,
+            tool_cache=tool_cache,
+            checkpoint=checkpoint,
+            run_id=run_id,
+            rec=rec,
+            attempt=attempt,
+        )
+        pipelined_meta = _pipeline_stats(pipelined_call, executed)
+    else:
+        executed = await io.execute(
+            plan,
+            strict_degraded,
+            index=compiled.index,
+            max_workers=max_workers,
+            plan_deadline_s=plan_deadline_s,
+            tool_cache=tool_cache,
+            checkpoint=checkpoint,
+            run_id=run_id,
+            rec=rec,
+            attempt=attempt,
+        )
 
-            # strict gate again (if still degraded, keep it visible)
-            if strict_degraded and _has_degraded_steps(payload3):
-                _mark_meta_as_partial_due_to_degraded(payload3)
+    # speculative backups already arrived: try them before paying a replan call
+    while backups and _needs_replan(executed):
+        compiled = backups.pop(0)
+        plan = compiled.payload
+        plan_snapshot = copy.deepcopy(plan) if keep_snapshot else None
+        executed = await io.execute(
+            plan,
+            strict_degraded,
+            reuse_from=executed,
+            index=compiled.index,
+            max_workers=max_workers,
+            plan_deadline_s=plan_deadline_s,
+            tool_cache=tool_cache,
+            checkpoint=checkpoint,
+            run_id=run_id,
+            rec=rec,
+            attempt=attempt,
+        )
 
-            return finalize_output(payload3, debug)
+    # ✅ execution loop (replan once on FAILED/BLOCKED/PARTIAL/TIMEOUT)
+    if _needs_replan(executed):
+        attempt += 1
+        replan_messages = _build_replan_messages(
+            base_system_prompt=base_system_prompt,
+            schema_addendum=schema_addendum,
+            user_input=user_input,
+            last_payload=executed,
+            expected_steps=expected_steps,
+            replan_mode=replan_mode,
+            token_budget=replan_token_budget,
+            context=context,
+            tool_catalog=tool_catalog,
+        )
+        raw_replan = await io.call_model(
+            replan_messages,
+            temperature=0.0,
+            max_tokens=max_tokens,
+            service=service,
+            rec=rec,
+            attempt=attempt,
+            kind="replan",
+        )
+        _save_debug_raw(run_id, f"raw_replan_attempt{attempt}.txt", raw_replan)
+
+        compiled = _prepare_plan(raw_replan, expected_steps, rec=rec, attempt=attempt)
+        _check_plan(compiled, rec=rec, attempt=attempt)
+        plan = compiled.payload
+
+        plan_snapshot = copy.deepcopy(plan) if keep_snapshot else None
+        # strict gate again (if still degraded, keep it visible);
+        # unchanged steps from the failed attempt are carried forward, not re-executed
+        executed = await io.execute(
+            plan,
+            strict_degraded,
+            reuse_from=executed,
+            index=compiled.index,
+            max_workers=max_workers,
+            plan_deadline_s=plan_deadline_s,
+            tool_cache=tool_cache,
+            checkpoint=checkpoint,
+            run_id=run_id,
+            rec=rec,
+            attempt=attempt,
+        )
 
-        return finalize_output(payload2, debug)
+    if plan_cache is not None and cache_key is not None and plan_snapshot is not None:
+        if not _needs_replan(executed):
+            await io.run(plan_cache.put, cache_key, plan_snapshot)
+
+    if semantic_cache is not None and semantic_vector is not None and plan_snapshot is not None:
+        if not _needs_replan(executed):
+            if semantic_match is not None and semantic_cache.shadow:
+                agree = semantic_cache.record_shadow(semantic_match, plan_snapshot)
+                annotate_meta(
+                    executed,
+                    semantic_shadow={
+                        "similarity": round(semantic_match.similarity, 4),
+                        "would_hit": semantic_match.would_hit,
+                        "agree": agree,
+                    },
+                )
+            semantic_cache.put(semantic_vector, user_input, plan_snapshot, scope=semantic_scope)
 
-    # Validate attempt #1; if step_id contract fails -> repair once
-    try:
-        validate_payload(payload1)
-        _enforce_expected_steps(payload1, expected_steps)
-    except ValueError as e:
-        if _needs_repair_due_to_validation(e):
-            _save_debug_raw("last_agent_raw_attempt1.txt", raw1)
-
-            repair_messages = _build_repair_messages(
-                base_system_prompt=base_system_prompt,
-                schema_addendum=schema_addendum,
-                user_input=user_input,
-                broken_text=json.dumps(payload1, ensure_ascii=False, indent=2),
-                expected_steps=expected_steps,
-            )
-            raw2 = _call_model(
-                repair_messages,
-                temperature=0.0,
-                max_tokens=max_tokens,
-                service=service,
-            )
-            _save_debug_raw("last_agent_raw_attempt2.txt", raw2)
+    if speculative_meta:
+        annotate_meta(executed, **speculative_meta)
+    if pipelined_call is not None:
+        annotate_meta(executed, pipelined=pipelined_meta)
+    annotate_meta(executed, plan_source="llm", run_id=run_id)
+    return executed
 
-            payload2 = _parse_json_best_effort(raw2)
-            _pad_steps_to_expected(payload2, expected_steps)
-            _normalize_step_ids_inplace(payload2)
-            _fix_forward_dependencies_inplace(payload2)
 
-            validate_payload(payload2)
-            _enforce_expected_steps(payload2, expected_steps)
+# ============================================================
+# Multi-input runner (bounded concurrency, streamed results)
+# ============================================================
 
-            payload2 = execute_plan(payload2)
+EXCEPTION_BUCKETS = (
+    "rate_limited",
+    "parse_json_failed",
+    "repair_json_failed",
+    "validator_failed",
+    "empty_output",
+    "other_exception",
+)
 
-            if strict_degraded and _has_degraded_steps(payload2):
-                _mark_meta_as_partial_due_to_degraded(payload2)
 
-            # ✅ execution loop (replan once on FAILED/BLOCKED/PARTIAL)
-            status2 = _get_task_status_from_execution_results(payload2)
-            if status2 in ("FAILED", "BLOCKED", "PARTIAL"):
-                replan_messages = _build_replan_messages(
-                    base_system_prompt=base_system_prompt,
-                    schema_addendum=schema_addendum,
-                    user_input=user_input,
-                    last_payload=payload2,
-                    expected_steps=expected_steps,
-                )
-                raw3 = _call_model(
-                    replan_messages,
-                    temperature=0.0,
-                    max_tokens=max_tokens,
-                    service=service,
-                )
-                _save_debug_raw("last_agent_raw_replan_attempt3.txt", raw3)
+def classify_exception(e: Exception) -> str:
+    """
+    Classify failures into stable buckets for repeat stats.
+    This is intentionally string-based to avoid coupling runner internals.
+    """
+    msg = str(e) or ""
+    msg_low = msg.lower()
+
+    # Rate limit / quota / permission restrictions
+    # Example seen in logs:
+    # PermissionDeniedError: Error code: 403 - RPM limit exceeded. Please complete identity verification...
+    if "rpm limit exceeded" in msg_low or "rate limit" in msg_low:
+        return "rate_limited"
+    if "error code: 403" in msg_low and ("limit" in msg_low or "rpm" in msg_low):
+        return "rate_limited"
+
+    # JSON/repair related
+    if "repair output is still not valid json" in msg_low:
+        return "repair_json_failed"
+    if "no json object found" in msg_low:
+        return "parse_json_failed"
+    if "jsondecodeerror" in msg_low:
+        return "parse_json_failed"
+    if "not valid json" in msg_low and "repair" not in msg_low:
+        return "parse_json_failed"
+
+    # validator related (contract)
+    if "plan contract validation failed" in msg_low:
+        return "validator_failed"
+    if "step_id sequence must start from step_1" in msg_low:
+        return "validator_failed"
+    if "step_id sequence must be contiguous" in msg_low:
+        return "validator_failed"
+
+    # strict-degraded related
+    if "strict degraded" in msg_low:
+        return "validator_failed"
+
+    # infra / empty output
+    if "model output is empty" in msg_low:
+        return "empty_output"
+
+    return "other_exception"
+
+
+@dataclass
+class AgentRunResult:
+    """
+    One run produced by iter_agent_runs / run_agent_many.
 
-                payload3 = _parse_json_best_effort(raw3)
-                _pad_steps_to_expected(payload3, expected_steps)
-                _normalize_step_ids_inplace(payload3)
-                _fix_forward_dependencies_inplace(payload3)
+    - payload is set on success (the finalize_output result), error/bucket on exception.
+    - latency_ms is wall time of the whole run_agent_once_json call.
+    """
+    index: int
+    user_input: str
+    latency_ms: float
+    payload: Optional[Dict[str, Any]] = None
+    task_status: Optional[str] = None
+    error: Optional[str] = None
+    bucket: Optional[str] = None
 
-                validate_payload(payload3)
-                _enforce_expected_steps(payload3, expected_steps)
 
-                payload3 = execute_plan(payload3)
+@dataclass
+class AgentManyReport:
+    """
+    Aggregate of a run_agent_many batch.
 
-                if strict_degraded and _has_degraded_steps(payload3):
-                    _mark_meta_as_partial_due_to_degraded(payload3)
+    - stats: same buckets as the repeat CLI (task_status counts + exception buckets)
+    - latency_ms: p50/p90/p95/p99/max/mean over all finished runs
+    """
+    stats: Dict[str, int]
+    latency_ms: Dict[str, float]
+    stopped_early: bool = False
+    last_result: Optional[AgentRunResult] = None
+
+
+def _new_many_stats() -> Dict[str, int]:
+    stats: Dict[str, int] = {
+        "total_runs": 0,
+        "effective_runs": 0,  # excluding rate_limited runs
+        "success_runs": 0,
+        "exception_runs": 0,
+        "execution_failed_runs": 0,
+        "execution_blocked_runs": 0,
+        "execution_completed_runs": 0,
+        "execution_partial_runs": 0,
+        "execution_timeout_runs": 0,
+    }
+    for b in EXCEPTION_BUCKETS:
+        stats[b] = 0
+    return stats
 
-                return finalize_output(payload3, debug)
 
-            return finalize_output(payload2, debug)
+def _record_run(stats: Dict[str, int], r: AgentRunResult) -> None:
+    stats["total_runs"] += 1
 
-        raise
+    if r.bucket is not None:
+        stats["exception_runs"] += 1
+        stats[r.bucket] = stats.get(r.bucket, 0) + 1
+        # Do NOT count rate-limited runs as effective samples
+        if r.bucket != "rate_limited":
+            stats["effective_runs"] += 1
+        return
 
-    # attempt #1 ok -> execute
-    payload1 = execute_plan(payload1)
+    stats["effective_runs"] += 1
+    if r.task_status == "COMPLETED":
+        stats["execution_completed_runs"] += 1
+        stats["success_runs"] += 1
+    elif r.task_status == "FAILED":
+        stats["execution_failed_runs"] += 1
+    elif r.task_status == "BLOCKED":
+        stats["execution_blocked_runs"] += 1
+    elif r.task_status == "PARTIAL":
+        stats["execution_partial_runs"] += 1
+    elif r.task_status == "TIMEOUT":
+        stats["execution_timeout_runs"] += 1
+    else:
+        # No meta row: still count as success (no exception)
+        stats["success_runs"] += 1
+
+
+def _get_task_status_from_output(out: Dict[str, Any]) -> Optional[str]:
+    """
+    task_status from either a full payload (__meta__) or a finalize_output summary.
+    """
+    status = _get_task_status_from_execution_results(out)
+    if status is not None:
+        return status
+    v = out.get("task_status")
+    return v if isinstance(v, str) else None
 
-    if strict_degraded and _has_degraded_steps(payload1):
-        _mark_meta_as_partial_due_to_degraded(payload1)
 
-    # ✅ execution loop (replan once on FAILED/BLOCKED/PARTIAL)
-    status1 = _get_task_status_from_execution_results(payload1)
-    if status1 in ("FAILED", "BLOCKED", "PARTIAL"):
-        replan_messages = _build_replan_messages(
-            base_system_prompt=base_system_prompt,
-            schema_addendum=schema_addendum,
+def _run_one(index: int, user_input: str, run_kwargs: Dict[str, Any]) -> AgentRunResult:
+    started = time.perf_counter()
+    try:
+        payload = run_agent_once_json(user_input, **run_kwargs)
+    except Exception as e:
+        return AgentRunResult(
+            index=index,
             user_input=user_input,
-            last_payload=payload1,
-            expected_steps=expected_steps,
+            latency_ms=(time.perf_counter() - started) * 1000.0,
+            error=f"{type(e).__name__}: {e}",
+            bucket=classify_exception(e),
         )
-        raw2 = _call_model(
-            replan_messages,
-            temperature=0.0,
-            max_tokens=max_tokens,
-            service=service,
-        )
-        _save_debug_raw("last_agent_raw_replan_attempt2.txt", raw2)
+    return AgentRunResult(
+        index=index,
+        user_input=user_input,
+        latency_ms=(time.perf_counter() - started) * 1000.0,
+        payload=payload,
+        task_status=_get_task_status_from_output(payload),
+    )
+
+
+def iter_agent_runs(
+    inputs: Iterable[str],
+    *,
+    concurrency: int = 4,
+    stop_on_rate_limit: bool = False,
+    submit_interval_s: float = 0.0,
+    **run_kwargs: Any,
+) -> Iterator[AgentRunResult]:
+    """
+    Run run_agent_once_json over inputs on a bounded thread pool.
 
-        payload2 = _parse_json_best_effort(raw2)
-        _pad_steps_to_expected(payload2, expected_steps)
-        _normalize_step_ids_inplace(payload2)
-        _fix_forward_dependencies_inplace(payload2)
+    - At most `concurrency` runs are in flight; results are yielded as they complete.
+    - All runs share one ChatCompletionService (created once unless `service` is given).
+    - stop_on_rate_limit: stop submitting new runs after the first rate-limited result
+      (in-flight runs still finish and are yielded).
+    - submit_interval_s: minimum spacing between submissions (simple client-side pacing).
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be >= 1")
+
+    if run_kwargs.get("service") is None:
+        run_kwargs["service"] = ChatCompletionService()
+
+    pending_inputs = iter(enumerate(inputs, start=1))
+    in_flight: set = set()
+    stop = False
+    last_submit = 0.0
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="agent-run") as pool:
+
+        def _submit_next() -> bool:
+            nonlocal last_submit
+            nxt = next(pending_inputs, None)
+            if nxt is None:
+                return False
+            if submit_interval_s > 0 and last_submit:
+                wait_s = submit_interval_s - (time.monotonic() - last_submit)
+                if wait_s > 0:
+                    time.sleep(wait_s)
+            last_submit = time.monotonic()
+            in_flight.add(pool.submit(_run_one, nxt[0], nxt[1], run_kwargs))
+            return True
 
-        validate_payload(payload2)
-        _enforce_expected_steps(payload2, expected_steps)
+        while len(in_flight) < concurrency and _submit_next():
+            pass
 
-        payload2 = execute_plan(payload2)
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for fut in done:
+                in_flight.discard(fut)
+                result = fut.result()
+                if stop_on_rate_limit and result.bucket == "rate_limited":
+                    stop = True
+                yield result
+            while not stop and len(in_flight) < concurrency and _submit_next():
+                pass
 
-        if strict_degraded and _has_degraded_steps(payload2):
-            _mark_meta_as_partial_due_to_degraded(payload2)
 
-        return finalize_output(payload2, debug)
+def run_agent_many(
+    inputs: Iterable[str],
+    *,
+    concurrency: int = 4,
+    on_result: Optional[Callable[[AgentRunResult], None]] = None,
+    stop_on_rate_limit: bool = False,
+    submit_interval_s: float = 0.0,
+    **run_kwargs: Any,
+) -> AgentManyReport:
+    """
+    Run many agent requests concurrently and aggregate repeat-style stats.
 
-    return finalize_output(payload1, debug)
+    - on_result is called for each run as soon as it completes (completion order).
+    - run_kwargs are forwarded to run_agent_once_json (debug, expected_steps, plan_cache, ...).
+    """
+    stats = _new_many_stats()
+    latencies: List[float] = []
+    last: Optional[AgentRunResult] = None
+
+    inputs_list = list(inputs)
+    for r in iter_agent_runs(
+        inputs_list,
+        concurrency=concurrency,
+        stop_on_rate_limit=stop_on_rate_limit,
+        submit_interval_s=submit_interval_s,
+        **run_kwargs,
+    ):
+        _record_run(stats, r)
+        latencies.append(r.latency_ms)
+        last = r
+        if on_result is not None:
+            on_result(r)
+
+    return AgentManyReport(
+        stats=stats,
+        latency_ms=summarize_latencies(latencies),
+        stopped_early=stats["total_runs"] < len(inputs_list),
+        last_result=last,
+    )
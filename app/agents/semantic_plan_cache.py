@@ -0,0 +1,413 @@
+from __future__ import annotations
+# Module: agent_orchestration (semantic plan cache)
+# Boundary: do NOT import app.tools/* or plan_executor; this only stores validated plans
+# See: docs/architecture/modules.md
+
+import copy
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+Vector = List[float]
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_NUMBER_RE = re.compile(r"\d+(?:[.,:/-]\d+)*")
+_QUOTED_RE = re.compile(r"[\"“”「」『』]([^\"“”「」『』]+)[\"“”「」『』]")
+_WORD_RE = re.compile(r"[^\W\d_][\w'-]*", re.UNICODE)
+
+DEFAULT_CALIBRATION_THRESHOLDS = (0.75, 0.8, 0.85, 0.9, 0.95)
+
+
+def normalize_semantic_input(text: str) -> str:
+    """
+    Normalize user input before embedding: casefold, drop punctuation, collapse whitespace.
+
+    (Exact plan cache keys keep case on purpose; similarity matching does not need it.)
+    """
+    return " ".join(_TOKEN_RE.findall((text or "").casefold()))
+
+
+def input_slots(text: str) -> frozenset[str]:
+    """
+    The parts of an input a plan's tool args are usually copied from: numbers, quoted spans and
+    capitalized words (named entities; the first word is skipped, it is capitalized anyway).
+    Casefolded. Two inputs with different slots need different args even if they embed alike
+    ("... France in 2020" vs "... France in 2021").
+    """
+    raw = text or ""
+    slots = {m.casefold() for m in _NUMBER_RE.findall(raw)}
+    slots |= {f'"{q.strip().casefold()}"' for q in _QUOTED_RE.findall(raw) if q.strip()}
+    for i, m in enumerate(_WORD_RE.finditer(raw)):
+        word = m.group(0)
+        if i > 0 and any(ch.isupper() for ch in word):
+            slots.add(word.casefold())
+    return frozenset(slots)
+
+
+def _arg_strings(plan: Dict[str, Any]) -> List[str]:
+    out: List[str] = []
+
+    def walk(value: Any) -> None:
+        if isinstance(value, str):
+            if not value.startswith("$"):
+                out.append(value)
+        elif isinstance(value, dict):
+            for v in value.values():
+                walk(v)
+        elif isinstance(value, list):
+            for v in value:
+                walk(v)
+
+    for s in plan.get("steps") or []:
+        if isinstance(s, dict):
+            tool = s.get("tool")
+            walk(tool.get("args") if isinstance(tool, dict) else s.get("args"))
+    return out
+
+
+def args_fit_input(plan: Dict[str, Any], planned_for: str, user_input: str) -> bool:
+    """
+    Whether a plan made for planned_for can serve user_input unchanged:
+
+    - both inputs have the same input_slots(), and
+    - every arg token the plan copied from planned_for (a word of an arg string found in that
+      input) also occurs in user_input.
+
+    Conservative on purpose: a false "no" costs one LLM plan, a false "yes" runs the wrong search.
+    """
+    if input_slots(planned_for) != input_slots(user_input):
+        return False
+    old = normalize_semantic_input(planned_for)
+    new = normalize_semantic_input(user_input)
+    for text in _arg_strings(plan):
+        for token in _TOKEN_RE.findall(text.casefold()):
+            if token in old and token not in new:
+                return False
+    return True
+
+
+class HashingEmbedder:
+    """
+    Local zero-dependency embedder (feature hashing of words + character trigrams).
+
+    Lexical, not semantic: it scores "... France in 2020" vs "... in 2021" above most paraphrases,
+    so it is meant for shadow mode and offline runs; reuse plans with an embedding model
+    (app.services.embedding_service.EmbeddingService).
+    """
+
+    def __init__(self, dim: int = 512) -> None:
+        if dim < 8:
+            raise ValueError("dim must be >= 8")
+        self.dim = dim
+
+    def _bucket(self, feature: str) -> Tuple[int, float]:
+        h = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        n = int.from_bytes(h, "little")
+        return n % self.dim, (1.0 if (n >> 63) & 1 else -1.0)
+
+    def embed(self, texts: List[str]) -> List[Vector]:
+        out: List[Vector] = []
+        for text in texts:
+            vec = [0.0] * self.dim
+            words = text.split()
+            features = [f"w:{w}" for w in words]
+            padded = f" {text} "
+            features += [f"c:{padded[i:i + 3]}" for i in range(max(0, len(padded) - 2))]
+            for f in features:
+                idx, sign = self._bucket(f)
+                vec[idx] += sign
+            out.append(vec)
+        return out
+
+
+def _unit(vec: Sequence[float]) -> Vector:
+    norm = math.sqrt(sum(x * x for x in vec))
+    if norm == 0:
+        return [0.0] * len(vec)
+    return [x / norm for x in vec]
+
+
+def _dot(a: Sequence[float], b: Sequence[float]) -> float:
+    return sum(x * y for x, y in zip(a, b))
+
+
+def plan_signature(plan: Dict[str, Any]) -> str:
+    """
+    What a plan does, ignoring prose: (tool, args, dependencies) per step.
+    Two plans with the same signature execute identically.
+    """
+    steps = []
+    for s in plan.get("steps") or []:
+        if not isinstance(s, dict):
+            continue
+        tool = s.get("tool")
+        name = tool.get("name") if isinstance(tool, dict) else tool
+        args = tool.get("args") if isinstance(tool, dict) else s.get("args")
+        steps.append([name, args or {}, s.get("dependencies") or []])
+    return json.dumps(steps, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+@dataclass
+class _Entry:
+    entry_id: int
+    scope: str
+    user_input: str
+    raw_input: str
+    vector: Vector
+    plan: Dict[str, Any]
+    stored_at: float
+
+
+@dataclass(frozen=True)
+class SemanticMatch:
+    """
+    Nearest cached plan for an input.
+
+    would_hit: similarity passed the threshold (in shadow mode the plan is not used).
+    """
+    entry_id: int
+    plan: Dict[str, Any]
+    similarity: float
+    matched_input: str
+    would_hit: bool
+
+
+class SemanticPlanCache:
+    """
+    Validated-plan cache matched by input similarity (small in-memory vector index).
+
+    - Inputs are normalized (normalize_semantic_input) and embedded with embedder.embed(texts).
+    - Entries are partitioned by scope (prompt / schema / expected_steps / model / context, see
+      make_plan_scope_key), so a plan is only reused under the setup that produced it.
+    - lookup() returns the nearest entry in scope; it is a hit when cosine similarity >= threshold,
+      plan_ok(plan) accepts it (e.g. every tool still exists in the registry) and its args fit the
+      new input (args_fit_input: same numbers / quoted spans / names, counted as arg_mismatch).
+    - Index: brute-force cosine over unit vectors; LRU bounded by max_entries, TTL per entry.
+
+    Metrics (stats()):
+    - hit_rate: hits / lookups.
+    - false_reuse: reused plans that did not complete, or completed with args that do not fit the
+      input (record_outcome); such entries are dropped. false_reuse_rate = false_reuse / hits.
+
+    shadow=True (threshold calibration): lookups never return a usable plan; the caller plans as
+    usual and calls record_shadow(match, plan). A would-be hit whose plan signature differs from the
+    fresh plan counts as shadow_false_reuse; calibration() reports hit rate / false-reuse rate per
+    candidate threshold over the recorded comparisons.
+
+    Without an embedder the local HashingEmbedder is used and shadow defaults to True: lexical
+    similarity alone must not pick the plan that runs. shadow=False then needs an explicit embedder.
+    """
+
+    def __init__(
+        self,
+        embedder: Optional[Any] = None,
+        *,
+        threshold: float = 0.9,
+        max_entries: int = 256,
+        ttl_seconds: Optional[float] = 3600.0,
+        shadow: Optional[bool] = None,
+        max_shadow_samples: int = 1000,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("threshold must be in (0, 1]")
+        if embedder is None and shadow is False:
+            raise ValueError("reusing plans (shadow=False) needs an explicit embedder, e.g. EmbeddingService()")
+        self.embedder = embedder if embedder is not None else HashingEmbedder()
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.shadow = (embedder is None) if shadow is None else shadow
+        self.max_shadow_samples = max_shadow_samples
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._next_id = 0
+        self._shadow_samples: List[Tuple[float, bool]] = []
+        self._stats: Dict[str, int] = {
+            "lookups": 0,
+            "hits": 0,
+            "misses": 0,
+            "below_threshold": 0,
+            "rejected_plans": 0,
+            "arg_mismatch": 0,
+            "false_reuse": 0,
+            "evictions": 0,
+            "expired": 0,
+            "shadow_compared": 0,
+            "shadow_would_hit": 0,
+            "shadow_false_reuse": 0,
+            "embed_errors": 0,
+        }
+
+    def embed(self, user_input: str) -> Optional[Vector]:
+        """
+        Unit vector of the normalized input (embed once, pass it to lookup() and put()).
+
+        None when the embedder fails: the cache is an optimization and must not fail a run.
+        """
+        try:
+            vec = self.embedder.embed([normalize_semantic_input(user_input)])[0]
+        except Exception:
+            with self._lock:
+                self._stats["embed_errors"] += 1
+            return None
+        return _unit(vec)
+
+    def lookup(
+        self,
+        vector: Vector,
+        *,
+        scope: str,
+        user_input: str,
+        plan_ok: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    ) -> Optional[SemanticMatch]:
+        """
+        Nearest entry in scope for user_input (embedded as vector), or None when the scope has no
+        entries.
+
+        Returns a match with would_hit=False for below-threshold neighbours (so shadow mode can
+        record them); callers must only use match.plan when usable(match) is True.
+        """
+        best: Optional[_Entry] = None
+        best_sim = -1.0
+        with self._lock:
+            self._stats["lookups"] += 1
+            now = self._clock()
+            for entry_id in list(self._entries):
+                entry = self._entries[entry_id]
+                if self.ttl_seconds is not None and (now - entry.stored_at) > self.ttl_seconds:
+                    del self._entries[entry_id]
+                    self._stats["expired"] += 1
+                    continue
+                if entry.scope != scope:
+                    continue
+                sim = _dot(vector, entry.vector)
+                if sim > best_sim:
+                    best, best_sim = entry, sim
+
+            if best is None:
+                self._stats["misses"] += 1
+                return None
+            would_hit = best_sim >= self.threshold
+            if not would_hit:
+                self._stats["below_threshold"] += 1
+            plan = copy.deepcopy(best.plan)
+
+        if would_hit and plan_ok is not None and not plan_ok(plan):
+            with self._lock:
+                self._stats["rejected_plans"] += 1
+                self._entries.pop(best.entry_id, None)
+            would_hit = False
+
+        if would_hit and not args_fit_input(plan, best.raw_input, user_input):
+            with self._lock:
+                self._stats["arg_mismatch"] += 1
+            would_hit = False
+
+        with self._lock:
+            if would_hit and not self.shadow:
+                self._stats["hits"] += 1
+                if best.entry_id in self._entries:
+                    self._entries.move_to_end(best.entry_id)
+            else:
+                self._stats["misses"] += 1
+        return SemanticMatch(
+            entry_id=best.entry_id,
+            plan=plan,
+            similarity=best_sim,
+            matched_input=best.raw_input,
+            would_hit=would_hit,
+        )
+
+    def usable(self, match: Optional[SemanticMatch]) -> bool:
+        """
+        True when match.plan may be executed (a hit, outside shadow mode).
+        """
+        return match is not None and match.would_hit and not self.shadow
+
+    def put(self, vector: Vector, user_input: str, plan: Dict[str, Any], *, scope: str) -> None:
+        with self._lock:
+            self._next_id += 1
+            self._entries[self._next_id] = _Entry(
+                entry_id=self._next_id,
+                scope=scope,
+                user_input=normalize_semantic_input(user_input),
+                raw_input=user_input,
+                vector=list(vector),
+                plan=copy.deepcopy(plan),
+                stored_at=self._clock(),
+            )
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def record_outcome(self, match: SemanticMatch, *, ok: bool, user_input: str) -> bool:
+        """
+        Outcome of executing a reused plan for user_input. It is a false reuse when the plan did not
+        complete, or completed with args that do not fit user_input (the run answered a different
+        question). Returns True when the reuse was good.
+        """
+        if ok and args_fit_input(match.plan, match.matched_input, user_input):
+            return True
+        with self._lock:
+            self._stats["false_reuse"] += 1
+            self._entries.pop(match.entry_id, None)
+        return False
+
+    def record_shadow(self, match: SemanticMatch, plan: Dict[str, Any]) -> bool:
+        """
+        Compare the cached neighbour with the freshly planned plan; returns True if they agree.
+        """
+        agree = plan_signature(match.plan) == plan_signature(plan)
+        with self._lock:
+            self._stats["shadow_compared"] += 1
+            if match.would_hit:
+                self._stats["shadow_would_hit"] += 1
+                if not agree:
+                    self._stats["shadow_false_reuse"] += 1
+            self._shadow_samples.append((match.similarity, agree))
+            if len(self._shadow_samples) > self.max_shadow_samples:
+                self._shadow_samples.pop(0)
+        return agree
+
+    def calibration(self, thresholds: Sequence[float] = DEFAULT_CALIBRATION_THRESHOLDS) -> List[Dict[str, Any]]:
+        """
+        Per candidate threshold over the shadow comparisons: would-be hit rate and false-reuse rate.
+        """
+        with self._lock:
+            samples = list(self._shadow_samples)
+        out: List[Dict[str, Any]] = []
+        for t in thresholds:
+            hits = [agree for sim, agree in samples if sim >= t]
+            false_reuse = sum(1 for agree in hits if not agree)
+            out.append(
+                {
+                    "threshold": t,
+                    "samples": len(samples),
+                    "hit_rate": (len(hits) / len(samples)) if samples else 0.0,
+                    "false_reuse_rate": (false_reuse / len(hits)) if hits else 0.0,
+                }
+            )
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._stats)
+            out["size"] = len(self._entries)
+            out["threshold"] = self.threshold
+            out["shadow"] = self.shadow
+        lookups = out["lookups"]
+        out["hit_rate"] = (out["hits"] / lookups) if lookups else 0.0
+        out["false_reuse_rate"] = (out["false_reuse"] / out["hits"]) if out["hits"] else 0.0
+        would = out["shadow_would_hit"]
+        out["shadow_false_reuse_rate"] = (out["shadow_false_reuse"] / would) if would else 0.0
+        return out
@@ -0,0 +1,239 @@
+from __future__ import annotations
+# Module: agent_orchestration (multi-turn sessions)
+# Boundary: do NOT import app.tools/* or plan_executor; sessions only wrap run_agent_once_json
+# See: docs/architecture/modules.md
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from app.agents.runner import annotate_meta, finalize_output, run_agent_once_json
+from app.agents.token_budget import dumps_compact, estimate_tokens, truncate_json_value, truncate_text
+
+_CONTEXT_HEADER = (
+    "Conversation context (earlier turns of this session; use it to resolve references such as "
+    "\"that\" or \"the previous results\"; plan only for the current user message):"
+)
+
+
+@dataclass
+class SessionTurn:
+    user_input: str
+    task_summary: str
+    task_status: str
+    result: Any
+
+    def to_context(self, *, input_chars: int, result_chars: int) -> Dict[str, Any]:
+        return {
+            "user": truncate_text(self.user_input, input_chars),
+            "plan": truncate_text(self.task_summary, input_chars),
+            "status": self.task_status,
+            "result": truncate_json_value(self.result, result_chars),
+        }
+
+    def to_summary_line(self, *, chars: int) -> str:
+        result = dumps_compact(truncate_json_value(self.result, chars))
+        return truncate_text(f"{self.user_input} -> {self.task_status}: {result}", chars * 2)
+
+
+@dataclass
+class AgentSession:
+    """
+    Bounded conversation state for one session.
+
+    - The last keep_recent turns are kept verbatim (bounded per field).
+    - Older turns are folded into one-line summaries; when the rendered context exceeds
+      token_budget, the oldest summary lines are dropped (counted), then recent turns are folded.
+    - So the per-turn context stays under token_budget however long the session runs.
+    """
+    session_id: str
+    keep_recent: int = 3
+    token_budget: int = 600
+    input_chars: int = 200
+    result_chars: int = 300
+    recent: List[SessionTurn] = field(default_factory=list)
+    summary: List[str] = field(default_factory=list)
+    omitted_turns: int = 0
+    turn_count: int = 0
+    last_used: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, turn: SessionTurn) -> None:
+        self.turn_count += 1
+        self.recent.append(turn)
+        while len(self.recent) > self.keep_recent:
+            self._fold_oldest()
+        self._fit_budget()
+
+    def render_context(self) -> Optional[str]:
+        if not self.recent and not self.summary and not self.omitted_turns:
+            return None
+        return self._render()
+
+    def context_tokens(self) -> int:
+        ctx = self.render_context()
+        return estimate_tokens(ctx) if ctx else 0
+
+    def _render(self) -> str:
+        block: Dict[str, Any] = {}
+        if self.omitted_turns:
+            block["omitted_turns"] = self.omitted_turns
+        if self.summary:
+            block["earlier"] = list(self.summary)
+        block["recent"] = [
+            t.to_context(input_chars=self.input_chars, result_chars=self.result_chars) for t in self.recent
+        ]
+        return _CONTEXT_HEADER + "\n" + dumps_compact(block)
+
+    def _fold_oldest(self) -> None:
+        turn = self.recent.pop(0)
+        self.summary.append(turn.to_summary_line(chars=self.input_chars // 2))
+
+    def _fit_budget(self) -> None:
+        while estimate_tokens(self._render()) > self.token_budget:
+            if self.summary:
+                self.summary.pop(0)
+                self.omitted_turns += 1
+            elif len(self.recent) > 1:
+                self._fold_oldest()
+            else:
+                # a single recent turn over budget: keep it, bounded by the per-field limits
+                break
+
+
+def _turn_from_payload(user_input: str, payload: Dict[str, Any]) -> SessionTurn:
+    results = payload.get("execution_results") or []
+    meta: Dict[str, Any] = {}
+    result: Any = None
+    for r in results:
+        if not isinstance(r, dict):
+            continue
+        if r.get("step_id") == "__meta__":
+            meta = r
+        elif r.get("ok"):
+            result = r.get("output")
+        elif result is None:
+            result = {"step_id": r.get("step_id"), "error": r.get("error") or r.get("reason")}
+    return SessionTurn(
+        user_input=user_input.strip(),
+        task_summary=str(payload.get("task_summary") or ""),
+        task_status=str(meta.get("task_status") or "UNKNOWN"),
+        result=result,
+    )
+
+
+class SessionStore:
+    """
+    In-memory session store (LRU over sessions + idle TTL).
+
+    - get_or_create(None) starts a new session with a generated id.
+    - Sessions idle longer than idle_ttl_seconds are treated as expired and dropped.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_sessions: int = 1024,
+        idle_ttl_seconds: Optional[float] = 3600.0,
+        keep_recent: int = 3,
+        token_budget: int = 600,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if max_sessions < 1:
+            raise ValueError("max_sessions must be >= 1")
+        self.max_sessions = max_sessions
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.keep_recent = keep_recent
+        self.token_budget = token_budget
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, AgentSession]" = OrderedDict()
+        self._stats: Dict[str, int] = {"created": 0, "expired": 0, "evictions": 0}
+
+    def get(self, session_id: str) -> Optional[AgentSession]:
+        with self._lock:
+            return self._get_locked(session_id)
+
+    def get_or_create(self, session_id: Optional[str] = None) -> AgentSession:
+        """
+        Lookup and insert happen under one lock, so concurrent first turns of the same
+        session_id share one session.
+        """
+        with self._lock:
+            if session_id:
+                session = self._get_locked(session_id)
+                if session is not None:
+                    return session
+            session = AgentSession(
+                session_id=session_id or uuid.uuid4().hex,
+                keep_recent=self.keep_recent,
+                token_budget=self.token_budget,
+                last_used=self._clock(),
+            )
+            self._sessions[session.session_id] = session
+            self._stats["created"] += 1
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self._stats["evictions"] += 1
+            return session
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            out = dict(self._stats)
+            out["size"] = len(self._sessions)
+        return out
+
+    def _get_locked(self, session_id: str) -> Optional[AgentSession]:
+        # caller holds self._lock
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        if self._expired(session):
+            del self._sessions[session_id]
+            self._stats["expired"] += 1
+            return None
+        self._sessions.move_to_end(session_id)
+        session.last_used = self._clock()
+        return session
+
+    def _expired(self, session: AgentSession) -> bool:
+        if self.idle_ttl_seconds is None:
+            return False
+        return (self._clock() - session.last_used) > self.idle_ttl_seconds
+
+
+def run_session_turn(
+    store: SessionStore,
+    session_id: Optional[str],
+    user_input: str,
+    *,
+    debug: bool = False,
+    **run_kwargs: Any,
+) -> Dict[str, Any]:
+    """
+    Run one turn of a multi-turn session.
+
+    - The session's bounded context is passed to run_agent_once_json(context=...).
+    - The finished turn (input, plan summary, status, bounded result) is recorded.
+    - __meta__ gets session_id / session_turn; output shape otherwise follows finalize_output.
+
+    Turns of the same session are serialized; different sessions run independently.
+    """
+    session = store.get_or_create(session_id)
+    with session.lock:
+        payload = run_agent_once_json(
+            user_input,
+            debug=True,
+            context=session.render_context(),
+            **run_kwargs,
+        )
+        session.record(_turn_from_payload(user_input, payload))
+        annotate_meta(payload, session_id=session.session_id, session_turn=session.turn_count)
+    return finalize_output(payload, debug)
@@ -0,0 +1,126 @@
+from __future__ import annotations
+# Module: observability (shared by agent_orchestration and execution_engine)
+# Boundary: stdlib only; do NOT import runner/plan_executor/tools
+# See: docs/architecture/modules.md
+
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+SpanHook = Callable[[Dict[str, Any]], None]
+
+
+class SpanRecorder:
+    """
+    Lightweight per-run phase timer (monotonic clock).
+
+    - span(phase, attempt=..., **attrs) is a context manager; add() records a measured duration.
+    - Thread-safe (speculative planner candidates record from worker threads).
+    - to_dict() -> {"total_ms", "totals_ms": {phase: ms}, "spans": [{phase, attempt, start_ms, ms, ...}]}
+    """
+
+    enabled = True
+
+    def __init__(self) -> None:
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self._spans: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def span(self, phase: str, *, attempt: Optional[int] = None, **attrs: Any) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(phase, start, time.perf_counter(), attempt, attrs)
+
+    def add(self, phase: str, start: float, end: float, *, attempt: Optional[int] = None, **attrs: Any) -> None:
+        """
+        Record a span measured by the caller with time.perf_counter() timestamps.
+        """
+        self._record(phase, start, end, attempt, attrs)
+
+    def _record(self, phase: str, start: float, end: float, attempt: Optional[int], attrs: Dict[str, Any]) -> None:
+        entry: Dict[str, Any] = {
+            "phase": phase,
+            "start_ms": round((start - self._t0) * 1000.0, 3),
+            "ms": round((end - start) * 1000.0, 3),
+        }
+        if attempt is not None:
+            entry["attempt"] = attempt
+        if attrs:
+            entry.update(attrs)
+        with self._lock:
+            self._spans.append(entry)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = sorted(self._spans, key=lambda x: x["start_ms"])
+        totals: Dict[str, float] = {}
+        for sp in spans:
+            totals[sp["phase"]] = round(totals.get(sp["phase"], 0.0) + sp["ms"], 3)
+        return {
+            "total_ms": round((time.perf_counter() - self._t0) * 1000.0, 3),
+            "totals_ms": totals,
+            "spans": spans,
+        }
+
+
+class _NullSpanRecorder:
+    """
+    Disabled recorder: every call is a constant-time no-op.
+    """
+
+    enabled = False
+    _NULL = nullcontext()
+
+    def span(self, phase: str, *, attempt: Optional[int] = None, **attrs: Any) -> Any:
+        return self._NULL
+
+    def add(self, phase: str, start: float, end: float, *, attempt: Optional[int] = None, **attrs: Any) -> None:
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {}
+
+
+NULL_RECORDER = _NullSpanRecorder()
+
+_HOOKS: List[SpanHook] = []
+_HOOKS_LOCK = threading.Lock()
+
+
+def register_span_hook(hook: SpanHook) -> None:
+    """
+    Register a callback that receives each finished run's timings, e.g. to forward to metrics.
+
+    The hook gets {"run_id", "error", "total_ms", "totals_ms", "spans"}; exceptions are swallowed.
+    Registering any hook turns span recording on for every run.
+    """
+    with _HOOKS_LOCK:
+        if hook not in _HOOKS:
+            _HOOKS.append(hook)
+
+
+def unregister_span_hook(hook: SpanHook) -> None:
+    with _HOOKS_LOCK:
+        if hook in _HOOKS:
+            _HOOKS.remove(hook)
+
+
+def has_span_hooks() -> bool:
+    return bool(_HOOKS)
+
+
+def emit_spans(run_id: str, recorder: Any, *, error: Optional[str] = None) -> None:
+    if not recorder.enabled or not _HOOKS:
+        return
+    event = {"run_id": run_id, "error": error, **recorder.to_dict()}
+    with _HOOKS_LOCK:
+        hooks = list(_HOOKS)
+    for hook in hooks:
+        try:
+            hook(event)
+        except Exception:
+            continue
@@ -0,0 +1,55 @@
+from __future__ import annotations
+# Module: agent_orchestration (prompt budgeting helpers)
+# Boundary: stdlib only; no tokenizer dependency
+# See: docs/architecture/modules.md
+
+import json
+from typing import Any
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate without a tokenizer.
+
+    - ASCII: ~4 chars per token
+    - non-ASCII (CJK etc.): ~1 token per char
+
+    Good enough for budgeting prompt sections; not for billing.
+    """
+    if not text:
+        return 0
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    ascii_chars = len(text) - non_ascii
+    return non_ascii + (ascii_chars + 3) // 4
+
+
+def estimate_json_tokens(obj: Any) -> int:
+    return estimate_tokens(dumps_compact(obj))
+
+
+def dumps_compact(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def truncate_text(text: str, max_chars: int) -> str:
+    if max_chars <= 0:
+        return ""
+    if len(text) <= max_chars:
+        return text
+    if max_chars <= 3:
+        return text[:max_chars]
+    return text[: max_chars - 3] + "..."
+
+
+def truncate_json_value(value: Any, max_chars: int) -> Any:
+    """
+    Bound a JSON-safe value for prompt inclusion.
+
+    Small values pass through unchanged; large ones become a truncated compact-JSON string.
+    """
+    if isinstance(value, str):
+        return truncate_text(value, max_chars)
+    text = dumps_compact(value)
+    if len(text) <= max_chars:
+        return value
+    return truncate_text(text, max_chars)
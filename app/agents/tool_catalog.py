@@ -0,0 +1,137 @@
+from __future__ import annotations
+# Module: execution_engine (read-only tool catalog view for prompts)
+# Boundary: reads app.tools.registry only; do NOT import runner (runner imports this)
+# See: docs/architecture/modules.md
+
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Optional
+
+from app.tools.registry import list_tool_names, list_tools, registry_version
+
+_DESCRIPTION_CHARS = 80
+
+CATALOG_HEADER = (
+    "Available tools (use ONLY these exact tool names; args must follow the signature; * = required):"
+)
+
+
+@dataclass(frozen=True)
+class ToolCatalog:
+    """
+    Prompt-ready view of the tool registry.
+
+    - text: compact one-line-per-tool catalog (canonical names only, aliases hidden)
+    - names: canonical tool names
+    - known: every dispatchable name (canonical + compatibility aliases)
+    - version: registry version the catalog was built from
+    """
+    text: str
+    names: FrozenSet[str]
+    known: FrozenSet[str]
+    version: int
+
+    def unknown_tools(self, plan: Dict[str, Any]) -> List[str]:
+        """
+        Tool names used by plan steps that the registry cannot dispatch (in step order).
+        """
+        out: List[str] = []
+        for s in plan.get("steps") or []:
+            if not isinstance(s, dict):
+                continue
+            tool = s.get("tool")
+            name = tool.get("name") if isinstance(tool, dict) else tool
+            if isinstance(name, str) and name.strip() and name not in self.known:
+                out.append(name)
+        return out
+
+
+def _format_arg(name: str, schema: Dict[str, Any], required: bool) -> str:
+    t = schema.get("type") if isinstance(schema, dict) else None
+    out = f"{name}{'*' if required else ''}: {t or 'any'}"
+    if isinstance(schema, dict) and "default" in schema:
+        out += f"={schema['default']}"
+    return out
+
+
+def format_tool_line(spec: Dict[str, Any]) -> str:
+    schema = spec.get("args_schema") or {}
+    props = schema.get("properties") or {}
+    required = set(schema.get("required") or [])
+    args = ", ".join(_format_arg(k, v, k in required) for k, v in props.items())
+    desc = " ".join(str(spec.get("description") or "").split())
+    if len(desc) > _DESCRIPTION_CHARS:
+        desc = desc[: _DESCRIPTION_CHARS - 3] + "..."
+    return f"- {spec['name']}({args}) — {desc}" if desc else f"- {spec['name']}({args})"
+
+
+def build_tool_catalog() -> ToolCatalog:
+    specs = list_tools()
+    lines = [CATALOG_HEADER] + [format_tool_line(s) for s in specs]
+    return ToolCatalog(
+        text="\n".join(lines),
+        names=frozenset(s["name"] for s in specs),
+        known=frozenset(list_tool_names()),
+        version=registry_version(),
+    )
+
+
+_CATALOG: Optional[ToolCatalog] = None
+_CATALOG_LOCK = threading.Lock()
+
+
+def get_tool_catalog() -> ToolCatalog:
+    """
+    Cached catalog; rebuilt only when the registry changes (register / register_alias).
+    """
+    global _CATALOG
+    catalog = _CATALOG
+    if catalog is not None and catalog.version == registry_version():
+        return catalog
+    with _CATALOG_LOCK:
+        if _CATALOG is None or _CATALOG.version != registry_version():
+            _CATALOG = build_tool_catalog()
+        return _CATALOG
+
+
+class UnknownToolStats:
+    """
+    Unknown-tool rate over LLM-produced plans (each unknown-tool plan costs a replan call).
+
+    - plans: plans checked (planner, repair and replan outputs)
+    - unknown_tool_plans: plans referencing at least one tool the registry cannot dispatch
+    - tools: per-name counts of the unknown tool names seen
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._plans = 0
+        self._unknown_plans = 0
+        self._tools: Dict[str, int] = {}
+
+    def record(self, unknown: List[str]) -> None:
+        with self._lock:
+            self._plans += 1
+            if unknown:
+                self._unknown_plans += 1
+                for name in unknown:
+                    self._tools[name] = self._tools.get(name, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            plans = self._plans
+            return {
+                "plans": plans,
+                "unknown_tool_plans": self._unknown_plans,
+                "unknown_tool_rate": (self._unknown_plans / plans) if plans else 0.0,
+                "tools": dict(self._tools),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._plans = 0
+            self._unknown_plans = 0
+            self._tools = {}
+
+
+UNKNOWN_TOOL_STATS = UnknownToolStats()
@@ -1,10 +1,10 @@
 from __future__ import annotations
 
 import os
-from typing import Any, Dict, List, Optional, cast
+from typing import Any, Dict, Iterator, List, Optional, Tuple, cast
 
 import httpx
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
 
 class ChatCompletionService:
@@ -98,6 +98,8 @@ class ChatCompletionService:
             trust_env_final = False
 
         http_client = httpx.Client(timeout=timeout, trust_env=trust_env_final)
+        self._timeout = timeout
+        self._trust_env = trust_env_final
 
         # ---- retries ----
         # Default: 0 (you already have repeat runner; retries can mask rate limits)
@@ -119,6 +121,8 @@ class ChatCompletionService:
             http_client=http_client,
             max_retries=retries,
         )
+        self._max_retries = retries
+        self._async_client: Optional[AsyncOpenAI] = None
 
     def create(
         self,
@@ -132,10 +136,102 @@ class ChatCompletionService:
         The caller is responsible for providing messages.
         This service does not manage conversation state.
         """
+        text, _ = self.create_with_usage(messages, temperature=temperature, max_tokens=max_tokens)
+        return text
+
+    def create_with_usage(
+        self,
+        messages: List[Dict[str, Any]],
+        temperature: float = 0.7,
+        max_tokens: int = 512,
+    ) -> Tuple[str, Optional[Dict[str, int]]]:
+        """
+        Same as create(), plus provider-reported token usage when available:
+        {"prompt_tokens", "completion_tokens", "total_tokens"} (None if the provider omits it).
+        """
         resp = self.client.chat.completions.create(
             model=cast(str, self.model),
             messages=cast(Any, messages),
             temperature=temperature,
             max_tokens=max_tokens,
         )
-        return resp.choices[0].message.content or ""
+        return self._text_and_usage(resp)
+
+    @staticmethod
+    def _text_and_usage(resp: Any) -> Tuple[str, Optional[Dict[str, int]]]:
+        text = resp.choices[0].message.content or ""
+
+        usage = getattr(resp, "usage", None)
+        if usage is None:
+            return text, None
+        return text, {
+            "prompt_tokens": int(getattr(usage, "prompt_tokens", 0) or 0),
+            "completion_tokens": int(getattr(usage, "completion_tokens", 0) or 0),
+            "total_tokens": int(getattr(usage, "total_tokens", 0) or 0),
+        }
+
+    def create_stream(
+        self,
+        messages: List[Dict[str, Any]],
+        temperature: float = 0.7,
+        max_tokens: int = 512,
+    ) -> Iterator[str]:
+        """
+        Same request as create(), streamed: yields content deltas as they arrive.
+        Joining the deltas gives the text create() would have returned.
+        """
+        stream = self.client.chat.completions.create(
+            model=cast(str, self.model),
+            messages=cast(Any, messages),
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+        )
+        for chunk in stream:
+            choices = getattr(chunk, "choices", None)
+            if not choices:
+                continue
+            text = getattr(choices[0].delta, "content", None)
+            if text:
+                yield text
+
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """
+        AsyncOpenAI client with the same settings (created on first use).
+        Use it from one event loop: the connection pool is bound to the loop that opened it.
+        """
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                http_client=httpx.AsyncClient(timeout=self._timeout, trust_env=self._trust_env),
+                max_retries=self._max_retries,
+            )
+        return self._async_client
+
+    async def acreate(
+        self,
+        messages: List[Dict[str, Any]],
+        temperature: float = 0.7,
+        max_tokens: int = 512,
+    ) -> str:
+        text, _ = await self.acreate_with_usage(messages, temperature=temperature, max_tokens=max_tokens)
+        return text
+
+    async def acreate_with_usage(
+        self,
+        messages: List[Dict[str, Any]],
+        temperature: float = 0.7,
+        max_tokens: int = 512,
+    ) -> Tuple[str, Optional[Dict[str, int]]]:
+        """
+        Async create_with_usage (awaits the HTTP call instead of blocking a thread).
+        """
+        resp = await self.async_client.chat.completions.create(
+            model=cast(str, self.model),
+            messages=cast(Any, messages),
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
+        return self._text_and_usage(resp)
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import os
+from typing import List, Optional
+
+import httpx
+from openai import OpenAI
+
+
+class EmbeddingService:
+    """
+    Service layer for text embeddings (OpenAI-compatible /embeddings).
+
+    - Model: explicit arg, else OPENAI_EMBEDDING_MODEL.
+    - embed(texts) returns one vector per input text, in order.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        model: Optional[str] = None,
+        *,
+        timeout_seconds: float = 30.0,
+    ) -> None:
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.base_url = base_url or os.getenv("OPENAI_BASE_URL")
+        self.model = model or os.getenv("OPENAI_EMBEDDING_MODEL")
+
+        if not self.api_key:
+            raise ValueError("Missing OPENAI_API_KEY")
+        if not self.model:
+            raise ValueError("Missing OPENAI_EMBEDDING_MODEL")
+
+        self.client = OpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            http_client=httpx.Client(timeout=timeout_seconds, trust_env=False),
+            max_retries=0,
+        )
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        resp = self.client.embeddings.create(model=self.model, input=texts)
+        return [list(d.embedding) for d in resp.data]
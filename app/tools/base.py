@@ -1,10 +1,68 @@
 from __future__ import annotations
 
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from dataclasses import dataclass
-from typing import Any, Callable, Dict, Optional
+from typing import Any, Awaitable, Callable, Dict, Optional
 
 JSONSchema = Dict[str, Any]
 
+# ToolSpec.execution: where a handler runs
+EXECUTION_INLINE = "inline"
+EXECUTION_THREAD = "thread"
+EXECUTION_PROCESS = "process"
+EXECUTION_CLASSES = (EXECUTION_INLINE, EXECUTION_THREAD, EXECUTION_PROCESS)
+
+# sync calls with a time limit run on one bounded, process-wide pool: a call that ignores its
+# timeout keeps a worker busy until it returns, but abandoned calls can never pile up threads
+# (once every worker is stuck, new timed calls wait in the queue and time out there)
+MAX_TIMED_CALL_THREADS = 32
+
+_TIMED_CALL_POOL: Optional[ThreadPoolExecutor] = None
+_TIMED_CALL_POOL_LOCK = threading.Lock()
+
+_CANCEL_EVENT: contextvars.ContextVar[Optional[threading.Event]] = contextvars.ContextVar(
+    "tool_cancel_event", default=None
+)
+
+
+class ToolTimeoutError(TimeoutError):
+    """
+    A tool call exceeded its time limit (the executor turns this into a timed_out step).
+    """
+
+
+class ToolMemoryError(MemoryError):
+    """
+    A process-class tool call exceeded ToolSpec.max_memory_mb.
+    """
+
+
+class ToolCrashedError(RuntimeError):
+    """
+    The worker process running a process-class tool call died (the call is not retried).
+    """
+
+
+def _timed_call_pool() -> ThreadPoolExecutor:
+    global _TIMED_CALL_POOL
+    with _TIMED_CALL_POOL_LOCK:
+        if _TIMED_CALL_POOL is None:
+            _TIMED_CALL_POOL = ThreadPoolExecutor(max_workers=MAX_TIMED_CALL_THREADS, thread_name_prefix="tool-timed")
+        return _TIMED_CALL_POOL
+
+
+def tool_cancelled() -> bool:
+    """
+    Cooperative cancellation for sync handlers: True once the current call timed out or was
+    cancelled. Long-running handlers should poll it and return early; a thread cannot be
+    interrupted, so a handler that never checks keeps running in the background.
+    """
+    event = _CANCEL_EVENT.get()
+    return event is not None and event.is_set()
+
 
 @dataclass(frozen=True)
 class ToolSpec:
@@ -15,11 +73,92 @@ class ToolSpec:
     - description: shown to planner LLM
     - args_schema: JSONSchema-like dict
     - handler: callable(args) -> JSON-serializable output
+    - async_handler (optional): async callable(args) used by async execution instead of
+      running handler in a worker thread
+    - timeout_s (optional): default time limit per call; a plan step may override it
+      (not allowed with execution="inline": inline calls cannot be limited)
+    - pure: output depends only on args (no side effects), so calls may be memoized
+      (see app.tools.result_cache.ToolResultCache)
+    - cache_ttl_s (optional): how long a memoized output stays valid (None: until evicted)
+    - execution: where handler runs
+      - "thread" (default): sync dispatch runs it on the calling thread without a time limit, or
+        on the shared timed-call pool (MAX_TIMED_CALL_THREADS workers) with one; async dispatch
+        runs it in a worker thread
+      - "inline": always on the caller, including the event loop (async dispatch); step / plan
+        time limits are ignored, so only for trivial handlers that never block (saves a thread
+        hop per call)
+      - "process": on the warm tool process pool (app.tools.process_pool; registry dispatch),
+        for CPU-heavy or crash-prone handlers; handler must be a module-level function and
+        args / output picklable; async_handler is not used
+    - max_memory_mb (optional, process tools only): memory a call may allocate in its worker
     """
     name: str
     description: str
     args_schema: JSONSchema
     handler: Callable[[Dict[str, Any]], Any]
+    async_handler: Optional[Callable[[Dict[str, Any]], Awaitable[Any]]] = None
+    timeout_s: Optional[float] = None
+    pure: bool = False
+    cache_ttl_s: Optional[float] = None
+    execution: str = EXECUTION_THREAD
+    max_memory_mb: Optional[int] = None
+
+    def __post_init__(self) -> None:
+        if self.execution not in EXECUTION_CLASSES:
+            raise ValueError(f"tool {self.name}: execution must be one of {EXECUTION_CLASSES}, got {self.execution!r}")
+        if self.timeout_s is not None and self.execution == EXECUTION_INLINE:
+            raise ValueError(f"tool {self.name}: timeout_s cannot be enforced for execution={EXECUTION_INLINE!r}")
+        if self.max_memory_mb is not None:
+            if self.execution != EXECUTION_PROCESS:
+                raise ValueError(f"tool {self.name}: max_memory_mb needs execution={EXECUTION_PROCESS!r}")
+            if self.max_memory_mb <= 0:
+                raise ValueError(f"tool {self.name}: max_memory_mb must be positive")
+
+    def run(self, args: Optional[Dict[str, Any]] = None, *, timeout_s: Optional[float] = None) -> Any:
+        """
+        Call handler; with timeout_s it runs on the shared timed-call pool and raises
+        ToolTimeoutError when the limit passes (tool_cancelled() turns True for the abandoned
+        call, which keeps its worker until it returns). Time spent queued for a worker counts.
+        Inline tools are always called directly (no time limit).
+        """
+        if timeout_s is None or self.execution == EXECUTION_INLINE:
+            return self.handler(args or {})
+
+        cancel = threading.Event()
+        ctx = contextvars.copy_context()
+        fut = _timed_call_pool().submit(ctx.run, self._run_cancellable, cancel, args or {})
+        # wait() rather than fut.result(timeout): a handler may raise TimeoutError itself
+        if not wait([fut], timeout_s).done:
+            cancel.set()
+            fut.cancel()  # still queued: never starts
+            raise ToolTimeoutError(f"tool {self.name} timed out after {timeout_s:g}s")
+        return fut.result()
+
+    async def arun(self, args: Optional[Dict[str, Any]] = None, *, timeout_s: Optional[float] = None) -> Any:
+        """
+        Await async_handler (cancelled on timeout) or run handler in a worker thread
+        (signalled through tool_cancelled() on timeout or when the caller is cancelled).
+        Inline tools without async_handler are called directly on the event loop.
+        """
+        if self.async_handler is None and self.execution == EXECUTION_INLINE:
+            return self.handler(args or {})
+        if self.async_handler is not None:
+            call: Awaitable[Any] = self.async_handler(args or {})
+            cancel = None
+        else:
+            cancel = threading.Event()
+            call = asyncio.to_thread(self._run_cancellable, cancel, args or {})
+        try:
+            if timeout_s is None:
+                return await call
+            try:
+                return await asyncio.wait_for(call, timeout_s)
+            except asyncio.TimeoutError:
+                raise ToolTimeoutError(f"tool {self.name} timed out after {timeout_s:g}s") from None
+        finally:
+            if cancel is not None:
+                cancel.set()
 
-    def run(self, args: Optional[Dict[str, Any]] = None) -> Any:
-        return self.handler(args or {})
+    def _run_cancellable(self, cancel: threading.Event, args: Dict[str, Any]) -> Any:
+        _CANCEL_EVENT.set(cancel)
+        return self.handler(args)
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import Any, Dict
 
-from app.tools.base import ToolSpec
+from app.tools.base import EXECUTION_INLINE, ToolSpec
 
 
 def _echo_handler(args: Dict[str, Any]) -> Dict[str, Any]:
@@ -22,4 +22,6 @@ ECHO_TOOL = ToolSpec(
         "additionalProperties": False,
     },
     handler=_echo_handler,
+    pure=True,
+    execution=EXECUTION_INLINE,
 )
@@ -0,0 +1,262 @@
+from __future__ import annotations
+# Module: tool_runtime (process-class tool execution)
+# Boundary: do NOT import app.agents/* (tools must be reusable and execution-agnostic)
+# See: docs/architecture/modules.md
+
+import asyncio
+import multiprocessing
+import os
+import pickle
+import signal
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional, Tuple
+
+from app.tools.base import ToolCrashedError, ToolMemoryError, ToolSpec, ToolTimeoutError
+
+try:
+    import resource
+except ImportError:  # Windows: memory limits are not enforced
+    resource = None  # type: ignore[assignment]
+
+# how long past a call's time limit the parent waits for the worker's own alarm before it kills
+# the pool (a handler stuck in C code never sees the alarm)
+KILL_GRACE_S = 1.0
+
+
+def _default_start_method() -> str:
+    # fork is unsafe in a threaded parent (executor pools, uvicorn); forkserver is still cheap
+    return "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def _vm_bytes() -> int:
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _limit_memory(max_memory_mb: Optional[int]) -> Optional[Tuple[int, int]]:
+    """
+    Cap the worker's address space at its current size + max_memory_mb (RLIMIT_AS).
+    Returns the previous limits, or None when nothing was changed.
+    """
+    if max_memory_mb is None or resource is None:
+        return None
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = _vm_bytes() + max_memory_mb * 1024 * 1024
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    return soft, hard
+
+
+def _call_in_worker(blob: bytes, timeout_s: Optional[float], max_memory_mb: Optional[int]) -> bytes:
+    """
+    Runs in a pool worker (its main thread): unpickle (name, handler, args), call the handler
+    under the call's limits, and return the pickled output.
+    """
+    name, handler, args = pickle.loads(blob)
+
+    def _on_alarm(signum: int, frame: Any) -> None:
+        raise ToolTimeoutError(f"tool {name} timed out after {timeout_s:g}s")
+
+    use_alarm = timeout_s is not None and hasattr(signal, "setitimer")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout_s)
+    previous = _limit_memory(max_memory_mb)
+    try:
+        out = handler(args)
+    except MemoryError:
+        raise ToolMemoryError(f"tool {name} exceeded its memory limit ({max_memory_mb} MB)") from None
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        if previous is not None:
+            resource.setrlimit(resource.RLIMIT_AS, previous)
+    try:
+        return pickle.dumps(out, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception as e:
+        raise TypeError(f"tool {name} output cannot be pickled: {e}") from None
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+class ToolProcessPool:
+    """
+    Warm, reusable ProcessPoolExecutor for ToolSpec(execution="process") tools: CPU-heavy
+    handlers run outside the caller's process, so they neither hold its GIL nor can crash it.
+
+    - Transfer: (tool name, handler, args) are pickled in the caller, so a lambda / closure handler
+      or unpicklable args fail fast with TypeError; outputs are pickled in the worker the same way.
+    - Time limit (timeout_s): an alarm in the worker raises ToolTimeoutError there, and the pool
+      keeps running; only if the worker is still busy KILL_GRACE_S later is the pool killed and
+      replaced.
+    - Memory limit (ToolSpec.max_memory_mb, POSIX only): the worker's address space may grow by at
+      most that much during the call; allocations beyond it raise ToolMemoryError.
+    - Crash isolation: a worker that dies (segfault, os._exit, OOM kill) fails the call with
+      ToolCrashedError and the pool is replaced; other calls in flight on the same pool fail the
+      same way. Calls are never retried (a handler may have side effects).
+
+    Workers start on first use (warm() starts them all up front) and are reused across calls.
+    stats(): calls / crashes / timeouts / restarts.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, *, start_method: Optional[str] = None) -> None:
+        if max_workers is not None and max_workers < 1:
+            raise ValueError("max_workers must be >= 1")
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.start_method = start_method or _default_start_method()
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._stats: Dict[str, int] = {"calls": 0, "crashes": 0, "timeouts": 0, "restarts": 0}
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context(self.start_method)
+                )
+            return self._pool
+
+    def _replace(self, pool: ProcessPoolExecutor, *, kill: bool) -> None:
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+                self._stats["restarts"] += 1
+        if kill:
+            # no public API to stop one worker before Python 3.14
+            for p in list((getattr(pool, "_processes", None) or {}).values()):
+                p.kill()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def warm(self) -> None:
+        """
+        Start every worker now instead of on first use.
+        """
+        pool = self._executor()
+        for f in [pool.submit(_ping) for _ in range(self.max_workers)]:
+            f.result()
+
+    def _submit(
+        self, tool: ToolSpec, args: Dict[str, Any], timeout_s: Optional[float]
+    ) -> Tuple[ProcessPoolExecutor, "Future[bytes]"]:
+        try:
+            blob = pickle.dumps((tool.name, tool.handler, args), protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            raise TypeError(
+                f"process tool {tool.name}: handler (module-level function) and args must be picklable: {e}"
+            ) from None
+        with self._lock:
+            self._stats["calls"] += 1
+        for _ in range(2):
+            pool = self._executor()
+            try:
+                return pool, pool.submit(_call_in_worker, blob, timeout_s, tool.max_memory_mb)
+            except BrokenProcessPool:
+                self._replace(pool, kill=False)  # broken by an earlier crash: retry once on a fresh pool
+        raise ToolCrashedError(f"tool {tool.name}: process pool could not be started")
+
+    def _crashed(self, tool: ToolSpec, pool: ProcessPoolExecutor, e: BaseException) -> ToolCrashedError:
+        with self._lock:
+            self._stats["crashes"] += 1
+        self._replace(pool, kill=False)
+        return ToolCrashedError(f"tool {tool.name} worker process crashed: {e}")
+
+    def _timed_out(self, e: ToolTimeoutError) -> ToolTimeoutError:
+        # raised by the worker's alarm: the worker is free again, the pool stays as it is
+        with self._lock:
+            self._stats["timeouts"] += 1
+        return e
+
+    def _hung(self, tool: ToolSpec, pool: ProcessPoolExecutor, timeout_s: float) -> ToolTimeoutError:
+        # the worker ignored its alarm for KILL_GRACE_S: kill it (and the pool with it)
+        with self._lock:
+            self._stats["timeouts"] += 1
+        self._replace(pool, kill=True)
+        return ToolTimeoutError(f"tool {tool.name} timed out after {timeout_s:g}s")
+
+    def call(self, tool: ToolSpec, args: Dict[str, Any], *, timeout_s: Optional[float] = None) -> Any:
+        pool, fut = self._submit(tool, args, timeout_s)
+        try:
+            blob = fut.result(None if timeout_s is None else timeout_s + KILL_GRACE_S)
+        except ToolTimeoutError as e:
+            # TimeoutError subclass: must be caught before the grace-wait timeout below
+            raise self._timed_out(e) from None
+        except FuturesTimeoutError:
+            raise self._hung(tool, pool, timeout_s or 0.0) from None
+        except BrokenProcessPool as e:
+            raise self._crashed(tool, pool, e) from None
+        return pickle.loads(blob)
+
+    async def acall(self, tool: ToolSpec, args: Dict[str, Any], *, timeout_s: Optional[float] = None) -> Any:
+        """
+        call() for async callers: awaits the worker without blocking the event loop. Cancelling
+        the caller drops a call that has not started; a running one finishes (or hits its alarm).
+        """
+        pool, fut = self._submit(tool, args, timeout_s)
+        try:
+            waiter = asyncio.wrap_future(fut)
+            if timeout_s is None:
+                blob = await waiter
+            else:
+                blob = await asyncio.wait_for(waiter, timeout_s + KILL_GRACE_S)
+        except ToolTimeoutError as e:
+            raise self._timed_out(e) from None
+        except asyncio.TimeoutError:
+            raise self._hung(tool, pool, timeout_s or 0.0) from None
+        except BrokenProcessPool as e:
+            raise self._crashed(tool, pool, e) from None
+        return pickle.loads(blob)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._stats)
+            out["max_workers"] = self.max_workers
+            out["start_method"] = self.start_method
+        return out
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+
+_DEFAULT_POOL: Optional[ToolProcessPool] = None
+_DEFAULT_POOL_LOCK = threading.Lock()
+
+
+def get_tool_process_pool() -> ToolProcessPool:
+    """
+    The process-wide pool process-class tools are dispatched to (created on first use).
+    """
+    global _DEFAULT_POOL
+    with _DEFAULT_POOL_LOCK:
+        if _DEFAULT_POOL is None:
+            _DEFAULT_POOL = ToolProcessPool()
+        return _DEFAULT_POOL
+
+
+def configure_tool_process_pool(
+    max_workers: Optional[int] = None, *, start_method: Optional[str] = None, warm: bool = False
+) -> ToolProcessPool:
+    """
+    Replace the process-wide pool (the previous one is shut down), e.g. at server startup with
+    warm=True so the first process-class call does not pay for worker start-up.
+    """
+    global _DEFAULT_POOL
+    pool = ToolProcessPool(max_workers, start_method=start_method)
+    with _DEFAULT_POOL_LOCK:
+        previous, _DEFAULT_POOL = _DEFAULT_POOL, pool
+    if previous is not None:
+        previous.shutdown(wait=False)
+    if warm:
+        pool.warm()
+    return pool
@@ -2,9 +2,11 @@ from __future__ import annotations
 # Module: tool_runtime
 # Boundary: do NOT import app.agents/* (tools must be reusable and execution-agnostic)
 # See: docs/architecture/modules.md
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
-from app.tools.base import ToolSpec
+from app.tools.base import EXECUTION_PROCESS, ToolSpec
+from app.tools.process_pool import get_tool_process_pool
+from app.tools.result_cache import ToolResultCache, tool_cache_key
 from app.tools.echo_tool import ECHO_TOOL
 from app.tools.time_tool import TIME_TOOL
 from app.tools.search_tool import SEARCH_TOOL
@@ -13,11 +15,35 @@ from app.tools.summarize_tool import SUMMARIZE_TOOL
 
 _TOOL_REGISTRY: Dict[str, ToolSpec] = {}
 
+# bumped on every registry change so derived views (e.g. the planner tool catalog) can cache
+_REGISTRY_VERSION = 0
+
 
 def register(tool: ToolSpec) -> None:
     if not tool.name:
         raise ValueError("Tool name is required.")
-    _TOOL_REGISTRY[tool.name] = tool
+    register_alias(tool.name, tool)
+
+
+def register_alias(key: str, tool: ToolSpec) -> None:
+    """
+    Register a tool under an extra key (compatibility alias for model drift).
+    Aliases dispatch normally but are hidden from list_tools().
+    """
+    global _REGISTRY_VERSION
+    _TOOL_REGISTRY[key] = tool
+    _REGISTRY_VERSION += 1
+
+
+def registry_version() -> int:
+    return _REGISTRY_VERSION
+
+
+def list_tool_names() -> List[str]:
+    """
+    Every dispatchable key, including compatibility aliases.
+    """
+    return list(_TOOL_REGISTRY.keys())
 
 
 def get_tool(name: str) -> ToolSpec:
@@ -48,14 +74,87 @@ def list_tools() -> List[Dict[str, Any]]:
     return out
 
 
-def dispatch_tool(name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+def dispatch_tool(name: str, args: Dict[str, Any], *, timeout_s: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Run a tool by name. timeout_s: time limit for this call (None: the tool's own timeout_s);
+    raises ToolTimeoutError when it passes. Process-class tools run on the tool process pool.
+    """
     tool = get_tool(name)
-    out = tool.run(args or {})
+    limit = tool.timeout_s if timeout_s is None else timeout_s
+    if tool.execution == EXECUTION_PROCESS:
+        out = get_tool_process_pool().call(tool, args or {}, timeout_s=limit)
+    else:
+        out = tool.run(args or {}, timeout_s=limit)
     if isinstance(out, dict):
         return out
     return {"result": out}
 
 
+async def dispatch_tool_async(
+    name: str, args: Dict[str, Any], *, timeout_s: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    dispatch_tool for async callers: awaits the tool's async_handler when it has one,
+    otherwise runs the sync handler in a worker thread (never blocks the event loop).
+    Cancelling the caller cancels the call (see ToolSpec.arun). Process-class tools are awaited on
+    the tool process pool.
+    """
+    tool = get_tool(name)
+    limit = tool.timeout_s if timeout_s is None else timeout_s
+    if tool.execution == EXECUTION_PROCESS:
+        out = await get_tool_process_pool().acall(tool, args or {}, timeout_s=limit)
+    else:
+        out = await tool.arun(args or {}, timeout_s=limit)
+    if isinstance(out, dict):
+        return out
+    return {"result": out}
+
+
+def dispatch_tool_cached(
+    name: str,
+    args: Dict[str, Any],
+    *,
+    cache: Optional[ToolResultCache],
+    timeout_s: Optional[float] = None,
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    dispatch_tool through a result cache: pure tools (ToolSpec.pure) are looked up by
+    canonical args first and stored after a successful call. Returns (output, cached).
+    """
+    tool = get_tool(name)
+    key = tool_cache_key(tool.name, args or {}) if cache is not None and tool.pure else None
+    if key is None or cache is None:
+        return dispatch_tool(name, args, timeout_s=timeout_s), False
+    hit, out = cache.get(tool.name, key)
+    if hit:
+        return out, True
+    out = dispatch_tool(name, args, timeout_s=timeout_s)
+    cache.put(tool.name, key, out, ttl_s=tool.cache_ttl_s)
+    return out, False
+
+
+async def dispatch_tool_cached_async(
+    name: str,
+    args: Dict[str, Any],
+    *,
+    cache: Optional[ToolResultCache],
+    timeout_s: Optional[float] = None,
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    dispatch_tool_cached for async callers (misses go through dispatch_tool_async).
+    """
+    tool = get_tool(name)
+    key = tool_cache_key(tool.name, args or {}) if cache is not None and tool.pure else None
+    if key is None or cache is None:
+        return await dispatch_tool_async(name, args, timeout_s=timeout_s), False
+    hit, out = cache.get(tool.name, key)
+    if hit:
+        return out, True
+    out = await dispatch_tool_async(name, args, timeout_s=timeout_s)
+    cache.put(tool.name, key, out, ttl_s=tool.cache_ttl_s)
+    return out, False
+
+
 def bootstrap_default_tools() -> None:
     register(ECHO_TOOL)
     register(TIME_TOOL)
@@ -63,16 +162,16 @@ def bootstrap_default_tools() -> None:
     register(SUMMARIZE_TOOL)
 
     # compatibility aliases (older prompts / model drift)
-    _TOOL_REGISTRY["time_tool"] = TIME_TOOL
-    _TOOL_REGISTRY["get_time_tool"] = TIME_TOOL
+    register_alias("time_tool", TIME_TOOL)
+    register_alias("get_time_tool", TIME_TOOL)
 
     # search compatibility aliases (model drift)
-    _TOOL_REGISTRY["search"] = SEARCH_TOOL
-    _TOOL_REGISTRY["search_local"] = SEARCH_TOOL
+    register_alias("search", SEARCH_TOOL)
+    register_alias("search_local", SEARCH_TOOL)
 
     # summarize compatibility aliases (model drift)
-    _TOOL_REGISTRY["summarize"] = SUMMARIZE_TOOL
-    _TOOL_REGISTRY["summary"] = SUMMARIZE_TOOL
+    register_alias("summarize", SUMMARIZE_TOOL)
+    register_alias("summary", SUMMARIZE_TOOL)
 
 
 bootstrap_default_tools()
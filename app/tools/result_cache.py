@@ -0,0 +1,142 @@
+from __future__ import annotations
+# Module: tool_runtime (tool result memoization)
+# Boundary: do NOT import app.agents/* (tools must be reusable and execution-agnostic)
+# See: docs/architecture/modules.md
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def tool_cache_key(tool_name: str, args: Dict[str, Any]) -> Optional[str]:
+    """
+    Stable key for one call: tool name + canonical JSON of args (sorted keys, compact).
+    None when args are not JSON-serializable (such calls are never cached).
+    """
+    try:
+        raw = json.dumps([tool_name, args], ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    except (TypeError, ValueError):
+        return None
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _Entry:
+    tool: str
+    output_json: str
+    size: int
+    expires_at: Optional[float]
+
+
+class ToolResultCache:
+    """
+    In-memory memo of pure tool calls (ToolSpec.pure), shared across steps, plans and runs.
+
+    - Keyed by tool_cache_key(canonical tool name, args); aliases share entries.
+    - Outputs are stored as JSON text and decoded on every hit, so callers never share
+      (or mutate) a cached object; non-JSON outputs are not cached.
+    - TTL per entry from ToolSpec.cache_ttl_s (None: until evicted).
+    - LRU bounded by max_entries and max_bytes (size of the stored JSON text).
+
+    stats(): global counters plus per-tool hits / misses / stores.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 1024,
+        max_bytes: int = 16 * 1024 * 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be >= 1")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._stats: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expired": 0,
+            "too_large": 0,
+        }
+        self._per_tool: Dict[str, Dict[str, int]] = {}
+
+    def _tool_stats(self, tool: str) -> Dict[str, int]:
+        s = self._per_tool.get(tool)
+        if s is None:
+            s = self._per_tool[tool] = {"hits": 0, "misses": 0, "stores": 0}
+        return s
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def get(self, tool: str, key: str) -> Tuple[bool, Any]:
+        """
+        (True, output) on a hit, (False, None) otherwise.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at is not None and self._clock() >= entry.expires_at:
+                self._drop(key)
+                self._stats["expired"] += 1
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                self._tool_stats(tool)["misses"] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            self._tool_stats(tool)["hits"] += 1
+            output_json = entry.output_json
+        return True, json.loads(output_json)
+
+    def put(self, tool: str, key: str, output: Any, *, ttl_s: Optional[float] = None) -> None:
+        try:
+            output_json = json.dumps(output, ensure_ascii=False, separators=(",", ":"))
+        except (TypeError, ValueError):
+            return
+        size = len(output_json.encode("utf-8"))
+        with self._lock:
+            if size > self.max_bytes:
+                self._stats["too_large"] += 1
+                return
+            if key in self._entries:
+                self._drop(key)
+            expires_at = None if ttl_s is None else self._clock() + ttl_s
+            self._entries[key] = _Entry(tool=tool, output_json=output_json, size=size, expires_at=expires_at)
+            self._bytes += size
+            self._stats["stores"] += 1
+            self._tool_stats(tool)["stores"] += 1
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def invalidate(self, tool: Optional[str] = None) -> None:
+        """
+        Drop every entry (or only one tool's, e.g. after its data source changed).
+        """
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if tool is None or e.tool == tool]:
+                self._drop(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._stats)
+            out["size"] = len(self._entries)
+            out["bytes"] = self._bytes
+            out["tools"] = {t: dict(s) for t, s in self._per_tool.items()}
+        lookups = out["hits"] + out["misses"]
+        out["hit_rate"] = (out["hits"] / lookups) if lookups else 0.0
+        return out
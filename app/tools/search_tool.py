@@ -65,4 +65,7 @@ SEARCH_TOOL = ToolSpec(
         "additionalProperties": False,
     },
     handler=_search_handler,
+    pure=True,
+    cache_ttl_s=600.0,  # retrieval results follow the corpus; do not keep them forever
+    timeout_s=10.0,  # a retriever backend may hang; never block the plan on it
 )
@@ -93,4 +93,6 @@ SUMMARIZE_TOOL = ToolSpec(
         "additionalProperties": False,
     },
     handler=_summarize_handler,
+    pure=True,
+    timeout_s=10.0,
 )
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime, timezone
 from typing import Any, Dict
 
-from app.tools.base import ToolSpec
+from app.tools.base import EXECUTION_INLINE, ToolSpec
 
 
 def _run_time(args: Dict[str, Any]) -> Dict[str, Any]:
@@ -27,4 +27,5 @@ TIME_TOOL = ToolSpec(
         "additionalProperties": False,
     },
     handler=_run_time,
+    execution=EXECUTION_INLINE,
 )
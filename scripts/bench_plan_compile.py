@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+"""
+Benchmark: fused plan normalization + validation (compile_plan) vs the multi-pass pipeline.
+
+Offline only (no model calls). Synthetic N-step plans go through both paths:
+- multi-pass: _pad_steps_to_expected, _normalize_step_ids_inplace, _fix_forward_dependencies_inplace,
+  validate_plan_payload, _enforce_expected_steps, then the executor's declared-id scan
+- fused: compile_plan (one walk; its PlanIndex replaces the executor scan)
+
+Both must produce the same normalized plan and the same errors; the script fails otherwise.
+
+Run:
+  PYTHONPATH=. python scripts/bench_plan_compile.py --steps 1000
+"""
+
+import argparse
+import copy
+import gc
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.agents.plan_compiler import compile_plan
+from app.agents.plan_executor import _declared_step_ids
+from app.agents.plan_validator import validate_plan_payload
+from app.agents.runner import (
+    _enforce_expected_steps,
+    _fix_forward_dependencies_inplace,
+    _normalize_step_ids_inplace,
+    _pad_steps_to_expected,
+)
+
+
+def _step(sid: str, deps: List[str], k: int) -> Dict[str, Any]:
+    return {
+        "step_id": sid,
+        "title": f"Step {k}",
+        "description": f"Process item {k}",
+        "dependencies": deps,
+        "deliverable": f"result {k}",
+        "acceptance": "non-empty output",
+        "tool": {"name": "echo_tool", "args": {"text": f"$step_{max(1, k - 1)}.output"}},
+    }
+
+
+def _plan(steps: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"task_summary": "synthetic", "assumptions": [], "risks": [], "steps": steps}
+
+
+def build_scenarios(n: int) -> List[Tuple[str, Dict[str, Any], Optional[int]]]:
+    clean = _plan([_step(f"step_{k}", [f"step_{k - 1}"] if k > 1 else [], k) for k in range(1, n + 1)])
+    # ids start at step_2 (a common repair drift) and every 10th step has a forward/self dependency
+    drifted = _plan(
+        [
+            _step(
+                f"step_{k + 1}",
+                ([f"step_{k}"] if k > 1 else []) + ([f"step_{k + 5}", f"step_{k + 1}"] if k % 10 == 0 else []),
+                k,
+            )
+            for k in range(1, n + 1)
+        ]
+    )
+    named = _plan([_step(f"s{k}", [f"s{k - 1}", f"s{k // 2}"] if k > 1 else [], k) for k in range(1, n + 1)])
+    short = _plan([_step(f"step_{k}", [f"step_{k - 1}"] if k > 1 else [], k) for k in range(1, n // 2 + 1)])
+    return [
+        ("clean", clean, n),
+        ("drifted_ids", drifted, n),
+        ("named_ids", named, None),
+        ("padded", short, n),
+    ]
+
+
+def multi_pass(payload: Dict[str, Any], expected_steps: Optional[int]) -> Tuple[Dict[str, Any], List[str], Optional[str]]:
+    _pad_steps_to_expected(payload, expected_steps)
+    _normalize_step_ids_inplace(payload)
+    _fix_forward_dependencies_inplace(payload)
+    errors = validate_plan_payload(payload)
+    expected_error = None
+    if not errors:
+        try:
+            _enforce_expected_steps(payload, expected_steps)
+        except ValueError as e:
+            expected_error = str(e)
+    _declared_step_ids(payload["steps"])
+    return payload, errors, expected_error
+
+
+def fused(payload: Dict[str, Any], expected_steps: Optional[int]) -> Tuple[Dict[str, Any], List[str], Optional[str]]:
+    compiled = compile_plan(payload, expected_steps=expected_steps)
+    _declared_step_ids(compiled.payload["steps"], compiled.index)
+    return compiled.payload, compiled.errors, compiled.expected_steps_error
+
+
+def _best_ms(fn: Callable[[Dict[str, Any], Optional[int]], Any], plan: Dict[str, Any], expected: Optional[int], runs: int) -> float:
+    copies = [copy.deepcopy(plan) for _ in range(runs)]
+    best = float("inf")
+    gc.disable()  # like timeit: keep collector pauses out of the comparison
+    try:
+        for p in copies:
+            t0 = time.perf_counter()
+            fn(p, expected)
+            best = min(best, time.perf_counter() - t0)
+    finally:
+        gc.enable()
+    return best * 1000.0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare fused compile_plan vs multi-pass normalize + validate.")
+    parser.add_argument("--steps", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=30, help="Timed runs per scenario (best is reported).")
+    args = parser.parse_args()
+
+    print(f"{'scenario':<12} {'steps':>6} {'multi_pass_ms':>14} {'fused_ms':>9} {'speedup':>8}")
+    for name, plan, expected in build_scenarios(args.steps):
+        a = multi_pass(copy.deepcopy(plan), expected)
+        b = fused(copy.deepcopy(plan), expected)
+        if json.dumps(a, sort_keys=True) != json.dumps(b, sort_keys=True):
+            print(f"[FAIL] {name}: fused output differs from the multi-pass pipeline")
+            return 1
+        slow = _best_ms(multi_pass, plan, expected, args.runs)
+        fast = _best_ms(fused, plan, expected, args.runs)
+        print(f"{name:<12} {len(a[0]['steps']):>6} {slow:>14.3f} {fast:>9.3f} {slow / fast:>7.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
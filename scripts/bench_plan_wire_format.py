@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+"""
+Benchmark: canonical vs compact planner output format.
+
+Offline (default):
+- Build representative canonical plans, convert them to the compact wire format, and compare
+  planner output size (chars + estimated tokens). Every compact plan is expanded back and must
+  pass validate_plan_payload.
+
+Live (--live):
+- Send the same user inputs with wire_format="canonical" and "compact" planner prompts and
+  report output tokens (estimated), planner latency and how often the plan validates.
+
+Run:
+  PYTHONPATH=. python scripts/bench_plan_wire_format.py
+  PYTHONPATH=. python scripts/bench_plan_wire_format.py --live --repeat 5
+"""
+
+import argparse
+import json
+import time
+from typing import Any, Dict, List, Tuple
+
+from app.agents.plan_validator import validate_plan_payload
+from app.agents.plan_wire import COMPACT_SCHEMA_ADDENDUM, compact_plan, expand_compact_plan
+from app.agents.runner import (
+    _build_pcl_schema_system_addendum,
+    _call_model,
+    _check_plan,
+    _prepare_plan,
+    load_text,
+)
+from app.agents.token_budget import estimate_tokens
+
+PROMPT_PATH = "app/prompts/system/agent_system.md"
+
+LIVE_INPUTS = [
+    "what time is it now",
+    "search the notes about RAG and summarize them",
+    "echo hello, then tell me the current time",
+    "search agents and workflows separately, then summarize both results",
+]
+
+
+def _step(idx: int, tool: str, args: Dict[str, Any], deps: List[str]) -> Dict[str, Any]:
+    return {
+        "step_id": f"step_{idx}",
+        "title": f"Run {tool} for step {idx}",
+        "description": f"Call {tool} with the prepared arguments and keep its output for later steps.",
+        "dependencies": deps,
+        "deliverable": f"A JSON output from {tool} that downstream steps can reference.",
+        "acceptance": f"execution_results contains step_{idx} with ok=true and a non-empty output.",
+        "tool": {"name": tool, "args": args},
+    }
+
+
+def build_cases() -> List[Tuple[str, Dict[str, Any]]]:
+    cases: List[Tuple[str, Dict[str, Any]]] = []
+    with open("docs/samples/agent_plan_sample.json", encoding="utf-8") as f:
+        cases.append(("sample_echo", json.load(f)))
+
+    for n in (2, 4, 8, 16):
+        steps: List[Dict[str, Any]] = []
+        for i in range(1, n + 1, 2):
+            steps.append(_step(i, "search_tool", {"query": f"topic {i}", "top_k": 3}, []))
+            if i + 1 <= n:
+                steps.append(_step(i + 1, "summarize_tool", {"docs": f"$step_{i}.output.docs"}, [f"step_{i}"]))
+        cases.append(
+            (
+                f"search_summarize_{n}_steps",
+                {
+                    "task_summary": "Search several topics and summarize each result set.",
+                    "assumptions": ["The local corpus covers the requested topics."],
+                    "risks": ["Some searches may return no docs."],
+                    "steps": steps,
+                },
+            )
+        )
+    return cases
+
+
+def _dumps(obj: Any) -> str:
+    # Models emit roughly this shape (pretty-printed canonical plans are even larger).
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def run_offline() -> None:
+    print("planner output size (chars / estimated tokens):")
+    print(f"{'case':<28} {'canonical':>14} {'compact':>14} {'saved':>7}")
+    total_c = 0
+    total_k = 0
+    for name, plan in build_cases():
+        errors = validate_plan_payload(plan)
+        assert not errors, f"{name}: fixture invalid: {errors}"
+
+        compact = compact_plan(plan)
+        expanded = expand_compact_plan(json.loads(_dumps(compact)))
+        errors = validate_plan_payload(expanded)
+        assert not errors, f"{name}: expanded compact plan invalid: {errors}"
+
+        canonical_text = _dumps(plan)
+        compact_text = _dumps(compact)
+        c_tok = estimate_tokens(canonical_text)
+        k_tok = estimate_tokens(compact_text)
+        total_c += c_tok
+        total_k += k_tok
+        c_col = f"{len(canonical_text)}/{c_tok}"
+        k_col = f"{len(compact_text)}/{k_tok}"
+        print(f"{name:<28} {c_col:>14} {k_col:>14} {1.0 - k_tok / c_tok:>6.0%}")
+
+    print(f"\ntotal output tokens: canonical={total_c} compact={total_k} saved={1.0 - total_k / total_c:.0%}")
+
+
+def run_live(repeat: int, max_tokens: int) -> None:
+    base_system_prompt = load_text(PROMPT_PATH).strip()
+    addenda = {
+        "canonical": _build_pcl_schema_system_addendum(),
+        "compact": COMPACT_SCHEMA_ADDENDUM,
+    }
+
+    print("\n=== live planner calls ===")
+    print(f"{'format':<10} {'valid':>9} {'avg_out_tok':>12} {'avg_ms':>8} {'p95_ms':>8}")
+    for fmt, addendum in addenda.items():
+        valid = 0
+        total = 0
+        out_tokens: List[int] = []
+        latencies: List[float] = []
+        for user_input in LIVE_INPUTS:
+            messages = [
+                {"role": "system", "content": base_system_prompt},
+                {"role": "system", "content": addendum},
+                {"role": "user", "content": user_input},
+            ]
+            for _ in range(repeat):
+                total += 1
+                started = time.perf_counter()
+                try:
+                    raw = _call_model(messages, temperature=0.2, max_tokens=max_tokens)
+                except Exception:
+                    latencies.append((time.perf_counter() - started) * 1000.0)
+                    continue
+                latencies.append((time.perf_counter() - started) * 1000.0)
+                out_tokens.append(estimate_tokens(raw))
+                try:
+                    _check_plan(_prepare_plan(raw, None))
+                    valid += 1
+                except Exception:
+                    pass
+
+        avg_tok = sum(out_tokens) / len(out_tokens) if out_tokens else 0.0
+        avg_ms = sum(latencies) / len(latencies) if latencies else 0.0
+        p95 = sorted(latencies)[max(0, int(round(0.95 * len(latencies))) - 1)] if latencies else 0.0
+        print(f"{fmt:<10} {f'{valid}/{total}':>9} {avg_tok:>12.0f} {avg_ms:>8.0f} {p95:>8.0f}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare canonical vs compact planner output format.")
+    parser.add_argument("--live", action="store_true", help="Call the model and measure latency/tokens per format.")
+    parser.add_argument("--repeat", type=int, default=3, help="Live calls per input and format.")
+    parser.add_argument("--max-tokens", type=int, default=1024, help="Model max_tokens for live calls.")
+    args = parser.parse_args()
+
+    run_offline()
+    if args.live:
+        run_live(args.repeat, args.max_tokens)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+"""
+Benchmark: step-reference resolution with compiled args templates.
+
+Offline only (no tools are called). A synthetic N-step plan whose args mix static values with
+"$step_N.output..." references (canonical and drift forms) is resolved step by step against a
+status map, the way the executor does it:
+- cold: templates compiled for the plan (template cache empty), then rendered per step
+- warm: templates taken from the cache (repeat run / replan with the same steps), then rendered
+- parse only: the per-run parsing the warm path skips
+
+Cold and warm must resolve identical args; the script fails otherwise.
+
+Run:
+  PYTHONPATH=. python scripts/bench_ref_templates.py --steps 500
+"""
+
+import argparse
+import copy
+import gc
+import json
+import time
+from typing import Any, Callable, Dict, List
+
+from app.agents import plan_executor
+from app.agents.plan_executor import _plan_templates
+
+
+def _step(k: int) -> Dict[str, Any]:
+    prev = f"step_{max(1, k - 1)}"
+    return {
+        "step_id": f"step_{k}",
+        "dependencies": [prev] if k > 1 else [],
+        "tool": {
+            "name": "summarize_tool",
+            "args": {
+                "docs": f"${prev}.output.docs",
+                "query": f"topic {k}",
+                "context": [".output.echo", f"{prev}.output.echo", {"note": "static text", "limit": 5}],
+                "extra": {"drift": f".output.{prev}.output.docs", "flags": ["a", "b", "c"]},
+            },
+        },
+    }
+
+
+def _status(n: int) -> Dict[str, Dict[str, Any]]:
+    return {
+        f"step_{k}": {"ok": True, "skipped": False, "output": {"docs": [f"doc {k}"], "echo": f"echo {k}"}}
+        for k in range(1, n + 1)
+    }
+
+
+def resolve_all(steps: List[Dict[str, Any]], status: Dict[str, Dict[str, Any]]) -> List[Any]:
+    return [t.render(status) for t in _plan_templates(steps) if t is not None]
+
+
+def _cold(steps: List[Dict[str, Any]], status: Dict[str, Dict[str, Any]]) -> List[Any]:
+    plan_executor._TEMPLATE_CACHE.clear()
+    return resolve_all(steps, status)
+
+
+def _parse_only(steps: List[Dict[str, Any]], status: Dict[str, Dict[str, Any]]) -> Any:
+    return [plan_executor._compile_step_template(s) for s in steps]
+
+
+def _best_ms(fn: Callable[[List[Dict[str, Any]], Dict[str, Dict[str, Any]]], Any], steps, status, runs: int) -> float:
+    best = float("inf")
+    gc.disable()  # like timeit: keep collector pauses out of the comparison
+    try:
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            fn(steps, status)
+            best = min(best, time.perf_counter() - t0)
+    finally:
+        gc.enable()
+    return best * 1000.0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare cold vs cached step-reference templates.")
+    parser.add_argument("--steps", type=int, default=500)
+    parser.add_argument("--runs", type=int, default=30, help="Timed runs per variant (best is reported).")
+    args = parser.parse_args()
+
+    steps = [_step(k) for k in range(1, args.steps + 1)]
+    status = _status(args.steps)
+
+    cold = _cold(copy.deepcopy(steps), status)
+    warm = resolve_all(copy.deepcopy(steps), status)
+    if json.dumps(cold, sort_keys=True) != json.dumps(warm, sort_keys=True):
+        print("[FAIL] cached templates resolved different args")
+        return 1
+
+    cold_ms = _best_ms(_cold, steps, status, args.runs)
+    resolve_all(steps, status)
+    warm_ms = _best_ms(resolve_all, steps, status, args.runs)
+    parse_ms = _best_ms(_parse_only, steps, status, args.runs)
+    print(f"{'steps':>6} {'cold_ms':>9} {'warm_ms':>9} {'parse_ms':>9} {'speedup':>8}")
+    print(f"{len(steps):>6} {cold_ms:>9.3f} {warm_ms:>9.3f} {parse_ms:>9.3f} {cold_ms / warm_ms:>7.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+"""
+Benchmark: compact (delta) vs full replan prompts.
+
+Offline (default):
+- Build synthetic failing plans, execute them, and compare the replan prompt size
+  (chars + estimated tokens) for replan_mode="full" vs "compact".
+
+Live (--live):
+- Additionally send both replan prompts to the model and count how often the
+  returned plan validates and executes without needing another replan.
+
+Run:
+  PYTHONPATH=. python scripts/bench_replan_prompt.py
+  PYTHONPATH=. python scripts/bench_replan_prompt.py --live --repeat 5
+"""
+
+import argparse
+import time
+from typing import Any, Dict, List, Tuple
+
+from app.agents.plan_executor import execute_plan
+from app.agents.runner import (
+    _build_pcl_schema_system_addendum,
+    _build_replan_messages,
+    _call_model,
+    _check_plan,
+    _execute_with_gate,
+    _needs_replan,
+    _prepare_plan,
+    load_text,
+)
+from app.agents.token_budget import estimate_tokens
+
+PROMPT_PATH = "app/prompts/system/agent_system.md"
+
+
+def _step(idx: int, tool: str, args: Dict[str, Any], deps: List[str]) -> Dict[str, Any]:
+    return {
+        "step_id": f"step_{idx}",
+        "title": f"step {idx}: run {tool}",
+        "description": f"Execute {tool} as part of the synthetic benchmark plan.",
+        "dependencies": deps,
+        "deliverable": f"Output from {tool}.",
+        "acceptance": "Tool execution result is captured in execution_results.",
+        "tool": {"name": tool, "args": args},
+    }
+
+
+def _payload(summary: str, steps: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"task_summary": summary, "assumptions": ["none"], "risks": ["none"], "steps": steps}
+
+
+def build_cases() -> List[Tuple[str, str, Dict[str, Any]]]:
+    """
+    (case_name, user_input, plan) — every plan ends FAILED/BLOCKED/PARTIAL when executed.
+    """
+    cases: List[Tuple[str, str, Dict[str, Any]]] = []
+
+    for n_search in (2, 6, 12):
+        steps: List[Dict[str, Any]] = []
+        for i in range(1, n_search + 1):
+            steps.append(_step(i, "search_tool", {"query": f"workflow {i}", "top_k": 3}, []))
+        steps.append(
+            _step(n_search + 1, "no_such_tool", {"docs": f"$step_{n_search}.output.docs"}, [f"step_{n_search}"])
+        )
+        steps.append(
+            _step(n_search + 2, "summarize_tool", {"docs": f"$step_{n_search}.output.docs"}, [f"step_{n_search + 1}"])
+        )
+        cases.append(
+            (
+                f"unknown_tool_after_{n_search}_searches",
+                "search the notes about workflow and summarize them",
+                _payload("search then summarize", steps),
+            )
+        )
+
+    cases.append(
+        (
+            "bad_args_chain",
+            "search workflow notes then summarize",
+            _payload(
+                "search then summarize",
+                [
+                    _step(1, "search_tool", {"query": ""}, []),
+                    _step(2, "summarize_tool", {"docs": "$step_1.output.docs"}, ["step_1"]),
+                    _step(3, "echo_tool", {"text": "done"}, ["step_2"]),
+                ],
+            ),
+        )
+    )
+    return cases
+
+
+def _size(messages: List[Dict[str, str]]) -> Tuple[int, int]:
+    """
+    (total_prompt_tokens, replan_context_tokens) — context is the user message carrying the previous plan.
+    """
+    text = "\n".join(m["content"] for m in messages)
+    return estimate_tokens(text), estimate_tokens(messages[-1]["content"])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare compact vs full replan prompt size (and optionally success rate).")
+    parser.add_argument("--token-budget", type=int, default=800, help="Compact replan token budget.")
+    parser.add_argument("--live", action="store_true", help="Call the model and measure replan success per mode.")
+    parser.add_argument("--repeat", type=int, default=3, help="Live calls per case and mode.")
+    parser.add_argument("--max-tokens", type=int, default=1024, help="Model max_tokens for live replans.")
+    args = parser.parse_args()
+
+    base_system_prompt = load_text(PROMPT_PATH).strip()
+    schema_addendum = _build_pcl_schema_system_addendum()
+
+    print("estimated tokens (total prompt / replan context message):")
+    print(f"{'case':<34} {'full':>13} {'compact':>13} {'ctx_saved':>10}")
+    prompts: Dict[str, Dict[str, List[Dict[str, str]]]] = {}
+    total_full = 0
+    total_compact = 0
+    for name, user_input, plan in build_cases():
+        executed = execute_plan(plan)
+        by_mode: Dict[str, List[Dict[str, str]]] = {}
+        for mode in ("full", "compact"):
+            by_mode[mode] = _build_replan_messages(
+                base_system_prompt=base_system_prompt,
+                schema_addendum=schema_addendum,
+                user_input=user_input,
+                last_payload=executed,
+                replan_mode=mode,
+                token_budget=args.token_budget,
+            )
+        prompts[name] = by_mode
+
+        full_tok, full_ctx = _size(by_mode["full"])
+        compact_tok, compact_ctx = _size(by_mode["compact"])
+        total_full += full_tok
+        total_compact += compact_tok
+        saved = 1.0 - (compact_ctx / full_ctx) if full_ctx else 0.0
+        full_col = f"{full_tok}/{full_ctx}"
+        compact_col = f"{compact_tok}/{compact_ctx}"
+        print(f"{name:<34} {full_col:>13} {compact_col:>13} {saved:>9.0%}")
+
+    if total_full:
+        print(f"\ntotal prompt tokens: full={total_full} compact={total_compact} "
+              f"saved={1.0 - total_compact / total_full:.0%}")
+
+    if not args.live:
+        return 0
+
+    print("\n=== live replan success ===")
+    for mode in ("full", "compact"):
+        ok = 0
+        total = 0
+        latencies: List[float] = []
+        for name, user_input, _ in build_cases():
+            for _ in range(args.repeat):
+                total += 1
+                started = time.perf_counter()
+                try:
+                    raw = _call_model(prompts[name][mode], temperature=0.0, max_tokens=args.max_tokens)
+                    compiled = _prepare_plan(raw, None)
+                    _check_plan(compiled)
+                    if not _needs_replan(_execute_with_gate(compiled.payload, False, index=compiled.index)):
+                        ok += 1
+                except Exception:
+                    pass
+                latencies.append((time.perf_counter() - started) * 1000.0)
+        avg = sum(latencies) / len(latencies) if latencies else 0.0
+        print(f"{mode:<8} success={ok}/{total} avg_latency_ms={avg:.0f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+"""
+Benchmark: per-turn prompt context size of a bounded AgentSession vs naive full history.
+
+Offline only (no model calls): synthetic turns with realistic search/summarize results are
+recorded into an AgentSession; the rendered context stays under the session token budget,
+while resending the whole transcript grows linearly.
+
+Run:
+  PYTHONPATH=. python scripts/bench_session_context.py --turns 50
+"""
+
+import argparse
+from typing import Any, Dict, List
+
+from app.agents.session import AgentSession, SessionTurn
+from app.agents.token_budget import dumps_compact, estimate_tokens
+
+
+def _turn(i: int) -> SessionTurn:
+    docs: List[Dict[str, Any]] = [
+        {"doc_id": f"doc_{i}_{k}", "content": f"Notes about topic {i}: workflow step {k} explained in detail. " * 3}
+        for k in range(3)
+    ]
+    return SessionTurn(
+        user_input=f"search the notes about topic {i} and summarize what changed since the last answer",
+        task_summary=f"Search topic {i} notes and summarize them.",
+        task_status="COMPLETED",
+        result={"count": len(docs), "points": [d["content"] for d in docs]},
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare bounded session context vs full history size.")
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--token-budget", type=int, default=600)
+    parser.add_argument("--keep-recent", type=int, default=3)
+    args = parser.parse_args()
+
+    session = AgentSession(session_id="bench", keep_recent=args.keep_recent, token_budget=args.token_budget)
+    naive: List[Dict[str, Any]] = []
+
+    print(f"{'turn':>5} {'session_ctx_tok':>16} {'full_history_tok':>17}")
+    for i in range(1, args.turns + 1):
+        turn = _turn(i)
+        session.record(turn)
+        naive.append({"user": turn.user_input, "plan": turn.task_summary, "status": turn.task_status, "result": turn.result})
+        if i in (1, 2, 3, 5) or i % 10 == 0 or i == args.turns:
+            print(f"{i:>5} {session.context_tokens():>16} {estimate_tokens(dumps_compact(naive)):>17}")
+
+    print(f"\nsession kept {len(session.recent)} recent turns, {len(session.summary)} summary lines, "
+          f"{session.omitted_turns} omitted turns (budget={args.token_budget})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
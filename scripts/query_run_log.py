@@ -0,0 +1,94 @@
+from __future__ import annotations
+# Module: entry_shell
+# Boundary: do NOT import app.tools/* or app.agents.plan_executor/plan_validator directly
+# See: docs/architecture/modules.md
+
+"""
+Query the persistent agent run log (written by run_agent_once_json(run_log=...)).
+
+Examples:
+  PYTHONPATH=. python scripts/query_run_log.py --since 24h
+  PYTHONPATH=. python scripts/query_run_log.py --since 7d --group-by prompt_version
+  PYTHONPATH=. python scripts/query_run_log.py --since 2026-01-01 --until 2026-01-08 --group-by day --json
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.agents.run_log import DEFAULT_RUN_LOG_PATH, RunLog, summarize_runs
+
+_UNITS = {"m": 60.0, "h": 3600.0, "d": 86400.0}
+
+
+def parse_time(value: Optional[str]) -> Optional[float]:
+    """
+    Relative ("30m", "24h", "7d" = that long ago) or ISO date/datetime (UTC if no offset).
+    """
+    if not value:
+        return None
+    v = value.strip()
+    if v[-1:] in _UNITS and v[:-1].replace(".", "", 1).isdigit():
+        return time.time() - float(v[:-1]) * _UNITS[v[-1]]
+    dt = datetime.fromisoformat(v)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Latency percentiles and failure rates from the agent run log.")
+    parser.add_argument("--db", default=DEFAULT_RUN_LOG_PATH, help=f"Run log SQLite file (default: {DEFAULT_RUN_LOG_PATH}).")
+    parser.add_argument("--since", default=None, help="Window start: 30m / 24h / 7d or ISO date (UTC).")
+    parser.add_argument("--until", default=None, help="Window end: same formats as --since.")
+    parser.add_argument("--prompt-version", default=None, help="Only runs with this prompt_version.")
+    parser.add_argument(
+        "--group-by",
+        choices=["prompt_version", "hour", "day"],
+        default=None,
+        help="Split the summary by prompt version or UTC time bucket.",
+    )
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON.")
+    args = parser.parse_args()
+
+    try:
+        since = parse_time(args.since)
+        until = parse_time(args.until)
+    except ValueError as e:
+        print(f"Error: invalid time: {e}", file=sys.stderr)
+        return 2
+
+    log = RunLog(args.db)
+    rows = log.query(since=since, until=until, prompt_version=args.prompt_version)
+    log.close()
+    summary = summarize_runs(rows, group_by=args.group_by)
+
+    if args.json:
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+        return 0
+
+    if not rows:
+        print("no runs in window")
+        return 0
+
+    header = f"{'group':<18} {'runs':>6} {'p50_ms':>9} {'p95_ms':>9} {'p99_ms':>9} {'repair':>7} {'replan':>7} {'exc':>6}  status / buckets"
+    print(header)
+    print("-" * len(header))
+    for key in sorted(summary):
+        s = summary[key]
+        lat = s["latency_ms"]
+        counts = ", ".join(f"{k}={v}" for k, v in sorted({**s["task_status"], **s["buckets"]}.items()))
+        print(
+            f"{key:<18} {s['runs']:>6} {lat['p50']:>9.0f} {lat['p95']:>9.0f} {lat['p99']:>9.0f} "
+            f"{s['repair_rate']:>7.1%} {s['replan_rate']:>7.1%} {s['exception_rate']:>6.1%}  {counts}"
+        )
+        if "avg_completion_tokens" in s:
+            print(f"{'':<18} avg tokens: prompt={s['avg_prompt_tokens']:.0f} completion={s['avg_completion_tokens']:.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
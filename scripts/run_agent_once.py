@@ -6,11 +6,26 @@ from __future__ import annotations
 import argparse
 import json
 import sys
-import time
+import uuid
 from pathlib import Path
-from typing import Any, Dict, Optional
-
-from app.agents.runner import load_text, run_agent_once_json
+from typing import Optional
+
+from app.agents.fast_path import FastPathPlanner, load_intent_rules
+from app.agents.plan_cache import PlanCache, SqlitePlanCacheBackend
+from app.agents.checkpoint_store import SqliteCheckpointStore
+from app.agents.plan_executor import ToolResultCache, resume_plan
+from app.agents.semantic_plan_cache import HashingEmbedder, SemanticPlanCache
+from app.services.embedding_service import EmbeddingService
+from app.agents.run_log import RunLog
+from app.agents.runner import (
+    DEFAULT_PLAN_DEADLINE_S,
+    AgentRunResult,
+    finalize_output,
+    load_text,
+    run_agent_many,
+    run_agent_once_json,
+    unknown_tool_stats,
+)
 
 
 def save_text(path: str, content: str) -> None:
@@ -19,66 +34,6 @@ def save_text(path: str, content: str) -> None:
     p.write_text(content, encoding="utf-8")
 
 
-def _get_task_status(payload: Dict[str, Any]) -> Optional[str]:
-    """
-    Best-effort extract task_status from execution_results.__meta__.
-    Returns: "COMPLETED"/"FAILED"/"BLOCKED"/"PARTIAL"/None
-    """
-    results = payload.get("execution_results")
-    if not isinstance(results, list):
-        return None
-    for r in results:
-        if isinstance(r, dict) and r.get("step_id") == "__meta__":
-            v = r.get("task_status")
-            return v if isinstance(v, str) else None
-    return None
-
-
-def _classify_exception(e: Exception) -> str:
-    """
-    Classify failures into stable buckets for repeat stats.
-    This is intentionally string-based to avoid coupling runner internals.
-    """
-    msg = str(e) or ""
-    msg_low = msg.lower()
-
-    # Rate limit / quota / permission restrictions
-    # Example seen in your logs:
-    # PermissionDeniedError: Error code: 403 - RPM limit exceeded. Please complete identity verification...
-    if "rpm limit exceeded" in msg_low or "rate limit" in msg_low:
-        return "rate_limited"
-    if "error code: 403" in msg_low and ("limit" in msg_low or "rpm" in msg_low):
-        return "rate_limited"
-
-    # JSON/repair related
-    if "repair output is still not valid json" in msg_low:
-        return "repair_json_failed"
-    if "no json object found" in msg_low:
-        return "parse_json_failed"
-    if "jsondecodeerror" in msg_low:
-        return "parse_json_failed"
-    if "not valid json" in msg_low and "repair" not in msg_low:
-        return "parse_json_failed"
-
-    # validator related (contract)
-    if "plan contract validation failed" in msg_low:
-        return "validator_failed"
-    if "step_id sequence must start from step_1" in msg_low:
-        return "validator_failed"
-    if "step_id sequence must be contiguous" in msg_low:
-        return "validator_failed"
-
-    # strict-degraded related
-    if "strict degraded" in msg_low:
-        return "validator_failed"
-
-    # infra / empty output
-    if "model output is empty" in msg_low:
-        return "empty_output"
-
-    return "other_exception"
-
-
 def main() -> None:
     parser = argparse.ArgumentParser(description="Run a single agent call with strict JSON output.")
     parser.add_argument("query", nargs="?", help="User query text")
@@ -120,7 +75,13 @@ def main() -> None:
         "--sleep-ms",
         type=int,
         default=0,
-        help="Sleep milliseconds between runs (repeat mode only).",
+        help="Minimum milliseconds between run submissions (repeat mode only).",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Number of runs in flight at once (repeat mode only).",
     )
     parser.add_argument(
         "--stop-on-rate-limit",
@@ -128,11 +89,164 @@ def main() -> None:
         help="Stop repeating immediately if a rate limit is hit (recommended for clean stats).",
     )
 
+    # ✅ Validated-plan cache (optional, persistent)
+    parser.add_argument(
+        "--plan-cache",
+        default=None,
+        help="Enable the validated-plan cache backed by this SQLite file (e.g. docs-private/_cache/plan_cache.sqlite3).",
+    )
+    parser.add_argument(
+        "--plan-cache-ttl",
+        type=float,
+        default=3600.0,
+        help="Plan cache TTL in seconds (default: 3600).",
+    )
+
+    # ✅ Tool result cache (memoize pure tool calls across steps / replans / repeat runs)
+    parser.add_argument(
+        "--tool-cache",
+        action="store_true",
+        help="Memoize pure tool calls (echo / search / summarize) in memory; rows served from it are marked cached.",
+    )
+
+    # ✅ Semantic plan cache (reuse plans of near-duplicate inputs)
+    parser.add_argument(
+        "--semantic-cache",
+        type=float,
+        default=None,
+        metavar="THRESHOLD",
+        help="Reuse cached plans of inputs with cosine similarity >= THRESHOLD (e.g. 0.9).",
+    )
+    parser.add_argument(
+        "--semantic-cache-shadow",
+        action="store_true",
+        help="Semantic cache in shadow mode: never reuse, only compare and report calibration.",
+    )
+    parser.add_argument(
+        "--semantic-embedder",
+        choices=["hashing", "openai"],
+        default="hashing",
+        help="Embedder for the semantic cache: local hashing (default, shadow mode only) or OPENAI_EMBEDDING_MODEL.",
+    )
+
+    # ✅ Rule-based fast path (skip the LLM planner for known intents)
+    parser.add_argument(
+        "--fast-path",
+        action="store_true",
+        help="Plan known intents (time / search / search+summarize / echo) without an LLM call.",
+    )
+    parser.add_argument(
+        "--fast-path-rules",
+        default=None,
+        help="JSON intent table replacing the built-in fast-path rules (implies --fast-path).",
+    )
+
+    # ✅ Replan prompt form
+    parser.add_argument(
+        "--replan-mode",
+        choices=["compact", "full"],
+        default="compact",
+        help="Replan prompt form: compact delta view (default) or the full previous payload.",
+    )
+
+    # ✅ Speculative planning (trade tokens for tail latency)
+    parser.add_argument(
+        "--speculative",
+        type=int,
+        default=1,
+        help="Race K planner calls and execute the first valid plan (default: 1 = off).",
+    )
+
+    # ✅ Pipelined planning (execute steps while the plan streams)
+    parser.add_argument(
+        "--pipelined",
+        action="store_true",
+        help="Stream the planner output and start executing steps as they arrive.",
+    )
+
+    # ✅ DAG-parallel step execution
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=1,
+        help="Run independent plan steps concurrently on N threads (default: 1 = sequential).",
+    )
+    parser.add_argument(
+        "--plan-deadline",
+        type=float,
+        default=DEFAULT_PLAN_DEADLINE_S,
+        help=(
+            "Time budget in seconds for executing a plan; steps past it are marked TIMEOUT "
+            f"(default: {DEFAULT_PLAN_DEADLINE_S:g}; 0 = no budget)."
+        ),
+    )
+
+    # ✅ Persistent run log (query with scripts/query_run_log.py)
+    parser.add_argument(
+        "--run-log",
+        default=None,
+        help="Append one row per run to this SQLite run log (e.g. docs-private/_runs/run_log.sqlite3).",
+    )
+
+    # ✅ Step checkpoints (resume an interrupted run without recomputing finished steps)
+    parser.add_argument(
+        "--checkpoint",
+        default=None,
+        help="Save completed plan steps to this SQLite file (e.g. docs-private/_runs/checkpoints.sqlite3).",
+    )
+    parser.add_argument(
+        "--run-id",
+        default=None,
+        help="Run id to checkpoint under (default: generated and printed to stderr).",
+    )
+    parser.add_argument(
+        "--resume",
+        metavar="RUN_ID",
+        default=None,
+        help="Finish the checkpointed plan of RUN_ID (needs --checkpoint; no planner call).",
+    )
+
+    # ✅ Planner output format
+    parser.add_argument(
+        "--wire-format",
+        choices=["canonical", "compact"],
+        default="canonical",
+        help="Planner generation schema: full plan contract (default) or compact short-key form expanded locally.",
+    )
+
+    # ✅ Per-phase timings (__meta__.timings)
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Record per-phase/per-attempt timing spans into __meta__.timings.",
+    )
+
     args = parser.parse_args()
+    if args.plan_deadline is not None and args.plan_deadline <= 0:
+        args.plan_deadline = None
+
+    checkpoint: Optional[SqliteCheckpointStore] = SqliteCheckpointStore(args.checkpoint) if args.checkpoint else None
+    if args.resume:
+        if checkpoint is None:
+            print("Error: --resume requires --checkpoint", file=sys.stderr)
+            raise SystemExit(2)
+        try:
+            executed = resume_plan(args.resume, checkpoint=checkpoint, deadline_s=args.plan_deadline)
+        except KeyError as e:
+            print(f"Error: {e.args[0]}", file=sys.stderr)
+            raise SystemExit(2)
+        print(json.dumps(finalize_output(executed, args.debug), ensure_ascii=False, indent=2))
+        return
+    if checkpoint is not None and args.repeat != 1:
+        print("Error: --checkpoint applies to a single run (--repeat 1)", file=sys.stderr)
+        raise SystemExit(2)
 
     if args.repeat < 1:
         print("Error: --repeat must be >= 1", file=sys.stderr)
         raise SystemExit(2)
+    if args.concurrency < 1:
+        print("Error: --concurrency must be >= 1", file=sys.stderr)
+        raise SystemExit(2)
 
     if args.input_file:
         user_input = load_text(args.input_file).strip()
@@ -142,8 +256,44 @@ def main() -> None:
         print("Error: provide query text or --input-file", file=sys.stderr)
         raise SystemExit(2)
 
+    plan_cache: Optional[PlanCache] = None
+    if args.plan_cache:
+        plan_cache = PlanCache(
+            ttl_seconds=args.plan_cache_ttl,
+            backend=SqlitePlanCacheBackend(args.plan_cache),
+        )
+
+    run_log: Optional[RunLog] = RunLog(args.run_log) if args.run_log else None
+    tool_cache: Optional[ToolResultCache] = ToolResultCache() if args.tool_cache else None
+
+    semantic_cache: Optional[SemanticPlanCache] = None
+    if args.semantic_cache is not None or args.semantic_cache_shadow:
+        if not args.semantic_cache_shadow and args.semantic_embedder == "hashing":
+            print(
+                "Error: --semantic-cache reuses plans and needs --semantic-embedder openai "
+                "(the hashing embedder is for --semantic-cache-shadow)",
+                file=sys.stderr,
+            )
+            raise SystemExit(2)
+        embedder = EmbeddingService() if args.semantic_embedder == "openai" else HashingEmbedder()
+        semantic_cache = SemanticPlanCache(
+            embedder,
+            threshold=args.semantic_cache if args.semantic_cache is not None else 0.9,
+            shadow=args.semantic_cache_shadow,
+        )
+
+    fast_path: Optional[FastPathPlanner] = None
+    if args.fast_path_rules:
+        fast_path = FastPathPlanner(load_intent_rules(args.fast_path_rules))
+    elif args.fast_path:
+        fast_path = FastPathPlanner()
+
     # --- Single run: keep old behavior ---
     if args.repeat == 1:
+        run_id = args.run_id
+        if checkpoint is not None and run_id is None:
+            run_id = uuid.uuid4().hex
+            print(f"checkpoint run_id: {run_id}", file=sys.stderr)
         payload = run_agent_once_json(
             user_input,
             prompt_path="app/prompts/system/agent_system.md",
@@ -152,6 +302,20 @@ def main() -> None:
             schema_enabled=not args.no_schema,
             expected_steps=args.expected_steps,  # type: ignore[arg-type]
             strict_degraded=args.strict_degraded,
+            plan_cache=plan_cache,
+            replan_mode=args.replan_mode,
+            speculative_k=args.speculative,
+            record_timings=args.timings,
+            fast_path=fast_path,
+            wire_format=args.wire_format,
+            run_log=run_log,
+            pipelined=args.pipelined,
+            semantic_cache=semantic_cache,
+            max_workers=args.max_workers,
+            plan_deadline_s=args.plan_deadline,
+            tool_cache=tool_cache,
+            run_id=run_id,
+            checkpoint=checkpoint,
         )
 
         pretty = json.dumps(payload, ensure_ascii=False, indent=2)
@@ -163,87 +327,49 @@ def main() -> None:
         return
 
     # --- Repeat mode ---
-    stats: Dict[str, int] = {
-        "total_runs": 0,
-        "effective_runs": 0,  # excluding rate_limited runs
-        "success_runs": 0,
-        "exception_runs": 0,
-        "execution_failed_runs": 0,
-        "execution_blocked_runs": 0,
-        "execution_completed_runs": 0,
-        "execution_partial_runs": 0,
-        "rate_limited": 0,
-        "parse_json_failed": 0,
-        "repair_json_failed": 0,
-        "validator_failed": 0,
-        "empty_output": 0,
-        "other_exception": 0,
-    }
-
-    last_payload: Optional[Dict[str, Any]] = None
-    last_exception: Optional[str] = None
-    stopped_early: bool = False
-
-    for i in range(1, args.repeat + 1):
-        stats["total_runs"] += 1
-        try:
-            payload = run_agent_once_json(
-                user_input,
-                prompt_path="app/prompts/system/agent_system.md",
-                temperature=0.2,
-                debug=args.debug,
-                schema_enabled=not args.no_schema,
-                expected_steps=args.expected_steps,  # type: ignore[arg-type]
-                strict_degraded=args.strict_degraded,
-            )
-            last_payload = payload
-            last_exception = None
-
-            task_status = _get_task_status(payload)
-
-            # Effective run (not rate limit)
-            stats["effective_runs"] += 1
-
-            if task_status == "COMPLETED":
-                stats["execution_completed_runs"] += 1
-                stats["success_runs"] += 1
-            elif task_status == "FAILED":
-                stats["execution_failed_runs"] += 1
-            elif task_status == "BLOCKED":
-                stats["execution_blocked_runs"] += 1
-            elif task_status == "PARTIAL":
-                stats["execution_partial_runs"] += 1
-            else:
-                # No meta row: still count as success (no exception)
-                stats["success_runs"] += 1
-
-            if args.print_each:
-                pretty = json.dumps(payload, ensure_ascii=False, indent=2)
-                print(f"\n===== RUN {i}/{args.repeat} =====")
-                print(pretty)
-
-        except Exception as e:
-            last_payload = None
-            last_exception = f"{type(e).__name__}: {e}"
-            stats["exception_runs"] += 1
-
-            bucket = _classify_exception(e)
-            stats[bucket] = stats.get(bucket, 0) + 1
-
-            # Do NOT count rate-limited runs as effective samples
-            if bucket != "rate_limited":
-                stats["effective_runs"] += 1
-
-            if args.print_each:
-                print(f"\n===== RUN {i}/{args.repeat} (EXCEPTION) =====")
-                print(last_exception, file=sys.stderr)
-
-            if bucket == "rate_limited" and args.stop_on_rate_limit:
-                stopped_early = True
-                break
-
-        if args.sleep_ms > 0 and i != args.repeat:
-            time.sleep(args.sleep_ms / 1000.0)
+    def _print_run(r: AgentRunResult) -> None:
+        if not args.print_each:
+            return
+        if r.bucket is not None:
+            print(f"\n===== RUN {r.index}/{args.repeat} (EXCEPTION) =====")
+            print(r.error, file=sys.stderr)
+            return
+        pretty = json.dumps(r.payload, ensure_ascii=False, indent=2)
+        print(f"\n===== RUN {r.index}/{args.repeat} =====")
+        print(pretty)
+
+    report = run_agent_many(
+        [user_input] * args.repeat,
+        concurrency=args.concurrency,
+        on_result=_print_run,
+        stop_on_rate_limit=args.stop_on_rate_limit,
+        submit_interval_s=args.sleep_ms / 1000.0,
+        prompt_path="app/prompts/system/agent_system.md",
+        temperature=0.2,
+        debug=args.debug,
+        schema_enabled=not args.no_schema,
+        expected_steps=args.expected_steps,
+        strict_degraded=args.strict_degraded,
+        plan_cache=plan_cache,
+        replan_mode=args.replan_mode,
+        speculative_k=args.speculative,
+        record_timings=args.timings,
+        fast_path=fast_path,
+        wire_format=args.wire_format,
+        run_log=run_log,
+        pipelined=args.pipelined,
+        semantic_cache=semantic_cache,
+        max_workers=args.max_workers,
+        plan_deadline_s=args.plan_deadline,
+        tool_cache=tool_cache,
+    )
+    stats = report.stats
+    latency = report.latency_ms
+    stopped_early = report.stopped_early
+
+    last = report.last_result
+    last_payload = last.payload if last is not None else None
+    last_exception = last.error if last is not None else None
 
     # Print summary
     print("\n==================== REPEAT SUMMARY ====================")
@@ -253,6 +379,7 @@ def main() -> None:
     print(f"expected_steps: {args.expected_steps}")
     print(f"strict_degraded: {args.strict_degraded}")
     print(f"sleep_ms: {args.sleep_ms}")
+    print(f"concurrency: {args.concurrency}")
     print(f"stop_on_rate_limit: {args.stop_on_rate_limit}")
     print("--------------------------------------------------------")
     print(f"total_runs: {stats['total_runs']}")
@@ -267,6 +394,7 @@ def main() -> None:
     print(f"  FAILED:    {stats['execution_failed_runs']}")
     print(f"  BLOCKED:   {stats['execution_blocked_runs']}")
     print(f"  PARTIAL:   {stats['execution_partial_runs']}")
+    print(f"  TIMEOUT:   {stats['execution_timeout_runs']}")
     print("--------------------------------------------------------")
     print("exception_buckets:")
     print(f"  rate_limited:        {stats['rate_limited']}")
@@ -275,6 +403,41 @@ def main() -> None:
     print(f"  validator_failed:    {stats['validator_failed']}")
     print(f"  empty_output:        {stats['empty_output']}")
     print(f"  other_exception:     {stats['other_exception']}")
+    print("--------------------------------------------------------")
+    print("latency_ms (all finished runs):")
+    print(f"  p50: {latency['p50']:.1f}  p90: {latency['p90']:.1f}  p95: {latency['p95']:.1f}  p99: {latency['p99']:.1f}")
+    print(f"  max: {latency['max']:.1f}  mean: {latency['mean']:.1f}")
+    unknown = unknown_tool_stats()
+    print("--------------------------------------------------------")
+    print("unknown_tools (LLM plans referencing tools the registry cannot dispatch):")
+    print(f"  plans: {unknown['plans']}  unknown_tool_plans: {unknown['unknown_tool_plans']}  "
+          f"rate: {unknown['unknown_tool_rate']:.2%}  tools: {unknown['tools']}")
+    if fast_path is not None:
+        fp = fast_path.stats()
+        print("--------------------------------------------------------")
+        print("fast_path:")
+        print(f"  lookups: {fp['lookups']}  hits: {fp['hits']}  fallbacks: {fp['fallbacks']}")
+        print(f"  bypass_rate: {fp['bypass_rate']:.2%}  rules: {fp['rules']}")
+    if semantic_cache is not None:
+        sc = semantic_cache.stats()
+        print("--------------------------------------------------------")
+        print(f"semantic_cache (threshold={sc['threshold']}, shadow={sc['shadow']}):")
+        print(f"  lookups: {sc['lookups']}  hits: {sc['hits']}  hit_rate: {sc['hit_rate']:.2%}  "
+              f"false_reuse: {sc['false_reuse']} ({sc['false_reuse_rate']:.2%})  size: {sc['size']}")
+        if sc["shadow"]:
+            print(f"  shadow: compared={sc['shadow_compared']}  would_hit={sc['shadow_would_hit']}  "
+                  f"false_reuse={sc['shadow_false_reuse']} ({sc['shadow_false_reuse_rate']:.2%})")
+            for row in semantic_cache.calibration():
+                print(f"    threshold {row['threshold']:.2f}: hit_rate={row['hit_rate']:.2%}  "
+                      f"false_reuse_rate={row['false_reuse_rate']:.2%}")
+    if tool_cache is not None:
+        tc = tool_cache.stats()
+        print("--------------------------------------------------------")
+        print("tool_cache:")
+        print(f"  hits: {tc['hits']}  misses: {tc['misses']}  hit_rate: {tc['hit_rate']:.2%}  "
+              f"size: {tc['size']}  bytes: {tc['bytes']}  evictions: {tc['evictions']}")
+        for name, ts in tc["tools"].items():
+            print(f"    {name}: hits={ts['hits']}  misses={ts['misses']}")
     print("========================================================")
 
     if last_payload is not None:
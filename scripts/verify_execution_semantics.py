@@ -1,9 +1,19 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import tempfile
 from typing import Any, Dict, Literal, Tuple
 
-from app.agents.plan_executor import execute_plan
+from app.agents.checkpoint_store import DirCheckpointStore, SqliteCheckpointStore
+from app.agents.plan_executor import (
+    ToolResultCache,
+    execute_plan,
+    execute_plan_aiter,
+    execute_plan_async,
+    execute_plan_iter,
+    resume_plan,
+)
 from app.agents.plan_validator import validate_execution_results, validate_plan_payload
 
 from pathlib import Path
@@ -56,6 +66,290 @@ def _assert_task_status(meta: Dict[str, Any], expected: str) -> list[str]:
     return errs
 
 
+def _verify_incremental_reuse() -> list[str]:
+    """
+    Replan reuse: unchanged upstream steps are carried forward; changed steps and
+    everything downstream of them re-execute.
+    """
+    errs: list[str] = []
+    first = _base_payload(
+        "first attempt fails at step_2",
+        steps=[
+            _base_step("step_1", title="search", dependencies=[], tool_name="search_tool", tool_args={"query": "workflow"}),
+            _base_step("step_2", title="unknown tool", dependencies=["step_1"], tool_name="no_such_tool"),
+            _base_step(
+                "step_3",
+                title="summarize",
+                dependencies=["step_2"],
+                tool_name="summarize_tool",
+                tool_args={"docs": "$step_1.output.docs"},
+            ),
+        ],
+    )
+    second = json.loads(json.dumps(first))
+    second["steps"][1]["tool"] = {"name": "echo_tool", "args": {"text": "replanned"}}
+
+    prev = execute_plan(first)["execution_results"]
+    out = execute_plan(second, reuse_results=prev)["execution_results"]
+
+    reused = [r.get("step_id") for r in out if r.get("reused") is True]
+    if reused != ["step_1"]:
+        errs.append(f"expected only step_1 reused, got {reused}")
+    if out[-1].get("task_status") != "COMPLETED":
+        errs.append(f"task_status expected COMPLETED, got {out[-1].get('task_status')}")
+    errs.extend(validate_execution_results(out))
+    return errs
+
+
+def _verify_executor_parity(payload: Dict[str, Any], expected_results: list[Dict[str, Any]]) -> list[str]:
+    """
+    execute_plan_async and the DAG-parallel executors (threads / asyncio tasks, max_workers=N)
+    must produce exactly the execution_results of sequential execute_plan.
+    """
+    errs: list[str] = []
+    variants = {
+        "execute_plan_async": lambda p: asyncio.run(execute_plan_async(p)),
+        "execute_plan(max_workers=4)": lambda p: execute_plan(p, max_workers=4),
+        "execute_plan_async(max_workers=4)": lambda p: asyncio.run(execute_plan_async(p, max_workers=4)),
+    }
+    for label, run in variants.items():
+        actual = run(json.loads(json.dumps(payload))).get("execution_results", [])
+        if json.dumps(actual, sort_keys=True) != json.dumps(expected_results, sort_keys=True):
+            errs.append(f"{label} execution_results differ from execute_plan")
+    return errs
+
+
+def _verify_parallel_branches() -> list[str]:
+    """
+    Independent branches under max_workers: one branch fails, the other completes; a step that
+    references a non-dependency upstream output waits for it. Rows must match sequential order.
+    """
+    payload = _base_payload(
+        "two independent branches, one failing",
+        steps=[
+            _base_step("step_1", title="search a", dependencies=[], tool_name="search_tool", tool_args={"query": "workflow"}),
+            _base_step("step_2", title="unknown tool", dependencies=[], tool_name="no_such_tool"),
+            _base_step("step_3", title="search b", dependencies=[], tool_name="search_tool", tool_args={"query": "note"}),
+            _base_step("step_4", title="blocked by step_2", dependencies=["step_2"], tool_name="get_time"),
+            _base_step(
+                "step_5",
+                title="summarize a (ref only)",
+                dependencies=["step_3"],
+                tool_name="summarize_tool",
+                tool_args={"docs": "$step_1.output.docs"},
+            ),
+        ],
+    )
+    sequential = execute_plan(json.loads(json.dumps(payload)))["execution_results"]
+    parallel = execute_plan(json.loads(json.dumps(payload)), max_workers=4)["execution_results"]
+    concurrent = asyncio.run(execute_plan_async(json.loads(json.dumps(payload)), max_workers=4))["execution_results"]
+    errs: list[str] = []
+    if json.dumps(parallel, sort_keys=True) != json.dumps(sequential, sort_keys=True):
+        errs.append("execute_plan(max_workers=4) differs from sequential execution")
+    if json.dumps(concurrent, sort_keys=True) != json.dumps(sequential, sort_keys=True):
+        errs.append("execute_plan_async(max_workers=4) differs from sequential execution")
+    if [r.get("step_id") for r in parallel] != ["step_1", "step_2", "step_3", "step_4", "step_5", "__meta__"]:
+        errs.append("parallel execution_results are not in plan order")
+    if parallel[-1].get("task_status") != "FAILED":
+        errs.append(f"task_status expected FAILED, got {parallel[-1].get('task_status')}")
+    if parallel[4].get("ok") is not True:
+        errs.append("step_5 should resolve $step_1.output.docs and complete")
+    errs.extend(validate_execution_results(parallel))
+    return errs
+
+
+def _verify_event_stream() -> list[str]:
+    """
+    execute_plan_iter / execute_plan_aiter: every step gets one step_finished or step_skipped
+    (step_finished only after its step_started), meta comes last, and the rows placed by index
+    equal execute_plan's; stopping at the first failure starts no further steps.
+    """
+    payload = _base_payload(
+        "event stream",
+        steps=[
+            _base_step("step_1", title="search", dependencies=[], tool_name="search_tool", tool_args={"query": "rag"}),
+            _base_step("step_2", title="unknown tool", dependencies=[], tool_name="no_such_tool"),
+            _base_step("step_3", title="blocked by step_2", dependencies=["step_2"], tool_name="get_time"),
+            _base_step("step_4", title="echo", dependencies=["step_1"], tool_name="echo_tool", tool_args={"text": "x"}),
+        ],
+    )
+    expected = execute_plan(json.loads(json.dumps(payload)))["execution_results"]
+
+    async def _collect_async(**kw: Any) -> list[Dict[str, Any]]:
+        return [e async for e in execute_plan_aiter(json.loads(json.dumps(payload)), **kw)]
+
+    errs: list[str] = []
+    streams = {
+        "execute_plan_iter": list(execute_plan_iter(json.loads(json.dumps(payload)))),
+        "execute_plan_iter(max_workers=4)": list(execute_plan_iter(json.loads(json.dumps(payload)), max_workers=4)),
+        "execute_plan_aiter(max_workers=4)": asyncio.run(_collect_async(max_workers=4)),
+    }
+    for label, events in streams.items():
+        if not events or events[-1].get("event") != "meta":
+            errs.append(f"{label}: meta must be the last event")
+            continue
+        started: set[int] = set()
+        rows: Dict[int, Dict[str, Any]] = {}
+        for e in events[:-1]:
+            i = e.get("index")
+            if e.get("event") == "step_started":
+                started.add(i)
+            elif e.get("event") in ("step_finished", "step_skipped"):
+                if i in rows:
+                    errs.append(f"{label}: step index {i} finished twice")
+                if (e["event"] == "step_finished") != (i in started):
+                    errs.append(f"{label}: step index {i} finished without step_started (or skipped after it)")
+                rows[i] = e["result"]
+            else:
+                errs.append(f"{label}: unexpected event {e.get('event')}")
+        collected = [rows.get(i) for i in range(len(payload["steps"]))] + [events[-1]["result"]]
+        if json.dumps(collected, sort_keys=True) != json.dumps(expected, sort_keys=True):
+            errs.append(f"{label}: collected rows differ from execute_plan")
+
+    seen: list[str] = []
+    for e in execute_plan_iter(json.loads(json.dumps(payload))):
+        seen.append(e["event"])
+        if "result" in e and e["result"].get("ok") is False:
+            break
+    if seen != ["step_started", "step_finished", "step_started", "step_finished"]:
+        errs.append(f"early stop on the first failure: unexpected events {seen}")
+    return errs
+
+
+def _verify_checkpoint_resume() -> list[str]:
+    """
+    Checkpointed execution interrupted after the first step (worker died): resume_plan reuses the
+    saved step, runs the rest, and returns what an uninterrupted execute_plan returns; a failed
+    step is not saved, so a second resume runs it again.
+    """
+    payload = _base_payload(
+        "checkpoint resume",
+        steps=[
+            _base_step("step_1", title="search", dependencies=[], tool_name="search_tool", tool_args={"query": "rag"}),
+            _base_step(
+                "step_2",
+                title="summarize",
+                dependencies=["step_1"],
+                tool_name="summarize_tool",
+                tool_args={"docs": "$step_1.output.docs"},
+            ),
+            _base_step("step_3", title="unknown tool", dependencies=["step_2"], tool_name="no_such_tool"),
+        ],
+    )
+    expected = execute_plan(json.loads(json.dumps(payload)))["execution_results"]
+    volatile = ("reused", "reused_from", "elapsed_ms")
+
+    def _strip(rows: list[Dict[str, Any]]) -> list[Dict[str, Any]]:
+        return [{k: v for k, v in r.items() if k not in volatile} for r in rows]
+
+    errs: list[str] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        stores = {
+            "sqlite": SqliteCheckpointStore(f"{tmp}/checkpoints.sqlite3"),
+            "dir": DirCheckpointStore(f"{tmp}/checkpoints"),
+        }
+        for label, store in stores.items():
+            for e in execute_plan_iter(json.loads(json.dumps(payload)), checkpoint=store, run_id="run_1"):
+                if e["event"] == "step_finished":
+                    break
+            if store.pending_runs() != ["run_1"]:
+                errs.append(f"{label}: interrupted run must be pending, got {store.pending_runs()}")
+
+            rows = resume_plan("run_1", checkpoint=store)["execution_results"]
+            if [r.get("reused") is True for r in rows[:-1]] != [True, False, False]:
+                errs.append(f"{label}: resume must reuse exactly the saved step_1")
+            if json.dumps(_strip(rows), sort_keys=True) != json.dumps(_strip(expected), sort_keys=True):
+                errs.append(f"{label}: resumed rows differ from an uninterrupted execute_plan")
+            saved = store.load("run_1")
+            if saved is None or not saved.finished or saved.task_status != "FAILED":
+                errs.append(f"{label}: resumed run must be recorded as finished (FAILED)")
+            elif sorted(r["step_id"] for r in saved.rows) != ["step_1", "step_2"]:
+                errs.append(f"{label}: only successful steps may be saved, got {[r['step_id'] for r in saved.rows]}")
+
+            rows = resume_plan("run_1", checkpoint=store)["execution_results"]
+            if [r.get("reused") is True for r in rows[:-1]] != [True, True, False]:
+                errs.append(f"{label}: second resume must reuse step_1 / step_2 and re-run step_3")
+            store.close()
+    return errs
+
+
+def _verify_timeouts() -> list[str]:
+    """
+    Plan deadline already passed: no step starts, the first is skipped with "plan deadline
+    exceeded" and its dependent with "dependency timed out" (both timed_out); task_status is
+    TIMEOUT. Every executor variant must agree.
+    """
+    payload = _base_payload(
+        "plan deadline exhausted",
+        steps=[
+            {
+                **_base_step("step_1", title="search", dependencies=[], tool_name="search_tool", tool_args={"query": "rag"}),
+                "timeout_s": 5,
+            },
+            _base_step("step_2", title="needs step_1", dependencies=["step_1"], tool_name="echo_tool"),
+        ],
+    )
+    errs = [f"plan: {e}" for e in validate_plan_payload(payload)]
+    variants = {
+        "execute_plan": lambda p: execute_plan(p, deadline_s=0),
+        "execute_plan(max_workers=4)": lambda p: execute_plan(p, max_workers=4, deadline_s=0),
+        "execute_plan_async": lambda p: asyncio.run(execute_plan_async(p, deadline_s=0)),
+        "execute_plan_async(max_workers=4)": lambda p: asyncio.run(execute_plan_async(p, max_workers=4, deadline_s=0)),
+    }
+    for label, run in variants.items():
+        res = run(json.loads(json.dumps(payload)))["execution_results"]
+        s1, s2, meta = res
+        if not (s1.get("timed_out") and s1.get("skipped") and s1.get("reason") == "plan deadline exceeded"):
+            errs.append(f"{label}: step_1 should be skipped with 'plan deadline exceeded'")
+        if not (s2.get("timed_out") and s2.get("skipped") and "dependency timed out" in (s2.get("reason") or "")):
+            errs.append(f"{label}: step_2 should be skipped with 'dependency timed out'")
+        if meta.get("task_status") != "TIMEOUT" or meta.get("timeout_steps") != ["step_1", "step_2"]:
+            errs.append(f"{label}: expected TIMEOUT with timeout_steps [step_1, step_2], got {meta.get('task_status')}")
+        errs.extend(f"{label}: {e}" for e in validate_execution_results(res))
+    return errs
+
+
+def _verify_tool_cache() -> list[str]:
+    """
+    Pure tool calls are memoized: a duplicate step and a repeat run are served from the cache
+    (rows flagged cached, otherwise identical); impure tools (get_time) are never cached.
+    """
+    payload = _base_payload(
+        "duplicate searches",
+        steps=[
+            _base_step("step_1", title="search", dependencies=[], tool_name="search_tool", tool_args={"query": "rag"}),
+            _base_step("step_2", title="same search", dependencies=[], tool_name="search", tool_args={"query": "rag"}),
+            _base_step(
+                "step_3",
+                title="summarize",
+                dependencies=["step_1"],
+                tool_name="summarize_tool",
+                tool_args={"docs": "$step_1.output.docs"},
+            ),
+            _base_step("step_4", title="time", dependencies=[], tool_name="get_time"),
+        ],
+    )
+    cache = ToolResultCache()
+    plain = execute_plan(json.loads(json.dumps(payload)))["execution_results"]
+    first = execute_plan(json.loads(json.dumps(payload)), tool_cache=cache)["execution_results"]
+    second = execute_plan(json.loads(json.dumps(payload)), tool_cache=cache)["execution_results"]
+
+    errs: list[str] = []
+    if [bool(r.get("cached")) for r in first[:4]] != [False, True, False, False]:
+        errs.append("first run: only the duplicate search (alias of search_tool) should be cached")
+    if [bool(r.get("cached")) for r in second[:4]] != [True, True, True, False]:
+        errs.append("second run: every pure call should be cached, get_time never")
+    for label, res in (("first", first), ("second", second)):
+        for a, b in zip(plain[:3], res[:3]):
+            if a.get("output") != b.get("output") or a.get("fingerprint") != b.get("fingerprint"):
+                errs.append(f"{label} run: cached row {b.get('step_id')} differs from the uncached one")
+        errs.extend(f"{label} run: {e}" for e in validate_execution_results(res))
+    tools = cache.stats()["tools"]
+    if tools.get("search_tool", {}).get("hits") != 3 or "get_time" in tools:
+        errs.append(f"unexpected per-tool stats: {tools}")
+    return errs
+
+
 def main() -> int:
     # Keep docs/samples in sync with the current contract.
     gen = Path("scripts/generate_samples.py")
@@ -267,6 +561,48 @@ def main() -> int:
             print(f"\n[FAIL] [{name}] task_status assertion failed")
             return 1
 
+        parity_errs = _verify_executor_parity(payload, exec_results)
+        if parity_errs:
+            _print(f"[{name}] executor parity errors", parity_errs)
+            print(f"\n[FAIL] [{name}] async / parallel execution diverged from execute_plan")
+            return 1
+
+    reuse_errors = _verify_incremental_reuse()
+    _print("[incremental_reuse] assertion errors", reuse_errors)
+    if reuse_errors:
+        print("\n[FAIL] [incremental_reuse] reuse semantics assertion failed")
+        return 1
+
+    cache_errors = _verify_tool_cache()
+    _print("[tool_cache] assertion errors", cache_errors)
+    if cache_errors:
+        print("\n[FAIL] [tool_cache] tool result cache semantics assertion failed")
+        return 1
+
+    timeout_errors = _verify_timeouts()
+    _print("[timeouts] assertion errors", timeout_errors)
+    if timeout_errors:
+        print("\n[FAIL] [timeouts] timeout / deadline semantics assertion failed")
+        return 1
+
+    stream_errors = _verify_event_stream()
+    _print("[event_stream] assertion errors", stream_errors)
+    if stream_errors:
+        print("\n[FAIL] [event_stream] streaming execution events assertion failed")
+        return 1
+
+    checkpoint_errors = _verify_checkpoint_resume()
+    _print("[checkpoint_resume] assertion errors", checkpoint_errors)
+    if checkpoint_errors:
+        print("\n[FAIL] [checkpoint_resume] checkpoint / resume semantics assertion failed")
+        return 1
+
+    parallel_errors = _verify_parallel_branches()
+    _print("[parallel_branches] assertion errors", parallel_errors)
+    if parallel_errors:
+        print("\n[FAIL] [parallel_branches] DAG-parallel semantics assertion failed")
+        return 1
+
     print("\n[PASS] contract execution semantics verified")
     return 0
 
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from app.agents.debug_artifacts import DEFAULT_DEBUG_MAX_AGE_HOURS, writer_from_env
+
+
+@pytest.fixture
+def debug_env(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    root = tmp_path / "runs"
+    monkeypatch.setenv("AGENT_DEBUG_DIR", str(root))
+    for name in ("AGENT_DEBUG_SAMPLE_RATE", "AGENT_DEBUG_COMPRESS", "AGENT_DEBUG_MAX_MB", "AGENT_DEBUG_MAX_AGE_HOURS"):
+        monkeypatch.delenv(name, raising=False)
+    return root
+
+
+def _old_run(root: Path, run_id: str, age_hours: float) -> Path:
+    d = root / run_id
+    d.mkdir(parents=True)
+    f = d / "raw_attempt1.txt"
+    f.write_text("old", encoding="utf-8")
+    t = time.time() - age_hours * 3600.0
+    os.utime(f, (t, t))
+    return d
+
+
+def test_default_writer_prunes_old_runs(debug_env: Path) -> None:
+    writer = writer_from_env()
+    assert writer.max_total_bytes is not None
+    assert writer.max_age_seconds is not None
+
+    stale = _old_run(debug_env, "stale", DEFAULT_DEBUG_MAX_AGE_HOURS + 1)
+    recent = _old_run(debug_env, "recent", 1)
+    writer.submit("new", "raw_attempt1.txt", "fresh")
+    writer.close()
+
+    assert not stale.exists()
+    assert recent.exists()
+    assert (debug_env / "new" / "raw_attempt1.txt").read_text(encoding="utf-8") == "fresh"
+    assert writer.stats()["pruned_runs"] == 1
+
+
+def test_default_writer_caps_total_size(debug_env: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("AGENT_DEBUG_MAX_MB", "0.001")  # ~1 KB
+    writer = writer_from_env()
+    _old_run(debug_env, "older", 2).joinpath("big.txt").write_text("x" * 2048, encoding="utf-8")
+    writer.submit("new", "raw_attempt1.txt", "fresh")
+    writer.close()
+
+    assert not (debug_env / "older").exists()
+    assert (debug_env / "new").exists()
+
+
+def test_zero_disables_caps(debug_env: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("AGENT_DEBUG_MAX_MB", "0")
+    monkeypatch.setenv("AGENT_DEBUG_MAX_AGE_HOURS", "0")
+    writer = writer_from_env()
+    assert writer.max_total_bytes is None
+    assert writer.max_age_seconds is None
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import pytest
+
+from app.agents.fast_path import FastPathPlanner, IntentRule
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "search for RAG notes and email them to my manager",
+        "look up the weather in Paris then book me a flight",
+        "search RAG notes, then email the team",
+        "look up flights & hotels",
+        "search for X and summarize and email it",
+        "搜索RAG然后写一封邮件给老板",
+        "搜索RAG并发给老板",
+        "查找天气，然后订机票",
+        "repeat the analysis for 2024 and search for sales trends",
+        "echo hi and then search for weather in Paris",
+        "repeat the last search",
+        "echo hello world",
+        "echo: hi and then search for weather in Paris",
+        "echo: hi, then search for weather",
+    ],
+)
+def test_multi_intent_inputs_fall_back_to_llm(text: str) -> None:
+    assert FastPathPlanner().plan(text) is None
+
+
+@pytest.mark.parametrize(
+    "text, rule, query",
+    [
+        ("search for RAG notes", "search", "RAG notes"),
+        ("look up vector databases.", "search", "vector databases"),
+        ("搜索RAG", "search", "RAG"),
+        ("search for rag and summarize", "search_and_summarize", "rag"),
+        ("搜索RAG并总结", "search_and_summarize", "RAG"),
+    ],
+)
+def test_single_intent_search(text: str, rule: str, query: str) -> None:
+    match = FastPathPlanner().plan(text)
+    assert match is not None
+    assert match.rule == rule
+    assert match.plan["steps"][0]["tool"]["args"]["query"] == query
+
+
+def test_explicit_echo() -> None:
+    match = FastPathPlanner().plan("echo: hello world")
+    assert match is not None and match.rule == "echo"
+    assert match.plan["steps"][0]["tool"]["args"]["text"] == "hello world"
+
+
+def test_literal_braces_in_rule_template_do_not_fail_the_plan() -> None:
+    rule = IntentRule(
+        name="braces",
+        patterns=(r"show (?P<what>\w+)",),
+        task_summary="Show {what} as {\"json\": true} ({unknown})",
+        steps=({"tool": "echo_tool", "args": {"text": "{what} {}"}},),
+    )
+    match = FastPathPlanner([rule]).plan("show notes")
+    assert match is not None
+    assert match.plan["task_summary"] == 'Show notes as {"json": true} ({unknown})'
+    assert match.plan["steps"][0]["tool"]["args"]["text"] == "notes {}"
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import json
+
+from app.agents.plan_cache import PlanCache
+from app.agents.runner import run_agent_once_json
+
+
+def _plan(tool: str, args: dict) -> str:
+    step = {
+        "step_id": "step_1",
+        "title": "run",
+        "description": f"Execute {tool}.",
+        "dependencies": [],
+        "deliverable": "output",
+        "acceptance": "captured",
+        "tool": {"name": tool, "args": args},
+    }
+    return json.dumps({"task_summary": "t", "assumptions": [], "risks": [], "steps": [step]})
+
+
+class _ScriptedService:
+    def __init__(self, *outputs: str) -> None:
+        self.outputs = list(outputs)
+        self.calls = 0
+
+    def create(self, **kwargs) -> str:
+        self.calls += 1
+        return self.outputs.pop(0)
+
+
+def test_replanned_plan_that_completed_is_cached() -> None:
+    cache = PlanCache()
+    service = _ScriptedService(_plan("summarize_tool", {"docs": "not a list"}), _plan("echo_tool", {"text": "hi"}))
+    first = run_agent_once_json("say hi", service=service, plan_cache=cache)
+    assert service.calls == 2  # planner + replan
+    assert first["task_status"] == "COMPLETED" and first["plan_source"] == "llm"
+
+    again = _ScriptedService()
+    second = run_agent_once_json("say hi", service=again, plan_cache=cache)
+    assert again.calls == 0
+    assert second["plan_source"] == "plan_cache" and second["output"] == first["output"]
+
+
+def test_run_that_did_not_complete_is_not_cached() -> None:
+    cache = PlanCache()
+    bad = _plan("summarize_tool", {"docs": "not a list"})
+    run_agent_once_json("say hi", service=_ScriptedService(bad, bad), plan_cache=cache)
+    assert cache.stats()["size"] == 0
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import json
+import time
+
+import pytest
+
+from app.agents.plan_executor import IncrementalExecution
+from app.agents.plan_stream import StreamingStepParser
+from app.agents.runner import _stream_and_pre_execute
+from app.tools import registry
+from app.tools.base import ToolSpec, tool_cancelled
+
+
+def _step(i: int, tool: str = "echo_tool", args: dict | None = None) -> dict:
+    return {
+        "step_id": f"step_{i}",
+        "title": f"step {i}",
+        "description": f"Execute {tool}.",
+        "dependencies": [],
+        "deliverable": "output",
+        "acceptance": "captured",
+        "tool": {"name": tool, "args": args if args is not None else {"text": f"hi {i}"}},
+    }
+
+
+def _plan_text(*steps: dict) -> str:
+    return json.dumps({"task_summary": "t", "assumptions": [], "risks": [], "steps": list(steps)})
+
+
+def _hang(args):
+    end = time.monotonic() + 5.0
+    while not tool_cancelled() and time.monotonic() < end:
+        time.sleep(0.01)
+    return {}
+
+
+@pytest.fixture
+def hanging_tool(monkeypatch: pytest.MonkeyPatch) -> ToolSpec:
+    tool = ToolSpec(name="hang_tool", description="runs until cancelled", args_schema={}, handler=_hang)
+    monkeypatch.setitem(registry._TOOL_REGISTRY, tool.name, tool)
+    return tool
+
+
+class _StreamService:
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+    def create_stream(self, **kwargs):
+        for i in range(0, len(self.text), 7):
+            yield self.text[i : i + 7]
+
+
+def test_parser_buffer_stays_bounded_on_long_streams() -> None:
+    steps = [_step(i) for i in range(1, 201)]
+    text = "```json\n" + _plan_text(*steps)
+    parser = StreamingStepParser()
+    seen = []
+    longest = 0
+    for ch in text:
+        seen.extend(parser.feed(ch))
+        longest = max(longest, len(parser._text))
+    assert [s["step_id"] for s in seen] == [s["step_id"] for s in steps]
+    assert longest <= len(json.dumps(steps[-1])) + 1
+
+
+def test_incremental_execution_applies_the_plan_deadline() -> None:
+    runner = IncrementalExecution(deadline_s=0)
+    row = runner.add_step(_step(1))
+    assert row["skipped"] and row["timed_out"] and row["reason"] == "plan deadline exceeded"
+
+
+def test_pre_execution_does_not_outlive_the_plan_deadline(hanging_tool: ToolSpec) -> None:
+    service = _StreamService(_plan_text(_step(1, "hang_tool", {}), _step(2)))
+    t0 = time.monotonic()
+    call = _stream_and_pre_execute(
+        [], temperature=0.0, max_tokens=100, service=service, plan_deadline_s=0.2
+    )
+    assert time.monotonic() - t0 < 2.0
+    assert call.streamed_steps == 2
+    assert not any(r.get("ok") for r in call.pre_results)
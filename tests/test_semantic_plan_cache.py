@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import pytest
+
+from app.agents.semantic_plan_cache import HashingEmbedder, SemanticPlanCache, args_fit_input
+
+Q2020 = "search for the population of France in 2020"
+Q2021 = "search for the population of France in 2021"
+
+
+def _search_plan(query: str) -> dict:
+    return {"steps": [{"step_id": "step_1", "tool": "search", "args": {"query": query}, "dependencies": []}]}
+
+
+def _cache_with(cache: SemanticPlanCache, text: str, plan: dict) -> None:
+    cache.put(cache.embed(text), text, plan, scope="s")
+
+
+def test_different_year_is_not_reused() -> None:
+    cache = SemanticPlanCache(HashingEmbedder(), threshold=0.9, shadow=False)
+    _cache_with(cache, Q2020, _search_plan("population of France 2020"))
+
+    match = cache.lookup(cache.embed(Q2021), scope="s", user_input=Q2021)
+
+    assert match is not None and match.similarity >= 0.9  # lexically near-identical ...
+    assert not cache.usable(match)  # ... but the args would answer 2020
+    assert cache.stats()["arg_mismatch"] == 1
+
+
+def test_same_slots_are_reused() -> None:
+    cache = SemanticPlanCache(HashingEmbedder(), threshold=0.9, shadow=False)
+    _cache_with(cache, Q2020, _search_plan("population of France 2020"))
+    text = "Search for the population of France in 2020, please"
+
+    match = cache.lookup(cache.embed(text), scope="s", user_input=text)
+
+    assert cache.usable(match)
+    assert cache.record_outcome(match, ok=True, user_input=text)
+    assert cache.stats()["false_reuse"] == 0
+
+
+def test_completed_run_with_mismatched_args_is_a_false_reuse() -> None:
+    cache = SemanticPlanCache(HashingEmbedder(), threshold=0.9, shadow=False)
+    _cache_with(cache, Q2020, _search_plan("population of France 2020"))
+    match = cache.lookup(cache.embed(Q2020), scope="s", user_input=Q2020)
+
+    assert not cache.record_outcome(match, ok=True, user_input=Q2021)
+    stats = cache.stats()
+    assert stats["false_reuse"] == 1 and stats["size"] == 0
+
+
+@pytest.mark.parametrize(
+    "planned_for, text, query",
+    [
+        ("search for the population of France", "search for the population of Germany", "population of France"),
+        ('search for "vector db"', 'search for "graph db"', "vector db"),
+        ("搜索2020年法国人口", "搜索2021年法国人口", "2020年法国人口"),
+        ("search for rag notes", "search for agent notes", "rag notes"),
+    ],
+)
+def test_args_fit_input_rejects_other_args(planned_for: str, text: str, query: str) -> None:
+    assert not args_fit_input(_search_plan(query), planned_for, text)
+
+
+def test_hashing_embedder_is_shadow_only_by_default() -> None:
+    assert SemanticPlanCache().shadow
+    with pytest.raises(ValueError, match="embedder"):
+        SemanticPlanCache(shadow=False)
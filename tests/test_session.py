@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from app.agents import session as session_mod
+from app.agents.session import SessionStore
+
+
+def test_concurrent_first_turns_share_one_session(monkeypatch) -> None:
+    store = SessionStore()
+    real_session = session_mod.AgentSession
+
+    def slow_session(*args, **kwargs):
+        time.sleep(0.01)  # widen the window between lookup and insert
+        return real_session(*args, **kwargs)
+
+    monkeypatch.setattr(session_mod, "AgentSession", slow_session)
+    start = threading.Barrier(8)
+    got = []
+
+    def first_turn() -> None:
+        start.wait()
+        got.append(store.get_or_create("s-1"))
+
+    threads = [threading.Thread(target=first_turn) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len({id(s) for s in got}) == 1
+    assert store.stats()["created"] == 1
+
+
+def test_expired_session_is_replaced() -> None:
+    now = [0.0]
+    store = SessionStore(idle_ttl_seconds=10.0, clock=lambda: now[0])
+    first = store.get_or_create("s-1")
+    now[0] = 11.0
+    second = store.get_or_create("s-1")
+    assert second is not first
+    assert store.stats()["expired"] == 1 and store.stats()["created"] == 2
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import asyncio
+import signal
+import threading
+import time
+from typing import Any, Dict
+
+import pytest
+
+from app.tools.base import ToolSpec, ToolTimeoutError
+from app.tools.process_pool import ToolProcessPool
+
+
+def _sleep(args: Dict[str, Any]) -> Dict[str, Any]:
+    time.sleep(args["s"])
+    return {"slept": args["s"]}
+
+
+def _ignore_alarm(args: Dict[str, Any]) -> Dict[str, Any]:
+    signal.signal(signal.SIGALRM, signal.SIG_IGN)
+    time.sleep(args["s"])
+    return {}
+
+
+def _process_tool(name: str, handler: Any) -> ToolSpec:
+    return ToolSpec(name=name, description=name, args_schema={}, handler=handler, execution="process")
+
+
+@pytest.fixture
+def pool():
+    p = ToolProcessPool(max_workers=2)
+    p.warm()
+    yield p
+    p.shutdown()
+
+
+def test_worker_timeout_keeps_pool_and_concurrent_call(pool: ToolProcessPool) -> None:
+    slow, ok = _process_tool("slow", _sleep), _process_tool("ok", _sleep)
+    box: Dict[str, Any] = {}
+
+    def run_ok() -> None:
+        box["ok"] = pool.call(ok, {"s": 0.8})
+
+    t = threading.Thread(target=run_ok)
+    t.start()
+    with pytest.raises(ToolTimeoutError):
+        pool.call(slow, {"s": 5}, timeout_s=0.2)
+    t.join()
+
+    assert box["ok"] == {"slept": 0.8}
+    stats = pool.stats()
+    assert stats["timeouts"] == 1
+    assert stats["restarts"] == 0
+    assert stats["crashes"] == 0
+
+
+def test_worker_timeout_async_keeps_pool(pool: ToolProcessPool) -> None:
+    async def main() -> Any:
+        slow = pool.acall(_process_tool("slow", _sleep), {"s": 5}, timeout_s=0.2)
+        ok = pool.acall(_process_tool("ok", _sleep), {"s": 0.5})
+        return await asyncio.gather(slow, ok, return_exceptions=True)
+
+    slow_out, ok_out = asyncio.run(main())
+    assert isinstance(slow_out, ToolTimeoutError)
+    assert ok_out == {"slept": 0.5}
+    assert pool.stats()["restarts"] == 0
+
+
+def test_hung_worker_replaces_pool(pool: ToolProcessPool) -> None:
+    with pytest.raises(ToolTimeoutError):
+        pool.call(_process_tool("stuck", _ignore_alarm), {"s": 30}, timeout_s=0.2)
+    assert pool.stats()["restarts"] == 1
+    assert pool.call(_process_tool("ok", _sleep), {"s": 0}) == {"slept": 0}
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import inspect
+import threading
+import time
+
+import pytest
+
+from app.agents.plan_executor import execute_plan
+from app.agents.runner import DEFAULT_PLAN_DEADLINE_S, run_agent_once_json, run_agent_once_json_async
+from app.tools import registry
+from app.tools.base import EXECUTION_INLINE, MAX_TIMED_CALL_THREADS, ToolSpec, ToolTimeoutError, tool_cancelled
+from app.tools.search_tool import SEARCH_TOOL
+from app.tools.summarize_tool import SUMMARIZE_TOOL
+
+
+def _noop(args):
+    return {}
+
+
+@pytest.mark.parametrize("tool", [SEARCH_TOOL, SUMMARIZE_TOOL], ids=lambda t: t.name)
+def test_io_bound_tools_declare_a_timeout(tool: ToolSpec) -> None:
+    assert tool.timeout_s is not None and tool.timeout_s > 0
+
+
+def test_inline_tool_rejects_timeout() -> None:
+    with pytest.raises(ValueError, match="timeout_s"):
+        ToolSpec(name="t", description="", args_schema={}, handler=_noop, timeout_s=1.0, execution=EXECUTION_INLINE)
+
+
+@pytest.mark.parametrize("fn", [run_agent_once_json, run_agent_once_json_async], ids=lambda f: f.__name__)
+def test_runner_has_a_default_plan_deadline(fn) -> None:
+    assert DEFAULT_PLAN_DEADLINE_S > 0
+    assert inspect.signature(fn).parameters["plan_deadline_s"].default == DEFAULT_PLAN_DEADLINE_S
+
+
+def _slow_handler(args):
+    end = time.monotonic() + float(args.get("sleep_s", 2.0))
+    while time.monotonic() < end and not tool_cancelled():
+        time.sleep(0.01)
+    return {"slept": True}
+
+
+@pytest.fixture
+def slow_tool(monkeypatch: pytest.MonkeyPatch) -> ToolSpec:
+    tool = ToolSpec(name="slow_tool", description="sleeps", args_schema={}, handler=_slow_handler)
+    monkeypatch.setitem(registry._TOOL_REGISTRY, tool.name, tool)
+    return tool
+
+
+def _step(step_id: str, tool: str, *, deps=(), args=None, **extra) -> dict:
+    return {
+        "step_id": step_id,
+        "title": step_id,
+        "description": f"Execute {tool}.",
+        "dependencies": list(deps),
+        "deliverable": "output",
+        "acceptance": "captured",
+        "tool": {"name": tool, "args": args or {}},
+        **extra,
+    }
+
+
+def _plan(*steps: dict) -> dict:
+    return {"task_summary": "timeouts", "assumptions": [], "risks": [], "steps": list(steps)}
+
+
+def test_step_timeout_marks_step_and_task_timed_out(slow_tool: ToolSpec) -> None:
+    res = execute_plan(_plan(_step("step_1", "slow_tool", timeout_s=0.1)))["execution_results"]
+    row, meta = res[0], res[-1]
+    assert row["timed_out"] is True and row["ok"] is False
+    assert meta["task_status"] == "TIMEOUT"
+
+
+def test_plan_deadline_skips_unstarted_steps_and_dependents(slow_tool: ToolSpec) -> None:
+    plan = _plan(
+        _step("step_1", "slow_tool", args={"sleep_s": 0.3}),
+        _step("step_2", "echo_tool", args={"text": "late"}),
+        _step("step_3", "echo_tool", deps=["step_1"], args={"text": "after slow"}),
+    )
+    res = execute_plan(plan, deadline_s=0.1)["execution_results"]
+    s1, s2, s3, meta = res
+    assert s1["timed_out"] is True
+    assert s2["skipped"] and s2["reason"] == "plan deadline exceeded"
+    assert s3["skipped"] and "dependency timed out" in s3["reason"]
+    assert meta["task_status"] == "TIMEOUT"
+
+
+def test_timed_calls_share_a_bounded_pool(slow_tool: ToolSpec) -> None:
+    before = threading.active_count()
+    for _ in range(MAX_TIMED_CALL_THREADS + 8):
+        with pytest.raises(ToolTimeoutError):
+            slow_tool.run({"sleep_s": 0.2}, timeout_s=0.001)
+    assert threading.active_count() - before <= MAX_TIMED_CALL_THREADS